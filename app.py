@@ -1,8 +1,13 @@
 import os
 import signal
 import sys
+
+# gevent workers need the stdlib patched before ssl/httpx/requests are imported
+from src.worker_mode import apply_worker_patches
+apply_worker_patches()
+
 from src.app_factory import create_app
-from src.config import IS_PRODUCTION, WORKER_PROCESSES, WORKER_THREADS
+from src.config import IS_PRODUCTION
 
 # Create the Flask application
 app = create_app()
@@ -21,6 +26,7 @@ from src.test_openai import test_openai_endpoint
 from src.test_tags import test_tags_endpoint
 from src.whisper import whisper_endpoint
 from src.auth import require_auth, get_user_id_from_request, get_user_email_from_request
+from src.idempotency import idempotent
 
 # Import new database API blueprints
 from src.entries import entries_bp
@@ -47,6 +53,7 @@ def analyze():
 
 @app.route('/api/save-entry', methods=['POST'])
 @require_auth
+@idempotent
 def save_entry():
     user_id = get_user_id_from_request()
     return save_entry_endpoint(supabase, user_id)
@@ -79,6 +86,7 @@ def empathy():
 
 @app.route('/api/update-tags', methods=['POST'])
 @require_auth
+@idempotent
 def update_tags():
     user_id = get_user_id_from_request()
     user_email = get_user_email_from_request()
@@ -86,6 +94,7 @@ def update_tags():
 
 @app.route('/api/update-transcript', methods=['POST'])
 @require_auth
+@idempotent
 def update_transcript():
     user_id = get_user_id_from_request()
     return update_transcript_endpoint(supabase, user_id)
@@ -115,34 +124,27 @@ if __name__ == '__main__':
     
     if IS_PRODUCTION:
         # Use Gunicorn for production
+        import runpy
         from gunicorn.app.base import BaseApplication
         
         class GunicornApp(BaseApplication):
-            def __init__(self, app, options=None):
-                self.options = options or {}
+            def __init__(self, app, config_file):
+                self.config_file = config_file
                 self.application = app
                 super().__init__()
             
             def load_config(self):
-                for key, value in self.options.items():
-                    self.cfg.set(key, value)
+                # Same settings as the Docker CMD (gunicorn -c gunicorn.conf.py)
+                options = runpy.run_path(self.config_file)
+                for key, value in options.items():
+                    if key in self.cfg.settings and value is not None:
+                        self.cfg.set(key, value)
             
             def load(self):
                 return self.application
         
-        options = {
-            'bind': '0.0.0.0:5000',
-            'workers': WORKER_PROCESSES,
-            'worker_class': 'sync',
-            'worker_connections': 1000,
-            'max_requests': 1000,
-            'max_requests_jitter': 50,
-            'timeout': 30,
-            'keepalive': 2,
-            'preload_app': True,
-        }
-        
-        GunicornApp(app, options).run()
+        config_file = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'gunicorn.conf.py')
+        GunicornApp(app, config_file).run()
     else:
         # Use Flask development server for development
         app.run(host='0.0.0.0', port=8000, debug=True)
\ No newline at end of file
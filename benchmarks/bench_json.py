@@ -0,0 +1,138 @@
+"""
+JSON encoding benchmark on realistic response and request payloads.
+
+Compares Flask's stdlib provider with src.json_provider for:
+- /api/entries: a page of voice entries with tags, emoji and timestamps
+- /api/embeddings: entries with 1536-float embedding vectors
+- /api/whisper: the verbose debug blob
+- voice_embeddings upserts: the body postgrest-py sends, with the vector as a
+  list vs a pgvector literal
+
+Usage:
+    python benchmarks/bench_json.py [--entries 200] [--embeddings 50] [--repeat 20]
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+
+from flask import Flask
+from flask.json.provider import DefaultJSONProvider
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.json_provider import HAS_ORJSON, dumps, init_app, loads  # noqa: E402
+from src.db.voice_embeddings import vector_literal  # noqa: E402
+
+WORDS = ('work', 'family', 'tired', 'grateful', 'anxious', 'run', 'friends', 'sleep', 'deadline', 'coffee')
+TAGS = ('reflection', 'stress', 'gratitude', 'health', 'relationships', 'career', 'joy', 'sadness')
+
+
+def make_entry(user_id: str, created_at: datetime) -> dict:
+    transcript = ' '.join(random.choice(WORDS) for _ in range(random.randint(30, 120)))
+    return {
+        'id': str(uuid.uuid4()),
+        'user_id': user_id,
+        'transcript_raw': transcript,
+        'transcript_user': transcript,
+        'tags_model': random.sample(TAGS, 3),
+        'tags_user': random.sample(TAGS, 1),
+        'emoji': '😊',
+        'emotion_score_score': round(random.uniform(-1, 1), 3),
+        'emotion_score_log': 'neutral',
+        'category': None,
+        'created_at': created_at,
+        'updated_at': created_at.isoformat(),
+    }
+
+
+def make_payloads(entries: int, embeddings: int) -> dict:
+    user_id = str(uuid.uuid4())
+    now = datetime.now(timezone.utc)
+    entry_rows = [make_entry(user_id, now - timedelta(hours=i)) for i in range(entries)]
+    embedding_rows = [{
+        'entry_id': str(uuid.uuid4()),
+        'user_id': user_id,
+        'text': entry_rows[i % entries]['transcript_raw'],
+        'embedding': [random.uniform(-0.1, 0.1) for _ in range(1536)],
+    } for i in range(embeddings)]
+    whisper_debug = {
+        'success': True,
+        'text': entry_rows[0]['transcript_raw'],
+        'debug': {
+            'passes': [{
+                'language': lang,
+                'segments': [{'start': s * 2.5, 'end': s * 2.5 + 2.4, 'text': random.choice(WORDS),
+                              'avg_logprob': -random.random(), 'no_speech_prob': random.random()}
+                             for s in range(60)],
+            } for lang in ('en', 'es')],
+            'timings_ms': {'upload': 12.5, 'pass1': 840.2, 'pass2': 910.7, 'select': 0.4},
+        },
+    }
+    return {
+        'entries': {'success': True, 'data': entry_rows},
+        'embeddings': {'success': True, 'data': embedding_rows},
+        'whisper': whisper_debug,
+    }
+
+
+def bench(fn, repeat: int) -> float:
+    fn()
+    started = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - started) / repeat * 1000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--entries', type=int, default=200)
+    parser.add_argument('--embeddings', type=int, default=50)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    random.seed(7)
+    payloads = make_payloads(args.entries, args.embeddings)
+
+    stdlib_app = Flask('stdlib')
+    stdlib_app.json = DefaultJSONProvider(stdlib_app)
+    fast_app = Flask('fast')
+    init_app(fast_app)
+
+    print(f'orjson available: {HAS_ORJSON}')
+    print(f"{'payload':<28}{'size':>10}{'stdlib ms':>12}{'fast ms':>10}{'speedup':>9}")
+
+    def row(name: str, size: int, slow: float, fast: float) -> None:
+        print(f'{name:<28}{size / 1024:>8.0f}KB{slow:>12.2f}{fast:>10.2f}{slow / fast:>8.1f}x')
+
+    for name, payload in payloads.items():
+        with stdlib_app.app_context():
+            body = stdlib_app.json.response(payload).get_data()
+            slow = bench(lambda: stdlib_app.json.response(payload).get_data(), args.repeat)
+        with fast_app.app_context():
+            fast = bench(lambda: fast_app.json.response(payload).get_data(), args.repeat)
+        row(f'jsonify {name}', len(body), slow, fast)
+
+        slow = bench(lambda: json.loads(body), args.repeat)
+        fast = bench(lambda: loads(body), args.repeat)
+        row(f'parse {name}', len(body), slow, fast)
+
+    # What postgrest-py sends for an embeddings upsert: it always encodes with stdlib json
+    rows = payloads['embeddings']['data']
+    as_list = bench(lambda: json.dumps(rows), args.repeat)
+    as_literal = bench(lambda: json.dumps([{**r, 'embedding': vector_literal(r['embedding'])} for r in rows]), args.repeat)
+    row('upsert body (vector)', len(json.dumps(rows)), as_list, as_literal)
+
+    singleflight = {'success': True, 'tags': ['stress', 'career'], 'emoji': '😊'}
+    slow = bench(lambda: json.loads(json.dumps(singleflight)), args.repeat * 100)
+    fast = bench(lambda: loads(dumps(singleflight)), args.repeat * 100)
+    row('redis round trip (small)', len(dumps(singleflight)), slow, fast)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,500 @@
+"""
+Local stand-ins for the services the backend calls, for offline benchmarks.
+
+- FakeSupabase: GoTrue's /auth/v1/user and enough of PostgREST (/rest/v1)
+  for the app's queries, over an in-memory table store
+- FakeOpenAI: /v1/chat/completions, /v1/audio/transcriptions, /v1/embeddings
+- FakeCore: the backend-core microservice (/health, /api/*)
+
+Every fake has a Faults object with added latency, jitter and an error rate,
+which can be changed while the server runs. The fakes are plain threaded
+stdlib servers, fast enough that their own overhead does not dominate the
+results.
+
+Tokens are 'bench-<user_id>'; any other bearer token is rejected like an
+expired Supabase session.
+"""
+
+import json
+import random
+import socket
+import struct
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+from urllib.parse import parse_qsl, unquote, urlsplit
+
+WORDS = ('work', 'family', 'tired', 'grateful', 'anxious', 'run', 'friends', 'sleep', 'deadline', 'coffee',
+         'meeting', 'walk', 'proud', 'stressed', 'dinner', 'project', 'weekend', 'calm', 'call', 'plan')
+TAGS = ('reflection', 'stress', 'gratitude', 'health', 'relationships', 'career', 'joy', 'sadness')
+EMBEDDING_DIMENSIONS = 1536
+
+# Primary keys used to resolve upserts when no on_conflict is given
+PRIMARY_KEYS = {'voice_entries': 'id', 'profiles': 'user_id', 'voice_embeddings': 'entry_id'}
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def token_for(user_id: str) -> str:
+    return f'bench-{user_id}'
+
+
+class Faults:
+    """Latency and error injection for one fake service."""
+
+    def __init__(self, latency: float = 0.0, jitter: float = 0.0, error_rate: float = 0.0, error_status: int = 503):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.error_status = error_status
+
+    def delay(self) -> float:
+        return max(0.0, self.latency + random.uniform(-self.jitter, self.jitter))
+
+    def should_fail(self) -> bool:
+        return self.error_rate > 0 and random.random() < self.error_rate
+
+
+class FakeHandler(BaseHTTPRequestHandler):
+    """Dispatches to server.route(handler, method, path, query) -> (status, body, headers)."""
+
+    protocol_version = 'HTTP/1.1'  # keep-alive, like the real services
+
+    def _handle(self, method: str) -> None:
+        server = self.server
+        server.requests += 1
+        length = int(self.headers.get('Content-Length') or 0)
+        self.body = self.rfile.read(length) if length else b''
+
+        faults = server.faults
+        delay = faults.delay()
+        if delay:
+            time.sleep(delay)
+        if faults.should_fail():
+            server.errors += 1
+            self._send(faults.error_status, {'error': {'message': 'injected fault', 'code': 'injected'}})
+            return
+
+        url = urlsplit(self.path)
+        try:
+            status, body, headers = server.route(self, method, url.path, parse_qsl(url.query, keep_blank_values=True))
+        except Exception as e:
+            status, body, headers = 500, {'message': f'fake {type(server).__name__} failed: {e}'}, {}
+        self._send(status, body, headers)
+
+    def _send(self, status: int, body: Any, headers: Optional[Dict[str, str]] = None) -> None:
+        if isinstance(body, Iterator):
+            self._send_chunked(status, body, headers)
+            return
+        payload = b'' if body is None else json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _send_chunked(self, status: int, chunks: Iterator[bytes], headers: Optional[Dict[str, str]] = None) -> None:
+        """Stream a generator body with chunked transfer encoding, flushing every chunk."""
+        self.send_response(status)
+        for name, value in {'Content-Type': 'text/event-stream', **(headers or {})}.items():
+            self.send_header(name, value)
+        self.send_header('Transfer-Encoding', 'chunked')
+        self.end_headers()
+        for chunk in chunks:
+            self.wfile.write(f'{len(chunk):x}\r\n'.encode() + chunk + b'\r\n')
+            self.wfile.flush()
+        self.wfile.write(b'0\r\n\r\n')
+
+    def do_GET(self):
+        self._handle('GET')
+
+    def do_POST(self):
+        self._handle('POST')
+
+    def do_PATCH(self):
+        self._handle('PATCH')
+
+    def do_DELETE(self):
+        self._handle('DELETE')
+
+    def log_message(self, *args):
+        pass
+
+
+class FakeServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 1024  # the default backlog of 5 drops bursts of connects
+
+    def __init__(self, faults: Optional[Faults] = None):
+        super().__init__(('127.0.0.1', free_port()), FakeHandler)
+        self.faults = faults or Faults()
+        self.requests = 0
+        self.errors = 0
+
+    @property
+    def url(self) -> str:
+        return f'http://127.0.0.1:{self.server_address[1]}'
+
+    def start(self) -> 'FakeServer':
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+    def route(self, handler: FakeHandler, method: str, path: str, query: List[Tuple[str, str]]):
+        raise NotImplementedError
+
+
+# --- Supabase -------------------------------------------------------------
+
+def _parse_value(raw: str) -> Any:
+    if raw == 'null':
+        return None
+    if raw in ('true', 'false'):
+        return raw == 'true'
+    return unquote(raw).strip('"')
+
+
+def _parse_list(raw: str) -> List[str]:
+    return [_parse_value(item) for item in raw.strip('(){}').split(',') if item]
+
+
+def _matches(row: Dict[str, Any], column: str, expression: str) -> bool:
+    negate = expression.startswith('not.')
+    if negate:
+        expression = expression[4:]
+    op, _, raw = expression.partition('.')
+    value = row.get(column)
+    if op == 'eq':
+        result = str(value) == str(_parse_value(raw)) if value is not None else False
+    elif op == 'neq':
+        result = value is not None and str(value) != str(_parse_value(raw))
+    elif op == 'is':
+        result = value is _parse_value(raw) if raw in ('null', 'true', 'false') else False
+    elif op == 'in':
+        result = str(value) in {str(v) for v in _parse_list(raw)}
+    elif op == 'cs':
+        result = isinstance(value, list) and set(_parse_list(raw)) <= set(value)
+    elif op in ('like', 'ilike'):
+        needle = _parse_value(raw).replace('*', '%').strip('%').lower()
+        result = value is not None and needle in str(value).lower()
+    elif op in ('gt', 'gte', 'lt', 'lte'):
+        target = _parse_value(raw)
+        if value is None:
+            result = False
+        else:
+            left, right = (float(value), float(target)) if isinstance(value, (int, float)) else (str(value), str(target))
+            result = {'gt': left > right, 'gte': left >= right, 'lt': left < right, 'lte': left <= right}[op]
+    else:
+        raise ValueError(f'unsupported filter {op}')
+    return not result if negate else result
+
+
+class TableStore:
+    """Thread-safe in-memory tables of JSON rows."""
+
+    def __init__(self):
+        self.tables: Dict[str, List[Dict[str, Any]]] = {}
+        self.lock = threading.Lock()
+
+    def rows(self, table: str) -> List[Dict[str, Any]]:
+        return self.tables.setdefault(table, [])
+
+    def select(self, table: str, filters: List[Tuple[str, str]]) -> List[Dict[str, Any]]:
+        return [row for row in self.rows(table) if all(_matches(row, column, expr) for column, expr in filters)]
+
+    def upsert(self, table: str, records: List[Dict[str, Any]], key: Optional[str],
+               ignore_duplicates: bool = False) -> List[Dict[str, Any]]:
+        rows = self.rows(table)
+        written = []
+        for record in records:
+            existing = next((row for row in rows if row.get(key) == record.get(key)), None) if key and key in record else None
+            if existing is not None and ignore_duplicates:
+                continue
+            if existing is not None:
+                existing.update(record)
+                written.append(existing)
+            else:
+                row = {'created_at': _now(), **record}
+                if table == 'voice_entries':
+                    row.setdefault('id', str(uuid.uuid4()))
+                rows.append(row)
+                written.append(row)
+        return written
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+def _project(row: Dict[str, Any], select: str) -> Dict[str, Any]:
+    if not select or select == '*':
+        return dict(row)
+    return {column.strip(): row.get(column.strip()) for column in select.split(',')}
+
+
+class FakeSupabase(FakeServer):
+    """GoTrue user lookup plus a PostgREST subset over a TableStore."""
+
+    def __init__(self, faults: Optional[Faults] = None):
+        super().__init__(faults)
+        self.store = TableStore()
+        self.users: Dict[str, Dict[str, Any]] = {}
+        # RPCs the app calls; each takes (store, params) -> response body
+        self.rpcs: Dict[str, Callable[[TableStore, Dict[str, Any]], Any]] = {
+            'soft_delete_voice_entry': self._rpc_soft_delete,
+            'patch_voice_entry': self._rpc_patch_entry,
+            'patch_voice_entries': lambda store, params: [
+                row for patch in params.get('patches') or []
+                for row in self._rpc_patch_entry(store, {**patch, 'return_row': True})
+            ],
+            'search_voice_entries': self._rpc_search_entries,
+            'match_embeddings': lambda store, params: [],
+        }
+
+    def add_user(self, user_id: str) -> str:
+        self.users[user_id] = {
+            'id': user_id, 'aud': 'authenticated', 'role': 'authenticated',
+            'email': f'{user_id[:8]}@bench.local', 'app_metadata': {}, 'user_metadata': {},
+            'created_at': _now(),
+        }
+        return token_for(user_id)
+
+    def route(self, handler, method, path, query):
+        if path == '/auth/v1/user':
+            token = handler.headers.get('Authorization', '').replace('Bearer ', '', 1)
+            user = self.users.get(token[len('bench-'):]) if token.startswith('bench-') else None
+            if user is None:
+                return 401, {'code': 401, 'msg': 'invalid JWT: token is expired'}, {}
+            return 200, user, {}
+        if path.startswith('/rest/v1/rpc/'):
+            rpc = self.rpcs.get(path[len('/rest/v1/rpc/'):])
+            if rpc is None:
+                return 404, {'message': f'Could not find the function {path}'}, {}
+            with self.store.lock:
+                return 200, rpc(self.store, json.loads(handler.body or b'{}')), {}
+        if path.startswith('/rest/v1/'):
+            return self._rest(handler, method, path[len('/rest/v1/'):], query)
+        return 404, {'message': f'no route for {path}'}, {}
+
+    def _rest(self, handler, method, table, query):
+        params = {}
+        filters = []
+        for name, value in query:
+            if name in ('select', 'order', 'limit', 'offset', 'on_conflict', 'columns'):
+                params[name] = value
+            else:
+                filters.append((name, value))
+        prefer = handler.headers.get('Prefer', '')
+        single = 'vnd.pgrst.object' in handler.headers.get('Accept', '')
+        representation = 'return=representation' in prefer
+
+        with self.store.lock:
+            if method == 'GET':
+                rows = self.store.select(table, filters)
+                for clause in reversed(params.get('order', '').split(',') if params.get('order') else []):
+                    column, _, direction = clause.partition('.')
+                    rows.sort(key=lambda row: (row.get(column) is None, row.get(column) or ''), reverse=direction.startswith('desc'))
+                offset = int(params.get('offset', 0))
+                limit = int(params['limit']) if 'limit' in params else None
+                if handler.headers.get('Range'):
+                    start, _, end = handler.headers['Range'].partition('-')
+                    offset, limit = int(start), int(end) - int(start) + 1
+                rows = rows[offset:offset + limit if limit is not None else None]
+                data = [_project(row, params.get('select', '*')) for row in rows]
+            elif method == 'POST':
+                records = json.loads(handler.body or b'[]')
+                records = records if isinstance(records, list) else [records]
+                key = params.get('on_conflict') or (PRIMARY_KEYS.get(table) if 'merge-duplicates' in prefer else None)
+                ignore = 'ignore-duplicates' in prefer
+                data = [dict(row) for row in self.store.upsert(table, records, key, ignore)]
+            elif method == 'PATCH':
+                changes = {name: value for name, value in json.loads(handler.body or b'{}').items() if '->' not in name}
+                data = []
+                for row in self.store.select(table, filters):
+                    row.update(changes)
+                    data.append(dict(row))
+            elif method == 'DELETE':
+                removed = self.store.select(table, filters)
+                self.store.tables[table] = [row for row in self.store.rows(table) if row not in removed]
+                data = removed
+            else:
+                return 405, {'message': f'{method} not supported'}, {}
+
+        if single:
+            if len(data) != 1:
+                return 406, {'code': 'PGRST116', 'message': 'JSON object requested, multiple (or no) rows returned',
+                             'details': f'Results contain {len(data)} rows', 'hint': None}, {}
+            return 200, data[0], {}
+        if method != 'GET' and not representation:
+            return 201 if method == 'POST' else 204, None, {}
+        return 201 if method == 'POST' else 200, data, {'Content-Range': f'0-{max(len(data) - 1, 0)}/*'}
+
+    @staticmethod
+    def _rpc_soft_delete(store: TableStore, params: Dict[str, Any]) -> Any:
+        for row in store.select('voice_entries', [('id', f"eq.{params.get('entry_id')}"), ('user_id', f"eq.{params.get('uid')}")]):
+            row['deleted_at'] = _now()
+        return None
+
+    @staticmethod
+    def _rpc_patch_entry(store: TableStore, params: Dict[str, Any]) -> Any:
+        rows = store.select('voice_entries', [('id', f"eq.{params.get('entry_id')}"), ('user_id', f"eq.{params.get('uid')}")])
+        for row in rows:
+            row.update({column: value for column, value in (params.get('if_null') or {}).items() if row.get(column) in (None, [], {})})
+            row.update(params.get('fields') or {})
+        return [dict(row) for row in rows] if params.get('return_row') else []
+
+    @staticmethod
+    def _rpc_search_entries(store: TableStore, params: Dict[str, Any]) -> Any:
+        needle = str(params.get('query_text', '')).lower()
+        rows = [row for row in store.select('voice_entries', [('user_id', f"eq.{params.get('uid') or params.get('user_id')}")])
+                if needle in (row.get('transcript_user') or '').lower()]
+        return rows[:int(params.get('match_count') or params.get('limit_count') or 20)]
+
+    def seed(self, users: int, entries_per_user: int, scored_fraction: float = 0.5, seed: int = 7) -> List[str]:
+        """Create users with entries and profiles; returns their bearer tokens."""
+        rng = random.Random(seed)
+        tokens = []
+        now = datetime.now(timezone.utc)
+        with self.store.lock:
+            for _ in range(users):
+                user_id = str(uuid.uuid4())
+                tokens.append(self.add_user(user_id))
+                for i in range(entries_per_user):
+                    transcript = ' '.join(rng.choice(WORDS) for _ in range(rng.randint(30, 120)))
+                    created_at = (now - timedelta(hours=i * 6)).isoformat()
+                    self.store.rows('voice_entries').append({
+                        'id': str(uuid.uuid4()), 'user_id': user_id,
+                        'transcript_raw': transcript, 'transcript_user': transcript,
+                        'tags_model': rng.sample(TAGS, 3), 'tags_user': rng.sample(TAGS, 2),
+                        'entry_emoji': '😊' if i % 2 else None,
+                        'emotion_score_score': round(rng.uniform(-1, 1), 3) if rng.random() < scored_fraction else None,
+                        'created_at': created_at, 'updated_at': created_at,
+                    })
+                self.store.rows('profiles').append({
+                    'user_id': user_id, 'profile': {'user_id': user_id, 'counters': {'emotions': {}, 'themes': {}, 'buckets': {}},
+                                                    'patterns': {}, 'history': [], 'concepts': []},
+                    'concepts': None, 'updated_at': now.isoformat(),
+                })
+        return tokens
+
+
+# --- OpenAI ---------------------------------------------------------------
+
+class FakeOpenAI(FakeServer):
+    """Chat completions, transcriptions and embeddings with canned, well-formed answers."""
+
+    def __init__(self, faults: Optional[Faults] = None, transcript: str = 'I went for a run after work and feel calm now'):
+        super().__init__(faults)
+        self.transcript = transcript
+
+    def route(self, handler, method, path, query):
+        if method == 'GET' and path == '/v1/models':
+            return 200, {'object': 'list', 'data': [{'id': 'gpt-4o-mini', 'object': 'model', 'owned_by': 'bench'}]}, {}
+        if path == '/v1/chat/completions':
+            return 200, self._chat(json.loads(handler.body)), {}
+        if path == '/v1/audio/transcriptions':
+            return 200, {'text': self.transcript, 'language': 'english', 'duration': 3.2,
+                         'segments': [{'id': 0, 'start': 0.0, 'end': 3.2, 'text': self.transcript,
+                                       'avg_logprob': -0.2, 'no_speech_prob': 0.01}]}, {}
+        if path == '/v1/embeddings':
+            body = json.loads(handler.body)
+            inputs = body['input'] if isinstance(body['input'], list) else [body['input']]
+            return 200, {'object': 'list', 'model': body.get('model'), 'data': [
+                {'object': 'embedding', 'index': i, 'embedding': self._vector(text)} for i, text in enumerate(inputs)
+            ], 'usage': {'prompt_tokens': 8 * len(inputs), 'total_tokens': 8 * len(inputs)}}, {}
+        return 404, {'error': {'message': f'no route for {path}'}}, {}
+
+    @staticmethod
+    def _vector(text: str) -> List[float]:
+        rng = random.Random(hash(text))
+        return [round(rng.uniform(-0.1, 0.1), 6) for _ in range(EMBEDDING_DIMENSIONS)]
+
+    @staticmethod
+    def _reply(prompt: str) -> str:
+        lowered = prompt.lower()
+        if 'score from -1' in lowered:
+            return '0.4'
+        if '"purpose"' in prompt:
+            return json.dumps({'purpose': 'reflection', 'tone': 'calm', 'category': 'health', 'confidence': 0.86})
+        if 'emoji' in lowered:
+            return '🏃'
+        return 'That sounds like a good way to end the day.'
+
+    def _chat(self, body: Dict[str, Any]) -> Dict[str, Any]:
+        prompt = body['messages'][-1]['content'] if body.get('messages') else ''
+        content = self._reply(prompt)
+        prompt_tokens = max(1, len(prompt) // 4)
+        completion_tokens = max(1, len(content) // 4)
+        return {
+            'id': f'chatcmpl-{uuid.uuid4().hex[:12]}', 'object': 'chat.completion', 'created': int(time.time()),
+            'model': body.get('model', 'gpt-4o-mini'),
+            'choices': [{'index': 0, 'finish_reason': 'stop', 'message': {'role': 'assistant', 'content': content}}],
+            'usage': {'prompt_tokens': prompt_tokens, 'completion_tokens': completion_tokens,
+                      'total_tokens': prompt_tokens + completion_tokens},
+        }
+
+
+# --- Backend-core ---------------------------------------------------------
+
+class FakeCore(FakeServer):
+    """
+    The backend-core microservice: /health and the /api/* pipeline calls.
+
+    With `Accept: text/event-stream`, /api/process-transcript and
+    /api/generate-reply stream the reply word by word (token_interval apart)
+    as `token` events followed by a `done` event carrying the full result.
+    """
+
+    REPLY = 'Sounds like the run helped you reset, and that you want to keep it going this week.'
+
+    def __init__(self, faults: Optional[Faults] = None, token_interval: float = 0.02):
+        super().__init__(faults)
+        self.token_interval = token_interval
+
+    def route(self, handler, method, path, query):
+        if path == '/health':
+            return 200, {'status': 'healthy'}, {}
+        if path in ('/api/process-transcript', '/api/generate-reply'):
+            body = json.loads(handler.body or b'{}')
+            result = {'success': True, 'response_text': self.REPLY, 'debug_log': []}
+            if path == '/api/process-transcript':
+                result['updated_profile'] = {
+                    'inference': {'emotion': 'calm', 'theme': 'health', 'bucket': 'evening'},
+                    'signals': {'concept_tags': ['exercise', 'routine']},
+                    'entry_data': {'entry_id': body.get('meta', {}).get('entry_id')},
+                }
+            if 'text/event-stream' in handler.headers.get('Accept', ''):
+                return 200, self._stream(result), {}
+            return 200, result, {}
+        if path.startswith('/api/'):
+            return 200, {'success': True}, {}
+        return 404, {'error': f'no route for {path}'}, {}
+
+    def _stream(self, result: Dict[str, Any]) -> Iterator[bytes]:
+        for i, word in enumerate(result['response_text'].split(' ')):
+            if i:
+                time.sleep(self.token_interval)
+            yield b'event: token\ndata: ' + json.dumps({'text': word if i == 0 else ' ' + word}).encode() + b'\n\n'
+        yield b'event: done\ndata: ' + json.dumps(result).encode() + b'\n\n'
+
+
+def start_fake_core(delay: float) -> FakeCore:
+    """A started FakeCore that answers after `delay` seconds."""
+    return FakeCore(Faults(latency=delay)).start()
+
+
+def silent_wav(seconds: float = 1.0, rate: int = 16000) -> bytes:
+    """A mono 16-bit PCM WAV of silence, for /api/whisper uploads."""
+    frames = b'\x00\x00' * int(seconds * rate)
+    header = b'RIFF' + struct.pack('<I', 36 + len(frames)) + b'WAVE'
+    header += b'fmt ' + struct.pack('<IHHIIHH', 16, 1, 1, rate, rate * 2, 2, 16)
+    header += b'data' + struct.pack('<I', len(frames))
+    return header + frames
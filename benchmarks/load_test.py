@@ -0,0 +1,169 @@
+"""
+Load test comparing sync and gevent gunicorn workers on an I/O-bound route.
+
+Starts a fake core service that answers after a fixed delay, runs gunicorn
+with each worker class pointed at it, and drives GET /api/core/health (which
+waits on the core service) with concurrent clients.
+
+Also checks that the HTTP clients the app uses (requests for the core service,
+httpx for Supabase and OpenAI) yield under gevent: N concurrent calls to the
+fake service must finish in about one delay, not N delays.
+
+Usage:
+    python benchmarks/load_test.py [--concurrency 64] [--requests 640] [--delay 0.2]
+"""
+
+import argparse
+import os
+import signal
+import statistics
+import subprocess
+import sys
+import textwrap
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from fakes import free_port, start_fake_core
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def wait_until_ready(url: str, timeout: float = 30) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            requests.get(url, timeout=1, allow_redirects=False)
+            return
+        except requests.RequestException:
+            time.sleep(0.2)
+    raise RuntimeError(f'Server at {url} did not start')
+
+
+def run_load(url: str, concurrency: int, total: int) -> dict:
+    latencies = []
+    errors = 0
+    lock = threading.Lock()
+    local = threading.local()
+
+    def one(_):
+        nonlocal errors
+        session = getattr(local, 'session', None)
+        if session is None:
+            session = local.session = requests.Session()
+        started = time.perf_counter()
+        try:
+            # nginx terminates TLS in production; without this Talisman redirects
+            ok = session.get(url, headers={'X-Forwarded-Proto': 'https'}, timeout=60).status_code == 200
+        except requests.RequestException:
+            ok = False
+        elapsed = time.perf_counter() - started
+        with lock:
+            latencies.append(elapsed)
+            if not ok:
+                errors += 1
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(one, range(total)))
+    wall = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        'rps': total / wall,
+        'p50': statistics.median(latencies),
+        'p95': latencies[int(len(latencies) * 0.95) - 1],
+        'errors': errors,
+    }
+
+
+def bench_worker_class(worker_class: str, workers: int, core_url: str, args) -> dict:
+    port = free_port()
+    env = dict(
+        os.environ,
+        ENVIRONMENT='production',
+        WORKER_CLASS=worker_class,
+        WORKER_PROCESSES=str(workers),
+        WORKER_CONNECTIONS='1000',
+        GUNICORN_BIND=f'127.0.0.1:{port}',
+        BACKEND_CORE_URL=core_url,
+        ENABLE_METRICS='false',
+        RATE_LIMIT_DEFAULT='1000000 per minute',
+    )
+    proc = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', 'app:app'],
+        cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        url = f'http://127.0.0.1:{port}/api/core/health'
+        wait_until_ready(url)
+        run_load(url, min(args.concurrency, 8), 16)  # warm up
+        return run_load(url, args.concurrency, args.requests)
+    finally:
+        proc.send_signal(signal.SIGTERM)
+        proc.wait(timeout=30)
+
+
+COOPERATIVE_CHECK = textwrap.dedent('''
+    import sys, time
+    sys.path.insert(0, {root!r})
+    from src.worker_mode import apply_worker_patches, verify_cooperative
+    assert apply_worker_patches(), 'WORKER_CLASS is not gevent'
+    verify_cooperative()
+
+    import gevent, httpx, requests
+    url, n, delay = {url!r}, {n}, {delay}
+
+    clients = {{
+        'requests (core service)': lambda: requests.get(url, timeout=10),
+        'httpx (Supabase, OpenAI)': lambda: httpx.get(url, timeout=10),
+    }}
+    failed = False
+    for name, call in clients.items():
+        started = time.perf_counter()
+        gevent.joinall([gevent.spawn(call) for _ in range(n)], raise_error=True)
+        elapsed = time.perf_counter() - started
+        cooperative = elapsed < delay * n / 2
+        failed = failed or not cooperative
+        print(f'  {{name:<26}} {{n}} calls in {{elapsed:.2f}}s -> {{"cooperative" if cooperative else "BLOCKING"}}')
+    sys.exit(1 if failed else 0)
+''')
+
+
+def check_cooperative(core_url: str, delay: float, n: int = 10) -> bool:
+    script = COOPERATIVE_CHECK.format(root=ROOT, url=f'{core_url}/health', n=n, delay=delay)
+    env = dict(os.environ, WORKER_CLASS='gevent')
+    return subprocess.run([sys.executable, '-c', script], cwd=ROOT, env=env).returncode == 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--concurrency', type=int, default=64)
+    parser.add_argument('--requests', type=int, default=640)
+    parser.add_argument('--delay', type=float, default=0.2, help='fake core service latency in seconds')
+    parser.add_argument('--workers', type=int, default=4)
+    args = parser.parse_args()
+
+    core = start_fake_core(args.delay)
+    core_url = core.url
+
+    print('Client cooperativeness under gevent:')
+    cooperative = check_cooperative(core_url, args.delay)
+
+    print(f'\nGET /api/core/health, core latency {args.delay * 1000:.0f}ms, '
+          f'{args.workers} workers, {args.concurrency} concurrent clients, {args.requests} requests')
+    results = {}
+    for worker_class in ('sync', 'gevent'):
+        r = results[worker_class] = bench_worker_class(worker_class, args.workers, core_url, args)
+        print(f'  {worker_class:<7} {r["rps"]:8.1f} req/s   p50 {r["p50"] * 1000:7.0f}ms   '
+              f'p95 {r["p95"] * 1000:7.0f}ms   errors {r["errors"]}')
+
+    print(f'\ngevent throughput gain: {results["gevent"]["rps"] / results["sync"]["rps"]:.1f}x')
+    core.shutdown()
+    sys.exit(0 if cooperative else 1)
+
+
+if __name__ == '__main__':
+    main()
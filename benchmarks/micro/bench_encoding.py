@@ -0,0 +1,26 @@
+"""JSON encoding of a page of entries, as /api/entries responds."""
+
+import json
+
+from flask import Flask
+
+from src.json_provider import dumps, init_app
+
+
+def test_dumps_entries(benchmark, entries_page):
+    body = benchmark(dumps, entries_page)
+    assert body.startswith(b'{"success":true')
+
+
+def test_stdlib_dumps_entries(benchmark, entries_page):
+    """Reference point: what Flask's default provider would cost."""
+    body = benchmark(json.dumps, entries_page, default=str)
+    assert body.startswith('{"success": true')
+
+
+def test_jsonify_entries(benchmark, entries_page):
+    app = Flask(__name__)
+    init_app(app)
+    with app.app_context():
+        response = benchmark(app.json.response, entries_page)
+    assert response.status_code == 200
@@ -0,0 +1,28 @@
+"""profile_manager.update_profile on a long-time user's profile (run by /api/core/process-transcript)."""
+
+import copy
+
+from src.profile_manager import update_profile
+
+INFERENCE = {'emotion': 'calm', 'theme': 'health', 'bucket': 'evening'}
+SIGNALS = {'concept_tags': ['exercise', 'routine', 'concept-3']}
+META = {'entry_id': 'bench-entry', 'timestamp': '2026-01-01T20:00:00Z'}
+
+
+def test_update_profile(benchmark, profile, english_transcript):
+    # Each round gets a fresh copy; the copy is not timed
+    def setup():
+        return (copy.deepcopy(profile), INFERENCE, SIGNALS, english_transcript, META), {}
+
+    updated = benchmark.pedantic(update_profile, setup=setup, rounds=200, warmup_rounds=5)
+    assert len(updated['history']) == 50
+
+
+def test_update_profile_empty(benchmark, english_transcript):
+    from src.profile_manager import create_empty_profile
+
+    def setup():
+        return (create_empty_profile('bench-user'), INFERENCE, SIGNALS, english_transcript, META), {}
+
+    updated = benchmark.pedantic(update_profile, setup=setup, rounds=500, warmup_rounds=5)
+    assert updated['patterns']
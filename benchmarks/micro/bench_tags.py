@@ -0,0 +1,12 @@
+"""Tag validation from /api/update-tags."""
+
+from src.update_tags import validate_tags
+
+
+def test_validate_tags(benchmark, user_tags):
+    standard, custom = benchmark(validate_tags, user_tags)
+    assert len(standard) + len(custom) == len(user_tags)
+
+
+def test_validate_tags_rejects(benchmark, user_tags):
+    assert benchmark(validate_tags, user_tags + ['Not Valid']) is None
@@ -0,0 +1,31 @@
+"""Language detection and result selection run on every /api/whisper call."""
+
+from src.whisper import analyze_with_franc, select_best_result_english_first
+
+
+def test_analyze_with_franc_english(benchmark, english_transcript):
+    result = benchmark(analyze_with_franc, english_transcript)
+    assert result['primary'] == 'en'
+
+
+def test_analyze_with_franc_mixed(benchmark, mixed_transcript):
+    result = benchmark(analyze_with_franc, mixed_transcript)
+    assert result['languages'] == ['zh', 'en']
+
+
+def test_select_best_result(benchmark, english_transcript, mixed_transcript):
+    results = {
+        'english': {'text': mixed_transcript, 'franc': analyze_with_franc(mixed_transcript)},
+        'chinese': {'text': mixed_transcript, 'franc': analyze_with_franc(mixed_transcript)},
+    }
+    result = benchmark(select_best_result_english_first, results)
+    assert result['strategy'] == 'english_preferred'
+
+
+def test_select_best_result_confident_english(benchmark, english_transcript):
+    results = {
+        'english': {'text': english_transcript, 'franc': analyze_with_franc(english_transcript)},
+        'chinese': {'text': '', 'franc': analyze_with_franc('')},
+    }
+    result = benchmark(select_best_result_english_first, results)
+    assert result['strategy'] == 'auto_confident_english'
@@ -0,0 +1,104 @@
+"""
+Synthetic inputs of realistic size for the micro-benchmarks.
+
+Everything is generated from a fixed seed, so runs are comparable with the
+stored baselines.
+"""
+
+import os
+import random
+import sys
+import uuid
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+WORDS = ('work', 'family', 'tired', 'grateful', 'anxious', 'run', 'friends', 'sleep', 'deadline', 'coffee',
+         'meeting', 'walk', 'proud', "didn't", 'stressed', 'dinner', 'project', 'weekend', 'calm', 'call')
+CHINESE = '今天工作很累但是跑步以后感觉好多了我很感激我的朋友和家人'
+EMOTIONS = ('calm', 'anxious', 'fatigued', 'joy', 'relief', 'frustrated')
+THEMES = ('work', 'health', 'family', 'overworking', 'friends')
+TAGS = ('happy', 'calm', 'work', 'health', 'reflection', 'goal-setting', 'my-custom_tag', 'side-project')
+
+
+def _words(rng: random.Random, count: int) -> str:
+    return ' '.join(rng.choice(WORDS) for _ in range(count))
+
+
+@pytest.fixture(scope='session')
+def english_transcript() -> str:
+    """About two minutes of speech."""
+    rng = random.Random(1)
+    return _words(rng, 300).capitalize() + '.'
+
+
+@pytest.fixture(scope='session')
+def mixed_transcript() -> str:
+    rng = random.Random(2)
+    return ' '.join(_words(rng, 6) + ' ' + CHINESE[rng.randrange(0, 20):][:12] for _ in range(30))
+
+
+@pytest.fixture(scope='session')
+def profile() -> dict:
+    """A long-time user's profile: full 50-entry history and about 10k distinct pattern tokens."""
+    rng = random.Random(3)
+    now = datetime.now(timezone.utc)
+    patterns = {f'token{i}': rng.randint(1, 40) for i in range(10_000 - len(WORDS))}
+    patterns.update({word: rng.randint(50, 500) for word in WORDS})
+    return {
+        'user_id': str(uuid.uuid4()),
+        'counters': {
+            'emotions': {emotion: rng.randint(1, 80) for emotion in EMOTIONS},
+            'themes': {theme: rng.randint(1, 80) for theme in THEMES},
+            'buckets': {'morning': 40, 'evening': 70},
+        },
+        'patterns': patterns,
+        'traits': [],
+        'load_score': 42,
+        'last_updated': now.isoformat(),
+        'history': [{
+            'entry_id': str(uuid.uuid4()),
+            'timestamp': (now - timedelta(days=i)).isoformat(),
+            'emotion': rng.choice(EMOTIONS),
+            'theme': rng.choice(THEMES),
+            'text': _words(rng, 120),
+        } for i in range(50)],
+        'last_themes': ['work', 'health', 'family'],
+        'concepts': [f'concept-{i}' for i in range(50)],
+        'quirks': {},
+        'last_styles': [],
+        'last_energy_levels': [],
+        'last_insight_count': 0,
+        'last_insight_text': None,
+        'last_light_nudge_count': 0,
+    }
+
+
+@pytest.fixture(scope='session')
+def entries_page() -> dict:
+    """A GET /api/entries response body with 50 entries."""
+    rng = random.Random(4)
+    now = datetime.now(timezone.utc)
+    user_id = str(uuid.uuid4())
+    return {'success': True, 'data': [{
+        'id': str(uuid.uuid4()),
+        'user_id': user_id,
+        'transcript_raw': (text := _words(rng, rng.randint(30, 200))),
+        'transcript_user': text,
+        'tags_model': rng.sample(TAGS, 3),
+        'tags_user': rng.sample(TAGS, 2),
+        'entry_emoji': '😊',
+        'emotion_score_score': round(rng.uniform(-1, 1), 3),
+        'emotion_score_log': {'timestamp': now.isoformat(), 'score': 0.4, 'method': 'gpt_analysis'},
+        'created_at': now - timedelta(hours=i),
+        'updated_at': (now - timedelta(hours=i)).isoformat(),
+    } for i in range(50)]}
+
+
+@pytest.fixture(scope='session')
+def user_tags() -> list:
+    """What the app sends to /api/update-tags: a handful of predefined and custom tags."""
+    rng = random.Random(5)
+    return rng.sample(TAGS, 6) + [f'custom-{i}' for i in range(4)]
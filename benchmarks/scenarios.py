@@ -0,0 +1,275 @@
+"""
+Offline end-to-end benchmarks against local fakes of Supabase, OpenAI and
+backend-core (see fakes.py).
+
+Starts the fakes, seeds users with entries and profiles, runs the app under
+gunicorn pointed at the fakes, then drives each scenario at a fixed
+concurrency. For each scenario it reports p50/p95/p99 latency, throughput,
+error count and gunicorn CPU time per request.
+
+Results are compared with a baseline file, and the run exits non-zero when a
+scenario regresses by more than --tolerance. Use --save-baseline to record
+a new baseline after an intended change. Baselines depend on the machine, so
+compare runs from the same host.
+
+Usage:
+    python benchmarks/scenarios.py [--scenarios entries,whisper] [--concurrency 16]
+        [--requests 200] [--openai-latency 0.3] [--supabase-latency 0.02]
+        [--error-rate 0] [--worker-class sync] [--save-baseline]
+"""
+
+import argparse
+import json
+import os
+import signal
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional
+
+import requests
+
+from fakes import FakeCore, FakeOpenAI, FakeSupabase, Faults, free_port, silent_wav
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_BASELINE = os.path.join(ROOT, 'benchmarks', 'baselines', 'scenarios.json')
+
+TRANSCRIPT = 'Long day at work, but I went for a run after the deadline and I feel calm and grateful now.'
+WAV = silent_wav()
+
+# name -> request(session, base_url, token, i); each returns a requests.Response
+SCENARIOS: Dict[str, Callable[[requests.Session, str, str, int], requests.Response]] = {
+    'entries': lambda s, url, token, i: s.get(f'{url}/api/entries?limit=20', headers=_headers(token)),
+    'tags': lambda s, url, token, i: s.get(f'{url}/api/tags', headers=_headers(token)),
+    'analyze': lambda s, url, token, i: s.post(f'{url}/api/analyze', headers=_headers(token),
+                                               json={'transcript': f'{TRANSCRIPT} ({i})'}),
+    'emotion-trend': lambda s, url, token, i: s.post(f'{url}/api/emotion-trend', headers=_headers(token), json={}),
+    'whisper': lambda s, url, token, i: s.post(f'{url}/api/whisper', headers=_headers(token),
+                                               files={'file': ('entry.wav', WAV, 'audio/wav')}),
+    'process-transcript': lambda s, url, token, i: s.post(f'{url}/api/core/process-transcript', headers=_headers(token),
+                                                          json={'transcript': TRANSCRIPT, 'meta': {'entry_id': f'e{i}'}}),
+    'process-entry': lambda s, url, token, i: s.post(f'{url}/api/entries/process', headers=_headers(token),
+                                                     data={'audio_duration': '12'},
+                                                     files={'file': ('entry.wav', WAV, 'audio/wav')}),
+}
+
+# A scenario regresses when one of these gets worse than baseline * (1 + tolerance)
+HIGHER_IS_WORSE = ('p50_ms', 'p95_ms', 'p99_ms', 'cpu_ms_per_request')
+
+
+def _headers(token: str) -> Dict[str, str]:
+    # nginx terminates TLS in production; without this Talisman redirects
+    return {'Authorization': f'Bearer {token}', 'X-Forwarded-Proto': 'https'}
+
+
+def process_cpu_seconds(pid: int) -> Optional[float]:
+    """utime + stime of a process and its live children (Linux /proc)."""
+    ticks = os.sysconf('SC_CLK_TCK')
+    try:
+        children = open(f'/proc/{pid}/task/{pid}/children').read().split()
+    except OSError:
+        return None
+    total = 0.0
+    for p in [pid, *map(int, children)]:
+        try:
+            fields = open(f'/proc/{p}/stat').read().rsplit(')', 1)[1].split()
+        except OSError:
+            continue
+        total += (int(fields[11]) + int(fields[12])) / ticks
+    return total
+
+
+def percentile(sorted_values: List[float], q: float) -> float:
+    index = min(len(sorted_values) - 1, max(0, int(round(q * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+
+def run_scenario(name: str, base_url: str, tokens: List[str], concurrency: int, total: int, gunicorn_pid: int) -> dict:
+    request = SCENARIOS[name]
+    latencies: List[float] = []
+    errors = 0
+    lock = threading.Lock()
+    local = threading.local()
+
+    def one(i: int) -> None:
+        nonlocal errors
+        session = getattr(local, 'session', None)
+        if session is None:
+            session = local.session = requests.Session()
+        started = time.perf_counter()
+        try:
+            ok = request(session, base_url, tokens[i % len(tokens)], i).status_code < 400
+        except requests.RequestException:
+            ok = False
+        elapsed = time.perf_counter() - started
+        with lock:
+            latencies.append(elapsed)
+            if not ok:
+                errors += 1
+
+    cpu_before = process_cpu_seconds(gunicorn_pid)
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(one, range(total)))
+    wall = time.perf_counter() - started
+    cpu_after = process_cpu_seconds(gunicorn_pid)
+
+    latencies.sort()
+    return {
+        'requests': total,
+        'errors': errors,
+        'rps': round(total / wall, 1),
+        'p50_ms': round(statistics.median(latencies) * 1000, 1),
+        'p95_ms': round(percentile(latencies, 0.95) * 1000, 1),
+        'p99_ms': round(percentile(latencies, 0.99) * 1000, 1),
+        'cpu_ms_per_request': round((cpu_after - cpu_before) / total * 1000, 2)
+        if cpu_before is not None and cpu_after is not None else None,
+    }
+
+
+def start_app(args, supabase: FakeSupabase, openai: FakeOpenAI, core: FakeCore, log_dir: str):
+    port = free_port()
+    env = dict(
+        os.environ,
+        ENVIRONMENT='production',
+        WORKER_CLASS=args.worker_class,
+        WORKER_PROCESSES=str(args.workers),
+        GUNICORN_BIND=f'127.0.0.1:{port}',
+        SUPABASE_URL=supabase.url,
+        SUPABASE_KEY='bench.supabase.key',
+        OPENAI_API_KEY='sk-bench',
+        OPENAI_BASE_URL=f'{openai.url}/v1',
+        BACKEND_CORE_URL=core.url,
+        # Measure the request path itself: inline enrichment, no shared caches or budgets
+        ENRICHMENT_ASYNC='false',
+        RATE_LIMIT_DEFAULT='1000000 per minute',
+        RATE_LIMIT_STORAGE_URL='memory://',
+        OPENAI_RATE_LIMIT='',
+        OPENAI_TOKEN_LIMIT='',
+        ENABLE_METRICS='false',
+        LOG_LEVEL='WARNING',
+        LOG_FILE=os.path.join(log_dir, 'app.log'),
+    )
+    env.pop('REDIS_URL', None)
+    proc = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', 'app:app'],
+        cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=open(os.path.join(log_dir, 'gunicorn.log'), 'w')
+    )
+    url = f'http://127.0.0.1:{port}'
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        try:
+            requests.get(f'{url}/health', headers={'X-Forwarded-Proto': 'https'}, timeout=1)
+            return proc, url
+        except requests.RequestException:
+            if proc.poll() is not None:
+                break
+            time.sleep(0.2)
+    proc.kill()
+    sys.exit(f'gunicorn did not start; see {log_dir}/gunicorn.log')
+
+
+def compare(results: Dict[str, dict], baseline: Dict[str, dict], tolerance: float) -> List[str]:
+    regressions = []
+    for name, result in results.items():
+        base = baseline.get(name)
+        if not base:
+            continue
+        for metric in HIGHER_IS_WORSE:
+            if result.get(metric) is not None and base.get(metric) and result[metric] > base[metric] * (1 + tolerance):
+                regressions.append(f'{name}: {metric} {result[metric]} vs baseline {base[metric]}')
+        if base.get('rps') and result['rps'] < base['rps'] / (1 + tolerance):
+            regressions.append(f'{name}: rps {result["rps"]} vs baseline {base["rps"]}')
+        if result['errors'] > base.get('errors', 0):
+            regressions.append(f'{name}: {result["errors"]} errors vs baseline {base.get("errors", 0)}')
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--scenarios', default=','.join(SCENARIOS), help='Comma-separated scenario names')
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--requests', type=int, default=200)
+    parser.add_argument('--users', type=int, default=50)
+    parser.add_argument('--entries', type=int, default=40, help='Seeded entries per user')
+    parser.add_argument('--scored-fraction', type=float, default=0.9,
+                        help='Seeded entries that already have an emotion score; emotion-trend scores the rest inline')
+    parser.add_argument('--workers', type=int, default=2)
+    parser.add_argument('--worker-class', default='sync', choices=('sync', 'gevent'))
+    parser.add_argument('--supabase-latency', type=float, default=0.02)
+    parser.add_argument('--openai-latency', type=float, default=0.3)
+    parser.add_argument('--core-latency', type=float, default=0.1)
+    parser.add_argument('--jitter', type=float, default=0.0, help='Uniform +/- seconds added to every fake')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='Fraction of fake responses that fail')
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE)
+    parser.add_argument('--save-baseline', action='store_true')
+    parser.add_argument('--tolerance', type=float, default=0.25, help='Allowed relative regression')
+    args = parser.parse_args()
+
+    names = [name.strip() for name in args.scenarios.split(',') if name.strip()]
+    unknown = [name for name in names if name not in SCENARIOS]
+    if unknown:
+        sys.exit(f'Unknown scenarios: {", ".join(unknown)} (choose from {", ".join(SCENARIOS)})')
+
+    def faults(latency: float) -> Faults:
+        return Faults(latency=latency, jitter=args.jitter, error_rate=args.error_rate)
+
+    supabase = FakeSupabase(faults(args.supabase_latency)).start()
+    openai = FakeOpenAI(faults(args.openai_latency)).start()
+    core = FakeCore(faults(args.core_latency)).start()
+    tokens = supabase.seed(args.users, args.entries, args.scored_fraction)
+
+    log_dir = tempfile.mkdtemp(prefix='sentari-bench-')
+    proc, url = start_app(args, supabase, openai, core, log_dir)
+    settings = {key: getattr(args, key) for key in ('concurrency', 'requests', 'users', 'entries', 'scored_fraction', 'workers', 'worker_class',
+                                                    'supabase_latency', 'openai_latency', 'core_latency', 'jitter', 'error_rate')}
+    print(f'{args.worker_class} x{args.workers}, {args.concurrency} concurrent, {args.requests} requests per scenario; '
+          f'fake latency supabase {args.supabase_latency * 1000:.0f}ms, openai {args.openai_latency * 1000:.0f}ms, '
+          f'core {args.core_latency * 1000:.0f}ms, error rate {args.error_rate:.0%}')
+    print(f"{'scenario':<20}{'rps':>8}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'cpu ms/req':>12}{'errors':>8}")
+
+    results = {}
+    try:
+        for name in names:
+            run_scenario(name, url, tokens, min(args.concurrency, 4), min(args.requests, 20), proc.pid)  # warm up
+            r = results[name] = run_scenario(name, url, tokens, args.concurrency, args.requests, proc.pid)
+            cpu = f'{r["cpu_ms_per_request"]:.2f}' if r['cpu_ms_per_request'] is not None else 'n/a'
+            print(f'{name:<20}{r["rps"]:>8.1f}{r["p50_ms"]:>9.1f}{r["p95_ms"]:>9.1f}{r["p99_ms"]:>9.1f}{cpu:>12}{r["errors"]:>8}')
+    finally:
+        proc.send_signal(signal.SIGTERM)
+        proc.wait(timeout=30)
+    print(f'\nFake traffic: supabase {supabase.requests} requests, openai {openai.requests}, core {core.requests}; logs in {log_dir}')
+
+    if args.save_baseline:
+        existing = {}
+        if os.path.exists(args.baseline):
+            with open(args.baseline) as f:
+                existing = json.load(f)
+        existing.update({'settings': settings, **results})
+        os.makedirs(os.path.dirname(args.baseline), exist_ok=True)
+        with open(args.baseline, 'w') as f:
+            json.dump(existing, f, indent=2, sort_keys=True)
+            f.write('\n')
+        print(f'Saved baseline to {os.path.relpath(args.baseline, ROOT)}')
+        return
+
+    if not os.path.exists(args.baseline):
+        print('No baseline to compare against; run with --save-baseline to record one')
+        return
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    if baseline.get('settings') != settings:
+        print(f'Note: baseline was recorded with different settings: {baseline.get("settings")}')
+    regressions = compare(results, baseline, args.tolerance)
+    if regressions:
+        print(f'\nFAIL: regressions beyond {args.tolerance:.0%}:\n  ' + '\n  '.join(regressions))
+        sys.exit(1)
+    print(f'\nOK: no scenario regressed by more than {args.tolerance:.0%} against {os.path.relpath(args.baseline, ROOT)}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,132 @@
+"""
+Startup benchmark and import budget for `import app`.
+
+Times `python -c "import app"` in fresh interpreters, digests one
+`-X importtime` run into the packages that dominate import time, then checks:
+- the median is within --budget-ms
+- none of the lazily-loaded SDKs (openai, supabase, httpx, requests) were
+  imported; they are loaded by gunicorn's master or on first use
+- pyarrow was not imported; only the analytics snapshot and reports load it
+
+preload_sdks() (gunicorn master, once) and warm_worker() (each worker after
+fork) are timed separately, since that is the rest of a worker's cold start.
+
+Exits non-zero when a check fails, so it can gate CI.
+
+Usage:
+    python benchmarks/startup.py [--runs 5] [--budget-ms 1200] [--top 15]
+"""
+
+import argparse
+import os
+import re
+import statistics
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from typing import Dict, List, Tuple
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Must stay out of `import app`; see src/worker_mode.HEAVY_MODULES (pyarrow is
+# only loaded by src/analytics when a snapshot or report runs)
+LAZY_MODULES = ('openai', 'supabase', 'httpx', 'requests', 'pyarrow')
+
+IMPORTTIME_LINE = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$')
+
+# Dummy credentials so create_app() passes validate_environment()
+ENV_DEFAULTS = {
+    'SUPABASE_URL': 'http://127.0.0.1:9',
+    'SUPABASE_KEY': 'startup.benchmark.key',
+    'OPENAI_API_KEY': 'sk-startup-benchmark',
+}
+
+
+def run_import(env: Dict[str, str], importtime: bool = False) -> Tuple[float, str]:
+    command = [sys.executable, '-X', 'importtime', '-c', 'import app'] if importtime else [sys.executable, '-c', 'import app']
+    started = time.perf_counter()
+    result = subprocess.run(command, cwd=ROOT, env=env, capture_output=True, text=True)
+    elapsed = (time.perf_counter() - started) * 1000
+    if result.returncode != 0:
+        sys.exit(f'import app failed:\n{result.stderr[-2000:]}')
+    return elapsed, result.stderr
+
+
+def parse_importtime(output: str) -> List[Tuple[str, int, int]]:
+    """(module, self_us, cumulative_us) for every module import."""
+    modules = []
+    for line in output.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if match:
+            modules.append((match.group(4), int(match.group(1)), int(match.group(2))))
+    return modules
+
+
+def digest(modules: List[Tuple[str, int, int]], top: int) -> List[Tuple[str, float]]:
+    """Self time grouped by top-level package, largest first, in ms."""
+    by_package: Dict[str, int] = defaultdict(int)
+    for name, self_us, _ in modules:
+        by_package[name.split('.')[0]] += self_us
+    return [(name, us / 1000) for name, us in sorted(by_package.items(), key=lambda item: -item[1])[:top]]
+
+
+def time_worker_startup(env: Dict[str, str]) -> Tuple[float, float]:
+    """(preload_sdks ms, warm_worker ms) in the order gunicorn runs them."""
+    code = (
+        'import time, app\n'
+        'from src.worker_mode import preload_sdks, warm_worker\n'
+        'started = time.perf_counter()\n'
+        'preload_sdks()\n'
+        'preloaded = time.perf_counter()\n'
+        'warm_worker()\n'
+        'print((preloaded - started) * 1000, (time.perf_counter() - preloaded) * 1000)\n'
+    )
+    result = subprocess.run([sys.executable, '-c', code], cwd=ROOT, env=env, capture_output=True, text=True)
+    if result.returncode != 0:
+        sys.exit(f'worker startup failed:\n{result.stderr[-2000:]}')
+    preload, warm = result.stdout.strip().splitlines()[-1].split()
+    return float(preload), float(warm)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--budget-ms', type=float, default=1200, help='Median wall-time budget for `import app`')
+    parser.add_argument('--top', type=int, default=15)
+    args = parser.parse_args()
+
+    env = {**ENV_DEFAULTS, **os.environ, 'PYTHONDONTWRITEBYTECODE': '0'}
+    run_import(env)  # populate __pycache__
+
+    walls = [run_import(env)[0] for _ in range(args.runs)]
+    median = statistics.median(walls)
+    modules = parse_importtime(run_import(env, importtime=True)[1])
+    imported = {name for name, _, _ in modules}
+    total_us = sum(self_us for _, self_us, _ in modules)
+
+    print(f'import app: median {median:.0f}ms over {args.runs} runs '
+          f'(min {min(walls):.0f}ms, max {max(walls):.0f}ms); {len(modules)} modules, {total_us / 1000:.0f}ms in imports')
+    print(f'\nTop {args.top} packages by self import time:')
+    for name, ms in digest(modules, args.top):
+        print(f'  {name:<28}{ms:>8.1f}ms')
+
+    preload, warm = time_worker_startup(env)
+    print(f'\npreload_sdks() in the master: {preload:.0f}ms (once)')
+    print(f'warm_worker() after fork: {warm:.0f}ms (per worker)')
+
+    failures = []
+    if median > args.budget_ms:
+        failures.append(f'median {median:.0f}ms exceeds budget {args.budget_ms:.0f}ms')
+    eager = [name for name in LAZY_MODULES if name in imported]
+    if eager:
+        failures.append(f'lazily-loaded modules imported by `import app`: {", ".join(eager)}')
+
+    if failures:
+        print('\nFAIL: ' + '; '.join(failures))
+        sys.exit(1)
+    print(f'\nOK: within {args.budget_ms:.0f}ms budget, {", ".join(LAZY_MODULES)} not imported')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,68 @@
+"""
+Gunicorn configuration shared by the Docker CMD and `python app.py`.
+
+Worker sizing (see README "Worker sizing"):
+    sync:   workers = target_rps * p95_latency_s   (one request per worker)
+    gevent: workers = CPU cores, worker_connections >= target_rps * p95_latency_s / workers
+"""
+
+import glob
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+# Must run before the app (and ssl) is preloaded in the master
+from src.worker_mode import (
+    GUNICORN_WORKER_CLASSES, apply_worker_patches, verify_cooperative, preload_sdks, warm_worker
+)
+
+apply_worker_patches()
+
+from src.config import WORKER_PROCESSES, WORKER_CLASS, WORKER_CONNECTIONS
+
+bind = os.getenv('GUNICORN_BIND', '0.0.0.0:5000')
+workers = WORKER_PROCESSES
+worker_class = GUNICORN_WORKER_CLASSES[WORKER_CLASS]
+worker_connections = WORKER_CONNECTIONS
+max_requests = 1000
+max_requests_jitter = 50
+timeout = 30
+keepalive = 2
+preload_app = True
+
+# Multiprocess metrics: clear samples left by a previous run before the app is preloaded
+PROMETHEUS_MULTIPROC_DIR = os.getenv('PROMETHEUS_MULTIPROC_DIR')
+if PROMETHEUS_MULTIPROC_DIR:
+    os.makedirs(PROMETHEUS_MULTIPROC_DIR, exist_ok=True)
+    for path in glob.glob(os.path.join(PROMETHEUS_MULTIPROC_DIR, '*.db')):
+        os.remove(path)
+
+
+def when_ready(server):
+    # After the app is preloaded and before workers fork
+    preload_sdks()
+
+
+def post_fork(server, worker):
+    # The default action of USR2 would kill a worker that is still booting
+    from src.profiler import ignore_profile_signal
+    ignore_profile_signal()
+
+
+def post_worker_init(worker):
+    verify_cooperative()
+    # Clients hold connection pools, so each worker creates its own after fork
+    warm_worker()
+
+    # After gunicorn resets worker signal handlers; USR2 on a worker starts a profile
+    from src.profiler import install_signal_handler
+    install_signal_handler()
+
+
+def child_exit(server, worker):
+    from src.profiler import unregister_worker
+    unregister_worker(worker.pid)
+    if PROMETHEUS_MULTIPROC_DIR:
+        from prometheus_client import multiprocess
+        multiprocess.mark_process_dead(worker.pid)
@@ -0,0 +1,94 @@
+-- patch_voice_entry: update several voice_entries columns in one statement.
+--
+-- Columns in `fields` are always written. Columns in `if_null` are written only
+-- when the stored value is null or an empty array/object; the check happens
+-- inside the UPDATE, so concurrent enrichments of one entry cannot overwrite
+-- each other and callers need no read first. Keys must be voice_entries column
+-- names (values are cast by jsonb_populate_record). The updated row is returned
+-- when return_row is true.
+--
+-- Called by VoiceEntriesDB.patch_entry(); patch_voice_entries below applies it
+-- to a batch. Apply once per database, from the
+-- Supabase SQL editor or with:
+--   psql "$SUPABASE_DATABASE_URL" -f sql/patch_voice_entry.sql
+
+create or replace function public.patch_voice_entry(
+    entry_id uuid,
+    uid uuid,
+    fields jsonb default '{}'::jsonb,
+    if_null jsonb default '{}'::jsonb,
+    return_row boolean default false
+)
+returns setof public.voice_entries
+language plpgsql
+security invoker
+set search_path = public
+as $$
+declare
+    assignments text;
+    statement text;
+begin
+    select string_agg(
+        case when requested.conditional
+            then format(
+                '%1$I = case when e.%1$I is null or to_jsonb(e.%1$I) in (''[]''::jsonb, ''{}''::jsonb) then p.%1$I else e.%1$I end',
+                requested.name
+            )
+            else format('%1$I = p.%1$I', requested.name)
+        end,
+        ', '
+    )
+    into assignments
+    from (
+        select name, false as conditional from jsonb_object_keys(fields) as name
+        union all
+        select name, true from jsonb_object_keys(if_null) as name where not fields ? name
+    ) as requested;
+
+    if assignments is null then
+        if return_row then
+            return query select e.* from public.voice_entries e where e.id = entry_id and e.user_id = uid;
+        end if;
+        return;
+    end if;
+
+    statement := format(
+        'update public.voice_entries e set %s '
+        'from jsonb_populate_record(null::public.voice_entries, $1) p '
+        'where e.id = $2 and e.user_id = $3',
+        assignments
+    );
+    if return_row then
+        return query execute statement || ' returning e.*' using if_null || fields, entry_id, uid;
+    else
+        execute statement using if_null || fields, entry_id, uid;
+    end if;
+end;
+$$;
+
+-- patch_voice_entries: apply patch_voice_entry to many entries in one call.
+--
+-- `patches` is a JSON array of {"entry_id", "uid", "fields", "if_null"}
+-- objects. Entries that no longer exist are skipped rather than recreated.
+-- Returns the updated rows. Called by VoiceEntriesDB.patch_entries().
+
+create or replace function public.patch_voice_entries(patches jsonb)
+returns setof public.voice_entries
+language plpgsql
+security invoker
+set search_path = public
+as $$
+declare
+    patch jsonb;
+begin
+    for patch in select value from jsonb_array_elements(patches) loop
+        return query select * from public.patch_voice_entry(
+            (patch->>'entry_id')::uuid,
+            (patch->>'uid')::uuid,
+            coalesce(patch->'fields', '{}'::jsonb),
+            coalesce(patch->'if_null', '{}'::jsonb),
+            true
+        );
+    end loop;
+end;
+$$;
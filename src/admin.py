@@ -0,0 +1,156 @@
+"""
+Admin-only operational endpoints.
+
+Callers are admins when they send X-Admin-Token matching ADMIN_TOKEN, or a
+bearer token for a user listed in ADMIN_USER_IDS. With neither configured the
+endpoints are disabled.
+"""
+
+import hmac
+import inspect
+import logging
+import os
+from functools import wraps
+
+from flask import Blueprint, g, jsonify, request, send_from_directory
+
+from . import analytics
+from .auth import authenticated_user
+from .config import ADMIN_TOKEN, ADMIN_USER_IDS, PROFILE_DIR, PROFILE_INTERVAL_MS, PROFILE_MAX_SECONDS
+from .profiler import list_profiles, signal_sibling_workers, start_worker_profile
+
+logger = logging.getLogger(__name__)
+
+admin_bp = Blueprint('admin', __name__)
+
+
+def is_admin_request() -> bool:
+    """Check (once per request) whether the caller is an admin."""
+    if 'is_admin' in g:
+        return g.is_admin
+
+    is_admin = False
+    admin_token = request.headers.get('X-Admin-Token')
+    auth_header = request.headers.get('Authorization', '')
+    if ADMIN_TOKEN and admin_token:
+        is_admin = hmac.compare_digest(admin_token, ADMIN_TOKEN)
+    elif ADMIN_USER_IDS and auth_header.startswith('Bearer '):
+        user = authenticated_user()
+        is_admin = user is not None and user.id in ADMIN_USER_IDS
+
+    g.is_admin = is_admin
+    return is_admin
+
+
+def require_admin(f):
+    """Decorator to restrict an endpoint to admins"""
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        if not is_admin_request():
+            return jsonify({'error': 'Admin access required'}), 403
+        return f(*args, **kwargs)
+    return decorated_function
+
+
+@admin_bp.route('/api/admin/profile', methods=['POST'])
+@require_admin
+def start_profile():
+    """
+    Sample this worker's stacks for N seconds and write a collapsed-stack file.
+
+    Expected JSON payload (all optional):
+    {
+        "seconds": 30,
+        "interval_ms": 10,
+        "all_workers": false
+    }
+    """
+    try:
+        data = request.get_json(silent=True) or {}
+        seconds = float(data.get('seconds', 30))
+        interval_ms = float(data.get('interval_ms', PROFILE_INTERVAL_MS))
+        if seconds <= 0 or seconds > PROFILE_MAX_SECONDS or interval_ms < 1:
+            return jsonify({'error': f'seconds must be in (0, {PROFILE_MAX_SECONDS}] and interval_ms >= 1'}), 400
+
+        started = start_worker_profile(seconds, interval_ms)
+        if started is None:
+            return jsonify({'error': f'Worker {os.getpid()} is already being profiled'}), 409
+
+        signalled = signal_sibling_workers(seconds, interval_ms) if data.get('all_workers') else []
+        logger.info(f'Profiling worker {os.getpid()} for {seconds}s, signalled workers {signalled}')
+
+        return jsonify({
+            'success': True,
+            'profile': started,
+            'signalled_workers': signalled,
+            'message': 'Profiles are written to GET /api/admin/profiles when sampling ends'
+        }), 202
+    except (TypeError, ValueError):
+        return jsonify({'error': 'seconds and interval_ms must be numbers'}), 400
+    except Exception as e:
+        logger.error(f'Error starting profile: {str(e)}')
+        return jsonify({'error': str(e)}), 500
+
+
+@admin_bp.route('/api/admin/profiles', methods=['GET'])
+@require_admin
+def get_profiles():
+    """List collapsed-stack profiles, newest first."""
+    try:
+        return jsonify({'success': True, 'profiles': list_profiles()})
+    except Exception as e:
+        logger.error(f'Error listing profiles: {str(e)}')
+        return jsonify({'error': str(e)}), 500
+
+
+@admin_bp.route('/api/admin/profiles/<name>', methods=['GET'])
+@require_admin
+def download_profile(name: str):
+    """Download a collapsed-stack profile (feed to flamegraph.pl or speedscope)."""
+    if not name.endswith('.collapsed'):
+        return jsonify({'error': 'Profile not found'}), 404
+    return send_from_directory(os.path.abspath(PROFILE_DIR), name, mimetype='text/plain', as_attachment=True)
+
+
+@admin_bp.route('/api/admin/analytics', methods=['GET'])
+@require_admin
+def get_analytics_snapshot():
+    """When the analytics snapshot was taken and which reports it serves."""
+    try:
+        return jsonify({'success': True, 'snapshot': analytics.snapshot_metadata(), 'reports': sorted(analytics.REPORTS)})
+    except analytics.SnapshotNotFound as e:
+        return jsonify({'error': str(e)}), 404
+
+
+@admin_bp.route('/api/admin/analytics/<report>', methods=['GET'])
+@require_admin
+def get_analytics_report(report: str):
+    """
+    Run a report against the columnar snapshot; never queries Supabase.
+
+    Query parameters (all optional): user_id, days, bucket (emotion-trend),
+    limit and source (tag-frequency).
+    """
+    fn = analytics.REPORTS.get(report)
+    if fn is None:
+        return jsonify({'error': f'Unknown report; expected one of {", ".join(sorted(analytics.REPORTS))}'}), 404
+    if not analytics.HAS_PYARROW:
+        return jsonify({'error': 'Analytics reports need pyarrow installed'}), 503
+
+    params = inspect.signature(fn).parameters
+    kwargs = {'user_id': request.args.get('user_id')}
+    for name, cast in (('days', int), ('bucket', str), ('limit', int), ('source', str)):
+        if name in request.args and name in params:
+            kwargs[name] = request.args.get(name, type=cast)
+    if any(value is None for name, value in kwargs.items() if name != 'user_id'):
+        return jsonify({'error': 'days and limit must be integers'}), 400
+
+    try:
+        return jsonify({'success': True, 'snapshot': analytics.snapshot_metadata()['taken_at'], 'data': fn(**kwargs)})
+    except analytics.SnapshotNotFound as e:
+        return jsonify({'error': str(e)}), 404
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        logger.error(f'Error running analytics report {report}: {str(e)}')
+        return jsonify({'error': str(e)}), 500
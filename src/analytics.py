@@ -0,0 +1,311 @@
+"""
+Columnar snapshot of voice_entries metadata for analytics.
+
+Trend, tag and language reports that span many users or long windows are
+computed with vectorised Arrow kernels over a Parquet snapshot instead of
+paging row-by-row JSON out of PostgREST. The snapshot holds no transcripts,
+only: user_id, entry_id, created_at, tags_model, tags_user, emotion_score,
+language and audio_duration. Soft-deleted entries are left out. It is
+partitioned by month:
+
+    {ANALYTICS_DIR}/voice_entries/month=2026-10/part-0.parquet
+
+Take a snapshot (nightly via Celery beat, or by hand) and run reports with:
+    python -m src.analytics snapshot
+    python -m src.analytics report emotion-trend --days 90 --bucket week
+    celery -A src.celery_app beat      # schedules the snapshot daily
+
+pyarrow is only needed by the snapshot job and the reports, and is imported on
+first use so `import app` stays light; without it the admin report endpoints
+return 503.
+"""
+
+import argparse
+import importlib.util
+import json
+import logging
+import os
+import shutil
+import time
+from datetime import datetime, timedelta, timezone
+from typing import TYPE_CHECKING, Any, Dict, Iterable, List, Optional
+
+from .celery_app import celery_app
+from .config import ANALYTICS_DIR, ANALYTICS_PAGE_SIZE, ANALYTICS_ROW_GROUP_SIZE
+
+if TYPE_CHECKING:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+HAS_PYARROW = importlib.util.find_spec('pyarrow') is not None
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_COLUMNS = 'id, user_id, created_at, tags_model, tags_user, emotion_score_score, language_detected, audio_duration, deleted_at'
+DATASET = 'voice_entries'
+METADATA_FILE = '_snapshot.json'
+BUCKETS = ('day', 'week', 'month')
+
+
+class SnapshotNotFound(Exception):
+    """No snapshot has been taken yet."""
+
+
+def _require_pyarrow() -> None:
+    """Import pyarrow into the module globals on first use."""
+    global pa, pc, ds, pq, SCHEMA
+    if not HAS_PYARROW:
+        raise RuntimeError('pyarrow is required for analytics snapshots (pip install pyarrow)')
+    if 'SCHEMA' in globals():
+        return
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.dataset as ds
+    import pyarrow.parquet as pq
+    SCHEMA = pa.schema([
+        ('user_id', pa.dictionary(pa.int32(), pa.string())),
+        ('entry_id', pa.string()),
+        ('created_at', pa.timestamp('us', tz='UTC')),
+        ('tags_model', pa.list_(pa.string())),
+        ('tags_user', pa.list_(pa.string())),
+        ('emotion_score', pa.float64()),
+        ('language', pa.dictionary(pa.int32(), pa.string())),
+        ('audio_duration', pa.float64()),
+    ])
+
+
+def _parse_timestamp(value: str) -> datetime:
+    parsed = datetime.fromisoformat(value)
+    # Client-supplied local times are stored without an offset; treat them as UTC
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+
+def _to_table(rows: List[Dict[str, Any]]) -> 'pa.Table':
+    return pa.Table.from_pydict({
+        'user_id': [row['user_id'] for row in rows],
+        'entry_id': [row['id'] for row in rows],
+        'created_at': [_parse_timestamp(row['created_at']) for row in rows],
+        'tags_model': [row.get('tags_model') or [] for row in rows],
+        'tags_user': [row.get('tags_user') or [] for row in rows],
+        'emotion_score': [row.get('emotion_score_score') for row in rows],
+        'language': [row.get('language_detected') for row in rows],
+        'audio_duration': [row.get('audio_duration') for row in rows],
+    }, schema=SCHEMA)
+
+
+class _MonthWriter:
+    """
+    Buffer rows per month and write each month's Parquet file in row groups.
+
+    A month is flushed when its buffer fills a row group or when rows move on
+    to another month, so rows arriving in month order keep one buffer alive.
+    """
+
+    def __init__(self, root: str):
+        self.root = root
+        self.buffers: Dict[str, List[Dict[str, Any]]] = {}
+        self.writers: Dict[str, 'pq.ParquetWriter'] = {}
+        self.rows = 0
+        self.month: Optional[str] = None
+
+    def add(self, rows: Iterable[Dict[str, Any]]) -> None:
+        for row in rows:
+            month = _parse_timestamp(row['created_at']).astimezone(timezone.utc).strftime('%Y-%m')
+            if month != self.month:
+                if self.month is not None:
+                    self._flush(self.month)
+                self.month = month
+            buffer = self.buffers.setdefault(month, [])
+            buffer.append(row)
+            if len(buffer) >= ANALYTICS_ROW_GROUP_SIZE:
+                self._flush(month)
+
+    def _flush(self, month: str) -> None:
+        rows = self.buffers.pop(month, [])
+        if not rows:
+            return
+        writer = self.writers.get(month)
+        if writer is None:
+            directory = os.path.join(self.root, f'month={month}')
+            os.makedirs(directory, exist_ok=True)
+            writer = pq.ParquetWriter(os.path.join(directory, 'part-0.parquet'), SCHEMA, compression='zstd')
+            self.writers[month] = writer
+        writer.write_table(_to_table(rows))
+        self.rows += len(rows)
+
+    def close(self) -> None:
+        for month in list(self.buffers):
+            self._flush(month)
+        for writer in self.writers.values():
+            writer.close()
+
+
+def take_snapshot(root: str = ANALYTICS_DIR) -> Dict[str, Any]:
+    """
+    Snapshot every entry's metadata into {root}/voice_entries.
+
+    Entries are read newest first with keyset pages, so months arrive one after
+    another and memory stays at about one row group. The new snapshot is written
+    beside the old one and swapped in with a rename, so readers never see a
+    partial snapshot.
+    """
+    _require_pyarrow()
+    from .db import VoiceEntriesDB
+
+    started = time.monotonic()
+    target = os.path.join(root, DATASET)
+    staging = f'{target}.tmp-{os.getpid()}'
+    shutil.rmtree(staging, ignore_errors=True)
+    os.makedirs(staging)
+
+    writer = _MonthWriter(staging)
+    try:
+        for page in VoiceEntriesDB().iter_entries(SNAPSHOT_COLUMNS, ANALYTICS_PAGE_SIZE):
+            writer.add(row for row in page if not row.get('deleted_at'))
+    except BaseException:
+        writer.close()
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+    writer.close()
+
+    metadata = {
+        'taken_at': datetime.now(timezone.utc).isoformat(),
+        'rows': writer.rows,
+        'months': sorted(writer.writers),
+        'seconds': round(time.monotonic() - started, 2)
+    }
+    with open(os.path.join(staging, METADATA_FILE), 'w', encoding='utf-8') as f:
+        json.dump(metadata, f)
+
+    previous = f'{target}.old-{os.getpid()}'
+    if os.path.exists(target):
+        os.rename(target, previous)
+    os.rename(staging, target)
+    shutil.rmtree(previous, ignore_errors=True)
+
+    logger.info(f"Analytics snapshot: {metadata['rows']} entries in {len(metadata['months'])} months, {metadata['seconds']}s")
+    return metadata
+
+
+@celery_app.task(queue='analytics')
+def snapshot_task() -> Dict[str, Any]:
+    return take_snapshot()
+
+
+def snapshot_metadata(root: str = ANALYTICS_DIR) -> Dict[str, Any]:
+    """When the current snapshot was taken and how many entries it holds."""
+    path = os.path.join(root, DATASET, METADATA_FILE)
+    if not os.path.exists(path):
+        raise SnapshotNotFound(f'No analytics snapshot in {root}; run python -m src.analytics snapshot')
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def load_entries(columns: List[str], user_id: Optional[str] = None, days: Optional[int] = None,
+                 root: str = ANALYTICS_DIR) -> 'pa.Table':
+    """
+    Read columns from the snapshot, optionally for one user and the last N days.
+
+    The day window also prunes whole month partitions before any file is opened.
+    """
+    _require_pyarrow()
+    snapshot_metadata(root)
+    dataset = ds.dataset(os.path.join(root, DATASET), format='parquet', partitioning='hive',
+                         exclude_invalid_files=True)
+
+    condition = None
+    if user_id is not None:
+        condition = ds.field('user_id') == user_id
+    if days is not None:
+        since = datetime.now(timezone.utc) - timedelta(days=days)
+        window = (ds.field('month') >= since.strftime('%Y-%m')) & (ds.field('created_at') >= pa.scalar(since, pa.timestamp('us', tz='UTC')))
+        condition = window if condition is None else condition & window
+    return dataset.to_table(columns=columns, filter=condition)
+
+
+def emotion_trend(user_id: Optional[str] = None, days: int = 30, bucket: str = 'day',
+                  root: str = ANALYTICS_DIR) -> List[Dict[str, Any]]:
+    """Mean emotion score and entry count per day, week or month."""
+    if bucket not in BUCKETS:
+        raise ValueError(f'bucket must be one of {", ".join(BUCKETS)}')
+    table = load_entries(['created_at', 'emotion_score'], user_id, days, root)
+    table = table.filter(pc.is_valid(table['emotion_score']))
+    table = table.append_column('bucket', pc.floor_temporal(table['created_at'], unit=bucket))
+    grouped = table.group_by('bucket').aggregate([('emotion_score', 'mean'), ('emotion_score', 'count')])
+    grouped = grouped.sort_by('bucket')
+    return [
+        {'bucket': start.date().isoformat(), 'mean_score': round(mean, 4), 'entries': count}
+        for start, mean, count in zip(grouped['bucket'].to_pylist(),
+                                      grouped['emotion_score_mean'].to_pylist(),
+                                      grouped['emotion_score_count'].to_pylist())
+    ]
+
+
+def tag_frequency(user_id: Optional[str] = None, days: Optional[int] = None, limit: int = 20,
+                  source: str = 'user', root: str = ANALYTICS_DIR) -> List[Dict[str, Any]]:
+    """Most used tags; source is 'user' (tags_user), 'model' (tags_model) or 'all'."""
+    columns = {'user': ['tags_user'], 'model': ['tags_model'], 'all': ['tags_user', 'tags_model']}.get(source)
+    if columns is None:
+        raise ValueError("source must be 'user', 'model' or 'all'")
+    table = load_entries(columns, user_id, days, root)
+    tags = pa.chunked_array([chunk for column in columns for chunk in pc.list_flatten(table[column]).chunks],
+                            type=pa.string())
+    counts = pc.value_counts(tags)
+    order = pc.array_sort_indices(counts.field('counts'), order='descending')[:limit]
+    top = counts.take(order)
+    return [{'tag': tag, 'count': count} for tag, count in zip(top.field('values').to_pylist(), top.field('counts').to_pylist())]
+
+
+def language_mix(user_id: Optional[str] = None, days: Optional[int] = None,
+                 root: str = ANALYTICS_DIR) -> List[Dict[str, Any]]:
+    """Share of entries and recorded seconds per detected language."""
+    table = load_entries(['language', 'audio_duration'], user_id, days, root)
+    table = table.set_column(0, 'language', pc.fill_null(pc.cast(table['language'], pa.string()), 'unknown'))
+    grouped = table.group_by('language').aggregate([('language', 'count'), ('audio_duration', 'sum')])
+    grouped = grouped.sort_by([('language_count', 'descending')])
+    total = max(table.num_rows, 1)
+    return [
+        {'language': language, 'entries': count, 'share': round(count / total, 4), 'audio_seconds': seconds or 0}
+        for language, count, seconds in zip(grouped['language'].to_pylist(),
+                                            grouped['language_count'].to_pylist(),
+                                            grouped['audio_duration_sum'].to_pylist())
+    ]
+
+
+REPORTS = {
+    'emotion-trend': emotion_trend,
+    'tag-frequency': tag_frequency,
+    'language-mix': language_mix,
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Columnar analytics snapshot')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    snapshot = subparsers.add_parser('snapshot', help='Snapshot voice_entries metadata to Parquet')
+    snapshot.add_argument('--output', default=ANALYTICS_DIR)
+    report = subparsers.add_parser('report', help='Run a report against the snapshot')
+    report.add_argument('name', choices=sorted(REPORTS))
+    report.add_argument('--user-id')
+    report.add_argument('--days', type=int)
+    report.add_argument('--bucket', choices=BUCKETS, default='day')
+    report.add_argument('--limit', type=int, default=20)
+    report.add_argument('--source', choices=('user', 'model', 'all'), default='user')
+    report.add_argument('--root', default=ANALYTICS_DIR)
+    args = parser.parse_args()
+
+    if args.command == 'snapshot':
+        print(json.dumps(take_snapshot(args.output), indent=2))
+    elif args.command == 'report':
+        kwargs: Dict[str, Any] = {'user_id': args.user_id, 'root': args.root}
+        if args.days is not None:
+            kwargs['days'] = args.days
+        if args.name == 'emotion-trend':
+            kwargs['bucket'] = args.bucket
+        if args.name == 'tag-frequency':
+            kwargs.update(limit=args.limit, source=args.source)
+        print(json.dumps(REPORTS[args.name](**kwargs), indent=2))
+
+
+if __name__ == '__main__':
+    main()
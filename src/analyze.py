@@ -1,18 +1,39 @@
 from flask import request, jsonify
-from supabase import Client
-import openai
-import os
 import logging
 from datetime import datetime
-from .config import OPENAI_CHAT_MODEL
+from typing import TYPE_CHECKING, Any, Dict, Optional
+from .config import ENRICHMENT_ASYNC
+from .db import VoiceEntriesDB
+from .enrichment import enqueue_enrichment
+from .fast_classifier import classify_tags_fast, is_confident
+from .llm import chat_completion
+from .logging_setup import redact_transcript
+from .metrics import CACHE_REQUESTS
+from .singleflight import single_flight
+
+if TYPE_CHECKING:
+    from supabase import Client
 
 logger = logging.getLogger(__name__)
 
+entries_db = VoiceEntriesDB()
+
 def classify_mini_tags(transcript: str):
     """Classify transcript into purpose, tone, and category tags"""
-    try:
-        openai.api_key = os.getenv('OPENAI_API_KEY')
+    # Answer confident cases locally and only escalate the rest to GPT
+    fast = classify_tags_fast(transcript)
+    confident = is_confident(fast)
+    CACHE_REQUESTS.labels('fast_classifier', 'hit' if confident else 'miss').inc()
+    if confident:
+        return {
+            "purpose": fast["purpose"],
+            "tone": fast["tone"],
+            "category": fast["category"],
+            "confidence": fast["confidence"],
+            "tier": fast["tier"]
+        }
         
+    try:
         ##Should we try a different approach for the 3 tags? Should we use more, i.e. 3 tags per classification, so 9 total?
         ##Also do we need to define confidence better? Do we need a feedback system that says if it is below 0.8 then it should be run again?
         prompt = f"""
@@ -34,8 +55,8 @@ def classify_mini_tags(transcript: str):
         """
         
         ## Is temperature something we should tune depending on the type of user? Some users are more logical, whereas others are more emotional...
-        response = openai.chat.completions.create(
-            model=OPENAI_CHAT_MODEL,
+        response = chat_completion(
+            'analyze',
             messages=[{"role": "user", "content": prompt}],
             temperature=0.3,
             max_tokens=150
@@ -50,7 +71,8 @@ def classify_mini_tags(transcript: str):
             "purpose": parsed.get("purpose", "reflection"),
             "tone": parsed.get("tone", "calm"),
             "category": parsed.get("category", "personal"),
-            "confidence": parsed.get("confidence", 0.8)
+            "confidence": parsed.get("confidence", 0.8),
+            "tier": "gpt"
         }
         
     except Exception as e:
@@ -59,10 +81,47 @@ def classify_mini_tags(transcript: str):
             "purpose": "reflection",
             "tone": "calm", 
             "category": "personal",
-            "confidence": 0.5
+            "confidence": 0.5,
+            "tier": "fallback"
         }
 
-def analyze_endpoint(supabase: Client, user_id: str):
+def analyze_transcript(user_id: str, transcript: str, entry_id: Optional[str]) -> Dict[str, Any]:
+    """Classify a transcript and store the tags on the entry when one is given"""
+    logger.debug(f'Starting tag analysis for transcript: {redact_transcript(transcript)}')
+    
+    # Classify tags
+    mini = classify_mini_tags(transcript)
+    selected_tags = [mini['purpose'], mini['tone'], mini['category']]
+    
+    logger.debug(f'Tag analysis completed: {mini}')
+    
+    # Update entry if entryId provided
+    if entry_id:
+        # Tags the user or an earlier analysis already set are kept; the database decides per column
+        try:
+            entries_db.patch_entry(entry_id, user_id, if_null={
+                'tags_model': selected_tags,
+                'tags_user': selected_tags,
+                'tags_log': {
+                    'timestamp': datetime.now().isoformat(),
+                    'tags': selected_tags,
+                    'confidence': mini['confidence'],
+                    'tier': mini['tier'],
+                    'reasoning': f"Tag analysis completed: {mini}"
+                }
+            })
+        except Exception as e:
+            logger.error(f'Failed to update entry with tags: {e}')
+            # Continue processing even if DB update fails
+                
+    return {
+        'success': True,
+        'analysis': mini,
+        'selectedTags': selected_tags,
+        'timestamp': datetime.now().isoformat()
+    }
+
+def analyze_endpoint(supabase: 'Client', user_id: str):
     """Handle tag analysis for transcripts"""
     try:
         data = request.get_json()
@@ -72,51 +131,25 @@ def analyze_endpoint(supabase: Client, user_id: str):
         if not transcript or not isinstance(transcript, str):
             return jsonify({'error': 'Missing or invalid transcript'}), 400
             
-        logger.info(f'Starting tag analysis for transcript: {transcript[:100]}...')
-        
-        # Classify tags
-        mini = classify_mini_tags(transcript)
-        selected_tags = [mini['purpose'], mini['tone'], mini['category']]
-        
-        logger.info(f'Tag analysis completed: {mini}')
-        
-        # Update entry if entryId provided
-        if entry_id:
-            # Check existing entry
-            existing_entry = supabase.table('voice_entries').select('tags_model, tags_user').eq('id', entry_id).eq('user_id', user_id).execute()
+        # Clients that poll for results can have the work done off the request path
+        if entry_id and data.get('async') and ENRICHMENT_ASYNC:
+            if not entries_db.get_entries_by_ids([entry_id], 'id', [user_id]):
+                return jsonify({'error': 'Entry not found or access denied'}), 404
+            queued = enqueue_enrichment(user_id, entry_id, ['tags'])
+            if queued is not None:
+                return jsonify({'success': True, 'queued': queued, 'entryId': entry_id}), 202
             
-            update_data = {}
+        # Concurrent duplicates for the same entry share one GPT call and one write
+        if entry_id:
+            payload = single_flight(
+                'analyze', user_id, entry_id,
+                lambda: analyze_transcript(user_id, transcript, entry_id),
+                payload=transcript
+            )
+        else:
+            payload = analyze_transcript(user_id, transcript, entry_id)
             
-            # Only set tags_model if it doesn't exist or is empty
-            if not existing_entry.data or not existing_entry.data[0].get('tags_model'):
-                update_data['tags_model'] = selected_tags
-                
-            # Only set tags_user if it doesn't exist or is empty  
-            if not existing_entry.data or not existing_entry.data[0].get('tags_user'):
-                update_data['tags_user'] = selected_tags
-                
-            if update_data:
-                result = supabase.table('voice_entries').update({
-                    'tags_model': selected_tags,
-                    'tags_log': {
-                        'timestamp': datetime.now().isoformat(),
-                        'tags': selected_tags,
-                        'confidence': mini['confidence'],
-                        'reasoning': f"Tag analysis completed: {mini}"
-                    }
-                }).eq('id', entry_id).eq('user_id', user_id).execute()
-                
-                # Check for errors in the result
-                if hasattr(result, 'error') and result.error:
-                    logger.error(f'Failed to update entry with tags: {result.error}')
-                    # Continue processing even if DB update fails
-                    
-        return jsonify({
-            'success': True,
-            'analysis': mini,
-            'selectedTags': selected_tags,
-            'timestamp': datetime.now().isoformat()
-        })
+        return jsonify(payload)
         
     except Exception as e:
         logger.error(f'Analysis API error: {e}')
@@ -1,24 +1,23 @@
 import os
-import logging
-import logging.config
 from datetime import datetime
 from flask import Flask, jsonify
 from flask_cors import CORS
-from flask_limiter import Limiter
-from flask_limiter.util import get_remote_address
 from flask_compress import Compress
 from flask_talisman import Talisman
-from prometheus_client import make_wsgi_app
 from werkzeug.middleware.proxy_fix import ProxyFix
 from werkzeug.middleware.dispatcher import DispatcherMiddleware
-from supabase import create_client, Client
-import openai
-import structlog
 
+from .instrumentation import init_app as init_instrumentation, metrics_wsgi_app
+from .db.base import LazySupabaseClient
+from .tracing import init_app as init_tracing
+from .profiler import init_app as init_profiler
+from .logging_setup import configure_logging
+from .json_provider import init_app as init_json
+from .rate_limit import init_app as init_rate_limit
 from .config import (
-    validate_environment, get_cors_config, get_logging_config,
+    validate_environment, get_cors_config,
     IS_PRODUCTION, FLASK_SECRET_KEY, MAX_CONTENT_LENGTH,
-    RATE_LIMIT_DEFAULT, RATE_LIMIT_STORAGE_URL, ENABLE_METRICS
+    ENABLE_METRICS
 )
 
 def create_app(test_config=None):
@@ -39,42 +38,26 @@ def create_app(test_config=None):
     else:
         app.config.update(test_config)
     
+    # orjson-backed jsonify/get_json
+    init_json(app)
+    
+    # Registered first so requests short-circuited by later hooks (429, redirects) are traced and counted
+    init_tracing(app)
+    if ENABLE_METRICS:
+        init_instrumentation(app)
+    init_profiler(app)
+    
     # Ensure logs directory exists
     try:
         os.makedirs('logs')
     except OSError:
         pass
     
-    # Configure logging
-    logging.config.dictConfig(get_logging_config())
-    
-    # Configure structured logging
-    structlog.configure(
-        processors=[
-            structlog.stdlib.filter_by_level,
-            structlog.stdlib.add_logger_name,
-            structlog.stdlib.add_log_level,
-            structlog.stdlib.PositionalArgumentsFormatter(),
-            structlog.processors.TimeStamper(fmt="iso"),
-            structlog.processors.StackInfoRenderer(),
-            structlog.processors.format_exc_info,
-            structlog.processors.UnicodeDecoder(),
-            structlog.processors.JSONRenderer() if IS_PRODUCTION else structlog.dev.ConsoleRenderer(),
-        ],
-        context_class=dict,
-        logger_factory=structlog.stdlib.LoggerFactory(),
-        wrapper_class=structlog.stdlib.BoundLogger,
-        cache_logger_on_first_use=True,
-    )
-    
-    # Initialize Supabase client
-    supabase_url = os.getenv('SUPABASE_URL')
-    supabase_key = os.getenv('SUPABASE_KEY')
-    supabase: Client = create_client(supabase_url, supabase_key)
-    app.config['SUPABASE_CLIENT'] = supabase
-    
-    # Initialize OpenAI client
-    openai.api_key = os.getenv('OPENAI_API_KEY')
+    # Configure queue-based logging (stdlib and structlog share one pipeline)
+    configure_logging()
+    
+    # Supabase client, created on first use in each worker process
+    app.config['SUPABASE_CLIENT'] = LazySupabaseClient()
     
     # Configure CORS
     cors_config = get_cors_config()
@@ -94,18 +77,13 @@ def create_app(test_config=None):
             force_https=True
         )
     
-    # Configure compression
+    # Configure compression; streamed responses (exports) compress their own chunks,
+    # since Flask-Compress would buffer the whole stream first
+    app.config['COMPRESS_STREAMS'] = False
     Compress(app)
     
-    # Configure rate limiting
-    limiter = Limiter(
-        app=app,
-        key_func=get_remote_address,
-        default_limits=[RATE_LIMIT_DEFAULT],
-        storage_uri=RATE_LIMIT_STORAGE_URL,
-        strategy="fixed-window"
-    )
-    app.config['LIMITER'] = limiter
+    # Configure rate limiting (per user, weighted by route cost, shared via Redis)
+    app.config['LIMITER'] = init_rate_limit(app)
     
     # Configure simple health check endpoint
     @app.route('/health')
@@ -131,7 +109,7 @@ def create_app(test_config=None):
     # Add metrics endpoint if enabled
     if ENABLE_METRICS:
         app.wsgi_app = DispatcherMiddleware(app.wsgi_app, {
-            '/metrics': make_wsgi_app()
+            '/metrics': metrics_wsgi_app()
         })
     
     return app
@@ -143,12 +121,16 @@ def register_blueprints(app):
     from .profiles import profiles_bp
     from .tags import tags_bp
     from .core_pipeline import core_pipeline_bp
+    from .admin import admin_bp
+    from .dashboard import dashboard_bp
     
     app.register_blueprint(entries_bp)
     app.register_blueprint(embeddings_bp)
     app.register_blueprint(profiles_bp)
     app.register_blueprint(tags_bp)
     app.register_blueprint(core_pipeline_bp)
+    app.register_blueprint(admin_bp)
+    app.register_blueprint(dashboard_bp)
 
 def register_error_handlers(app):
     """Register error handlers for the application."""
@@ -1,12 +1,24 @@
-from flask import request, jsonify
-from supabase import Client
+from flask import current_app, g, request, jsonify
+from typing import TYPE_CHECKING, Any, Optional
+import base64
+import hashlib
+import json
 import logging
+import threading
+import time
+from collections import OrderedDict
 from functools import wraps
 import inspect
 
+from .config import AUTH_CACHE_TTL, AUTH_CACHE_SIZE
+from .tracing import span
+
+if TYPE_CHECKING:
+    from supabase import Client
+
 logger = logging.getLogger(__name__)
 
-def get_user_from_token(supabase: Client, token: str):
+def get_user_from_token(supabase: 'Client', token: str):
     """Get user from Supabase token"""
     try:
         # Verify the token with Supabase
@@ -16,6 +28,83 @@ def get_user_from_token(supabase: Client, token: str):
         logger.error(f"Error getting user from token: {e}")
         return None
 
+# sha256(token) -> (expires_at, user). Opt-in via AUTH_CACHE_TTL: saves a Supabase
+# round trip per poll, but a revoked token keeps working on a worker until it expires here
+_token_cache: 'OrderedDict[str, tuple]' = OrderedDict()
+_token_cache_lock = threading.Lock()
+
+def _token_expiry(token: str) -> Optional[float]:
+    """The JWT's exp claim, read without verification (Supabase verified it)."""
+    try:
+        payload = token.split('.')[1]
+        claims = json.loads(base64.urlsafe_b64decode(payload + '=' * (-len(payload) % 4)))
+        return float(claims['exp'])
+    except (IndexError, KeyError, TypeError, ValueError):
+        return None
+
+def _cached_user(token_hash: str) -> Optional[Any]:
+    with _token_cache_lock:
+        cached = _token_cache.get(token_hash)
+        if cached is None:
+            return None
+        if cached[0] <= time.time():
+            del _token_cache[token_hash]
+            return None
+        _token_cache.move_to_end(token_hash)
+        return cached[1]
+
+def _cache_user(token_hash: str, token: str, user: Any) -> None:
+    expires_at = time.time() + AUTH_CACHE_TTL
+    exp = _token_expiry(token)
+    if exp is not None:
+        expires_at = min(expires_at, exp)
+    with _token_cache_lock:
+        _token_cache[token_hash] = (expires_at, user)
+        _token_cache.move_to_end(token_hash)
+        while len(_token_cache) > AUTH_CACHE_SIZE:
+            _token_cache.popitem(last=False)
+
+def verify_token(supabase: 'Client', token: str):
+    """
+    Verify a token with Supabase, reusing a successful verification for up to
+    AUTH_CACHE_TTL seconds (never past the token's own expiry).
+    """
+    if AUTH_CACHE_TTL <= 0:
+        return get_user_from_token(supabase, token)
+
+    token_hash = hashlib.sha256(token.encode()).hexdigest()
+    user = _cached_user(token_hash)
+    if user is not None:
+        return user
+    user = get_user_from_token(supabase, token)
+    if user:
+        _cache_user(token_hash, token, user)
+    return user
+
+def authenticated_user():
+    """
+    Verify the request's bearer token once per request.
+
+    The rate limiter keys on the user before the view runs, so require_auth and
+    admin checks reuse the result from g instead of calling Supabase again.
+    Returns None when there is no valid token.
+    """
+    if 'auth_user' in g:
+        return g.auth_user
+
+    user = None
+    auth_header = request.headers.get('Authorization', '')
+    supabase = current_app.config.get('SUPABASE_CLIENT')
+    if auth_header.startswith('Bearer ') and supabase:
+        with span('auth.require_auth') as auth_span:
+            user = verify_token(supabase, auth_header.split(' ')[1])
+            auth_span.set_attribute('auth.authenticated', bool(user))
+            if user:
+                auth_span.set_attribute('enduser.id', user.id)
+
+    g.auth_user = user
+    return user
+
 def require_auth(f):
     """Decorator to require authentication"""
     @wraps(f)
@@ -24,18 +113,12 @@ def require_auth(f):
         auth_header = request.headers.get('Authorization')
         if not auth_header or not auth_header.startswith('Bearer '):
             return jsonify({'error': 'Missing or invalid authorization header'}), 401
-            
-        token = auth_header.split(' ')[1]
-        
-        # Get supabase client from app context
-        from flask import current_app
-        supabase = current_app.config.get('SUPABASE_CLIENT')
         
-        if not supabase:
+        if not current_app.config.get('SUPABASE_CLIENT'):
             return jsonify({'error': 'Database connection not available'}), 500
             
         # Verify user
-        user = get_user_from_token(supabase, token)
+        user = authenticated_user()
         if not user:
             return jsonify({'error': 'Invalid or expired token'}), 401
             
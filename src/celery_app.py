@@ -0,0 +1,38 @@
+"""
+Celery application for background jobs.
+
+Run a worker with:
+    celery -A src.celery_app worker -Q enrichment --concurrency 2
+and, for the nightly analytics snapshot:
+    celery -A src.celery_app worker -Q analytics --concurrency 1
+    celery -A src.celery_app beat
+"""
+
+from celery import Celery
+from celery.schedules import crontab
+
+from .config import ANALYTICS_SNAPSHOT_HOUR, REDIS_URL
+
+celery_app = Celery(
+    'sentari',
+    broker=REDIS_URL or 'redis://localhost:6379/0',
+    include=['src.enrichment', 'src.analytics']
+)
+
+celery_app.conf.update(
+    task_serializer='json',
+    accept_content=['json'],
+    task_ignore_result=True,
+    task_acks_late=True,
+    task_reject_on_worker_lost=True,
+    worker_prefetch_multiplier=1,
+    task_default_queue='enrichment',
+    broker_connection_retry_on_startup=True,
+    timezone='UTC',
+    beat_schedule={
+        'analytics-snapshot': {
+            'task': 'src.analytics.snapshot_task',
+            'schedule': crontab(hour=ANALYTICS_SNAPSHOT_HOUR, minute=0),
+        },
+    },
+)
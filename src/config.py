@@ -1,7 +1,6 @@
 import os
 from dotenv import load_dotenv
 from typing import Optional
-import logging
 
 # Load environment variables from .env file
 load_dotenv()
@@ -21,6 +20,13 @@ SUPABASE_URL = os.getenv('SUPABASE_URL')
 SUPABASE_KEY = os.getenv('SUPABASE_KEY')
 OPENAI_API_KEY = os.getenv('OPENAI_API_KEY')
 
+# OpenAI Gateway Configuration (OPENAI_DEADLINE is per request; keep it below the gunicorn timeout)
+OPENAI_TIMEOUT = float(os.getenv('OPENAI_TIMEOUT', '20'))
+OPENAI_DEADLINE = float(os.getenv('OPENAI_DEADLINE', '25'))
+OPENAI_MAX_RETRIES = int(os.getenv('OPENAI_MAX_RETRIES', '2'))
+OPENAI_MAX_CONCURRENCY = int(os.getenv('OPENAI_MAX_CONCURRENCY', '8'))
+OPENAI_BACKOFF_BASE = float(os.getenv('OPENAI_BACKOFF_BASE', '0.5'))
+
 # Backend-Core Microservice Configuration
 BACKEND_CORE_URL = os.getenv('BACKEND_CORE_URL', 'http://localhost:5001')
 
@@ -33,13 +39,21 @@ FLASK_SECRET_KEY = os.getenv('FLASK_SECRET_KEY', 'dev-secret-key-change-in-produ
 CORS_ORIGINS = os.getenv('CORS_ORIGINS', '*').split(',')
 MAX_CONTENT_LENGTH = 16 * 1024 * 1024  # 16MB max file size
 
-# Rate Limiting
-RATE_LIMIT_DEFAULT = os.getenv('RATE_LIMIT_DEFAULT', '100 per minute')
-RATE_LIMIT_STORAGE_URL = os.getenv('RATE_LIMIT_STORAGE_URL', 'memory://')
+# Rate Limiting (budgets are in cost units, see rate_limit.ROUTE_COSTS)
+RATE_LIMIT_DEFAULT = os.getenv('RATE_LIMIT_DEFAULT', '300 per minute')
+RATE_LIMIT_STORAGE_URL = os.getenv('RATE_LIMIT_STORAGE_URL', os.getenv('REDIS_URL') or 'memory://')
+RATE_LIMIT_STRATEGY = os.getenv('RATE_LIMIT_STRATEGY', 'sliding-window-counter')
+OPENAI_RATE_LIMIT = os.getenv('OPENAI_RATE_LIMIT', '500 per minute')  # global, all workers; empty disables
+OPENAI_TOKEN_LIMIT = os.getenv('OPENAI_TOKEN_LIMIT', '200000 per minute')
 
 # Logging Configuration
 LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO' if IS_PRODUCTION else 'DEBUG')
-LOG_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+LOG_FILE = os.getenv('LOG_FILE', 'logs/app.log')
+LOG_MAX_BYTES = int(os.getenv('LOG_MAX_BYTES', str(10 * 1024 * 1024)))
+LOG_BACKUP_COUNT = int(os.getenv('LOG_BACKUP_COUNT', '5'))
+LOG_DEBUG_SAMPLE_RATE = float(os.getenv('LOG_DEBUG_SAMPLE_RATE', '0.1'))  # fraction of DEBUG records kept
+LOG_MAX_FIELD_LENGTH = int(os.getenv('LOG_MAX_FIELD_LENGTH', '512'))
+LOG_TRANSCRIPT_PREVIEW = int(os.getenv('LOG_TRANSCRIPT_PREVIEW', '0' if IS_PRODUCTION else '40'))
 
 # Database Configuration
 DATABASE_URL = os.getenv('DATABASE_URL')
@@ -49,11 +63,83 @@ DATABASE_MAX_OVERFLOW = int(os.getenv('DATABASE_MAX_OVERFLOW', '20'))
 # Performance Configuration
 WORKER_PROCESSES = int(os.getenv('WORKER_PROCESSES', '4'))
 WORKER_THREADS = int(os.getenv('WORKER_THREADS', '2'))
+WORKER_CLASS = os.getenv('WORKER_CLASS', 'sync')  # 'sync' or 'gevent'
+WORKER_CONNECTIONS = int(os.getenv('WORKER_CONNECTIONS', '1000'))
+
+# Redis Configuration
+REDIS_URL = os.getenv('REDIS_URL')
+
+# HTTP Caching Configuration
+DATA_VERSION_TTL = int(os.getenv('DATA_VERSION_TTL', str(7 * 24 * 3600)))
+AUTH_CACHE_TTL = float(os.getenv('AUTH_CACHE_TTL', '0'))  # opt-in; 0 verifies every request with Supabase
+AUTH_CACHE_SIZE = int(os.getenv('AUTH_CACHE_SIZE', '10000'))
+
+# Read Cache Configuration (hot per-user queries; see src/db/cache.py)
+DB_CACHE_ENABLED = os.getenv('DB_CACHE_ENABLED', 'true').lower() == 'true'
+DB_CACHE_TTL = int(os.getenv('DB_CACHE_TTL', '300'))
+DB_CACHE_LOCAL_SIZE = int(os.getenv('DB_CACHE_LOCAL_SIZE', '2048'))
+DB_CACHE_LOCAL_TTL = float(os.getenv('DB_CACHE_LOCAL_TTL', '30'))
+
+# Dashboard Summary Configuration (per-user home screen; see src/db/dashboard.py)
+DASHBOARD_TTL = int(os.getenv('DASHBOARD_TTL', str(30 * 24 * 3600)))
+DASHBOARD_RECENT_EMOJI = int(os.getenv('DASHBOARD_RECENT_EMOJI', '20'))
+DASHBOARD_TOP_TAGS = int(os.getenv('DASHBOARD_TOP_TAGS', '10'))
+
+# Background Enrichment Configuration
+ENRICHMENT_ASYNC = os.getenv('ENRICHMENT_ASYNC', 'true').lower() == 'true'
+ENRICHMENT_BATCH_SIZE = int(os.getenv('ENRICHMENT_BATCH_SIZE', '20'))
+ENRICHMENT_COALESCE_SECONDS = float(os.getenv('ENRICHMENT_COALESCE_SECONDS', '2'))
+ENRICHMENT_CONCURRENCY = int(os.getenv('ENRICHMENT_CONCURRENCY', '4'))
+ENRICHMENT_MAX_RETRIES = int(os.getenv('ENRICHMENT_MAX_RETRIES', '3'))
+ENRICHMENT_RATE_LIMIT = os.getenv('ENRICHMENT_RATE_LIMIT', '30/m')
+ENRICHMENT_PENDING_TTL = int(os.getenv('ENRICHMENT_PENDING_TTL', '900'))
+BULK_ENTRIES_MAX = int(os.getenv('BULK_ENTRIES_MAX', '100'))  # entries per /api/entries/bulk request
+EXPORT_PAGE_SIZE = int(os.getenv('EXPORT_PAGE_SIZE', '500'))  # entries per query in /api/entries/export
+
+# Single-flight Configuration (lock TTL must outlive OPENAI_DEADLINE)
+SINGLEFLIGHT_LOCK_TTL = float(os.getenv('SINGLEFLIGHT_LOCK_TTL', '30'))
+SINGLEFLIGHT_WAIT_TIMEOUT = float(os.getenv('SINGLEFLIGHT_WAIT_TIMEOUT', '28'))
+SINGLEFLIGHT_RESULT_TTL = int(os.getenv('SINGLEFLIGHT_RESULT_TTL', '30'))
+SINGLEFLIGHT_POLL_INTERVAL = float(os.getenv('SINGLEFLIGHT_POLL_INTERVAL', '0.05'))
+
+# Columnar analytics snapshot (python -m src.analytics; needs pyarrow)
+ANALYTICS_DIR = os.getenv('ANALYTICS_DIR', 'data/analytics')
+ANALYTICS_PAGE_SIZE = int(os.getenv('ANALYTICS_PAGE_SIZE', '1000'))
+ANALYTICS_ROW_GROUP_SIZE = int(os.getenv('ANALYTICS_ROW_GROUP_SIZE', '100000'))
+ANALYTICS_SNAPSHOT_HOUR = int(os.getenv('ANALYTICS_SNAPSHOT_HOUR', '3'))  # UTC hour of the nightly beat task
+
+# Idempotency-Key replay for mutating endpoints (needs REDIS_URL)
+IDEMPOTENCY_TTL = int(os.getenv('IDEMPOTENCY_TTL', str(24 * 3600)))
+IDEMPOTENCY_LOCK_TTL = int(os.getenv('IDEMPOTENCY_LOCK_TTL', '60'))  # longer than the slowest write
+
+# Batch Emoji Configuration
+EMOJI_BATCH_CONCURRENCY = int(os.getenv('EMOJI_BATCH_CONCURRENCY', '25'))
+
+# Fast-path Classifier Configuration
+FAST_CLASSIFIER_ENABLED = os.getenv('FAST_CLASSIFIER_ENABLED', 'true').lower() == 'true'
+FAST_CLASSIFIER_THRESHOLD = float(os.getenv('FAST_CLASSIFIER_THRESHOLD', '0.75'))
+FAST_CLASSIFIER_MODEL_PATH = os.getenv('FAST_CLASSIFIER_MODEL_PATH', 'models/fast_classifier.json')
 
 # Monitoring Configuration
 ENABLE_METRICS = os.getenv('ENABLE_METRICS', 'true').lower() == 'true'
 METRICS_PORT = int(os.getenv('METRICS_PORT', '9090'))
 
+# Tracing Configuration
+TRACING_ENABLED = os.getenv('TRACING_ENABLED', 'false').lower() == 'true'
+TRACING_EXPORTER = os.getenv('TRACING_EXPORTER', 'file')  # 'file' or 'otlp'
+TRACING_FILE = os.getenv('TRACING_FILE', 'logs/traces.jsonl')
+TRACING_SERVICE_NAME = os.getenv('TRACING_SERVICE_NAME', 'sentari-backend')
+TRACING_SAMPLE_RATIO = float(os.getenv('TRACING_SAMPLE_RATIO', '1.0'))
+
+# Admin and Profiling Configuration
+ADMIN_TOKEN = os.getenv('ADMIN_TOKEN')
+ADMIN_USER_IDS = {user_id.strip() for user_id in os.getenv('ADMIN_USER_IDS', '').split(',') if user_id.strip()}
+PROFILE_DIR = os.getenv('PROFILE_DIR', 'logs/profiles')
+PROFILE_INTERVAL_MS = float(os.getenv('PROFILE_INTERVAL_MS', '10'))
+PROFILE_REQUEST_INTERVAL_MS = float(os.getenv('PROFILE_REQUEST_INTERVAL_MS', '1'))
+PROFILE_SIGNAL_SECONDS = float(os.getenv('PROFILE_SIGNAL_SECONDS', '30'))
+PROFILE_MAX_SECONDS = float(os.getenv('PROFILE_MAX_SECONDS', '120'))
+
 def validate_environment() -> None:
     """Validate that all required environment variables are set."""
     required_vars = [
@@ -85,51 +171,15 @@ def get_cors_config() -> dict:
     if IS_PRODUCTION:
         return {
             'origins': CORS_ORIGINS,
-            'methods': ['GET', 'POST', 'PUT', 'DELETE', 'OPTIONS'],
-            'allow_headers': ['Content-Type', 'Authorization'],
+            'methods': ['GET', 'POST', 'PUT', 'PATCH', 'DELETE', 'OPTIONS'],
+            'allow_headers': ['Content-Type', 'Authorization', 'Idempotency-Key'],
+            'expose_headers': ['Idempotent-Replayed'],
             'supports_credentials': True
         }
     else:
         return {
             'origins': '*',
-            'methods': ['GET', 'POST', 'PUT', 'DELETE', 'OPTIONS'],
-            'allow_headers': ['Content-Type', 'Authorization']
-        }
-
-def get_logging_config() -> dict:
-    """Get logging configuration based on environment."""
-    return {
-        'version': 1,
-        'disable_existing_loggers': False,
-        'formatters': {
-            'standard': {
-                'format': LOG_FORMAT,
-            },
-            'json': {
-                'format': '{"timestamp": "%(asctime)s", "level": "%(levelname)s", "name": "%(name)s", "message": "%(message)s"}',
-            }
-        },
-        'handlers': {
-            'console': {
-                'class': 'logging.StreamHandler',
-                'level': LOG_LEVEL,
-                'formatter': 'json' if IS_PRODUCTION else 'standard',
-                'stream': 'ext://sys.stdout'
-            },
-            'file': {
-                'class': 'logging.handlers.RotatingFileHandler',
-                'level': LOG_LEVEL,
-                'formatter': 'json' if IS_PRODUCTION else 'standard',
-                'filename': 'logs/app.log',
-                'maxBytes': 10485760,  # 10MB
-                'backupCount': 5
-            }
-        },
-        'loggers': {
-            '': {
-                'handlers': ['console', 'file'],
-                'level': LOG_LEVEL,
-                'propagate': False
-            }
+            'methods': ['GET', 'POST', 'PUT', 'PATCH', 'DELETE', 'OPTIONS'],
+            'allow_headers': ['Content-Type', 'Authorization', 'Idempotency-Key'],
+            'expose_headers': ['Idempotent-Replayed']
         }
-    } 
\ No newline at end of file
@@ -1,15 +1,26 @@
 """
 Core pipeline API endpoint - Microservice Integration with Local Profile Management
+
+The /stream variants relay the reply as Server-Sent Events while the core
+service generates it:
+    event: token   data: {"text": "..."}     (as each token arrives)
+    event: done    data: {...full result}    (after the profile is saved)
+    event: error   data: {"error": "..."}
 """
 
-import requests
-from typing import Optional, Dict, Any
-from flask import Blueprint, request, jsonify
+from typing import Optional, Dict, Any, Callable, Iterable, Iterator, Tuple
+from flask import Blueprint, Response, request, jsonify, stream_with_context
 from datetime import datetime
 import os
 import asyncio
+import time
 
 from .auth import require_auth
+from .idempotency import idempotent
+from .instrumentation import track_dependency
+from .json_provider import dumps, loads
+from .metrics import STREAM_FIRST_TOKEN
+from .tracing import outgoing_headers
 from .profile_manager import fetch_profile, update_profile, save_profile
 
 core_pipeline_bp = Blueprint('core_pipeline', __name__)
@@ -18,28 +29,168 @@ core_pipeline_bp = Blueprint('core_pipeline', __name__)
 CORE_SERVICE_URL = os.getenv('BACKEND_CORE_URL', 'http://localhost:5001')
 
 
-def call_core_service(endpoint: str, data: Dict[str, Any]) -> Dict[str, Any]:
+def call_core_service(endpoint: str, data: Dict[str, Any], timeout: float = 30) -> Dict[str, Any]:
     """
     Make a call to the core microservice
     
     Args:
         endpoint: API endpoint (e.g., '/api/process-transcript')
         data: Request data
+        timeout: Seconds to wait for the reply
         
     Returns:
         Response from microservice
     """
+    import requests
+
     try:
         url = f"{CORE_SERVICE_URL}{endpoint}"
-        response = requests.post(url, json=data, timeout=30)
-        response.raise_for_status()
-        return response.json()
+        with track_dependency('core_service', endpoint, 'POST'):
+            # Propagate X-Request-ID and traceparent so the core service joins the trace
+            response = requests.post(
+                url,
+                data=dumps(data),
+                headers={**outgoing_headers(), 'Content-Type': 'application/json'},
+                timeout=timeout
+            )
+            response.raise_for_status()
+        return loads(response.content)
+    except (requests.exceptions.RequestException, ValueError) as e:
+        # ValueError: the body was not JSON
+        raise Exception(f"Core service call failed: {str(e)}")
+
+
+def _iter_sse(lines: Iterable[str]) -> Iterator[Tuple[str, Dict[str, Any]]]:
+    """Parse Server-Sent Event lines into (event, JSON data) pairs."""
+    event, data = 'message', []
+    for line in lines:
+        if not line:
+            if data:
+                yield event, loads('\n'.join(data))
+            event, data = 'message', []
+        elif not line.startswith(':'):
+            field, _, value = line.partition(':')
+            value = value[1:] if value.startswith(' ') else value
+            if field == 'event':
+                event = value
+            elif field == 'data':
+                data.append(value)
+    if data:
+        yield event, loads('\n'.join(data))
+
+
+def stream_core_service(endpoint: str, data: Dict[str, Any]) -> Iterator[Tuple[str, Dict[str, Any]]]:
+    """
+    Call the core microservice asking for Server-Sent Events
+    
+    Yields ('token', {'text': ...}) as the reply is generated, then
+    ('done', result) with the same result the blocking call returns.
+    A core service that answers with plain JSON is relayed as a single token.
+    """
+    import requests
+
+    try:
+        url = f"{CORE_SERVICE_URL}{endpoint}"
+        with track_dependency('core_service', endpoint, 'POST'):
+            response = requests.post(
+                url,
+                data=dumps(data),
+                headers={**outgoing_headers(), 'Content-Type': 'application/json', 'Accept': 'text/event-stream'},
+                stream=True,
+                timeout=(5, 30)
+            )
+            response.raise_for_status()
     except requests.exceptions.RequestException as e:
         raise Exception(f"Core service call failed: {str(e)}")
 
+    with response:
+        if not response.headers.get('Content-Type', '').startswith('text/event-stream'):
+            try:
+                result = loads(response.content)
+            except ValueError as e:
+                raise Exception(f"Core service call failed: {str(e)}")
+            if result.get('response_text'):
+                yield 'token', {'text': result['response_text']}
+            yield 'done', result
+            return
+        try:
+            # chunk_size=None hands each chunk over as soon as it arrives
+            yield from _iter_sse(response.iter_lines(chunk_size=None, decode_unicode=True))
+        except (requests.exceptions.RequestException, ValueError) as e:
+            raise Exception(f"Core service stream failed: {str(e)}")
+
+
+def _sse(event: str, data: Dict[str, Any]) -> bytes:
+    return f'event: {event}\ndata: '.encode() + dumps(data) + b'\n\n'
+
+
+def _sse_response(events: Iterator[bytes]) -> Response:
+    response = Response(stream_with_context(events), mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    # Let nginx pass events through as they are produced
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
+
+
+def _relay(open_stream: Callable[[], Iterator[Tuple[str, Dict[str, Any]]]],
+           finish: Callable[[Dict[str, Any]], Dict[str, Any]], failure: str) -> Iterator[bytes]:
+    """
+    Relay core-service events to the client as SSE.
+    
+    Tokens are forwarded as they arrive; finish(result) runs after the core
+    service is done and its return value is sent as the final `done` event.
+    """
+    started = time.monotonic()
+    route = request.url_rule.rule
+    # Send the headers now so the client sees the stream open immediately
+    yield b': stream open\n\n'
+    try:
+        first = True
+        for event, payload in open_stream():
+            if event == 'token':
+                if first:
+                    STREAM_FIRST_TOKEN.labels(route).observe(time.monotonic() - started)
+                    first = False
+                yield _sse('token', payload)
+            elif event == 'error' or (event == 'done' and not payload.get('success', True)):
+                yield _sse('error', {'success': False, 'error': payload.get('error', 'Core service failed')})
+                return
+            elif event == 'done':
+                yield _sse('done', finish(payload))
+                return
+        yield _sse('error', {'success': False, 'error': 'Core service ended the stream without a result'})
+    except Exception as e:
+        yield _sse('error', {'success': False, 'error': f'{failure}: {str(e)}'})
+
+
+def apply_profile_update(user_id: str, profile: Dict[str, Any], result: Dict[str, Any],
+                          transcript: str, meta: Dict[str, Any]) -> bool:
+    """Fold the core service's inference into the stored profile; returns whether it was saved."""
+    profile_update_data = result.get('updated_profile', {})
+    if not profile_update_data:
+        return False
+    
+    # Extract data from profile update
+    inference_data = profile_update_data.get('inference', {})
+    signals_data = profile_update_data.get('signals', {})
+    
+    # Update profile with new data
+    updated_profile = update_profile(
+        profile=profile,
+        inference=inference_data,
+        signals=signals_data,
+        raw_text=transcript,
+        meta=meta
+    )
+    
+    # Save updated profile to database
+    asyncio.run(save_profile(user_id, updated_profile))
+    return True
+
 
 @core_pipeline_bp.route('/api/core/process-transcript', methods=['POST'])
 @require_auth
+@idempotent
 def process_transcript_endpoint():
     """
     Process a transcript through the core pipeline with local profile management
@@ -56,7 +207,7 @@ def process_transcript_endpoint():
     """
     try:
         # Get user ID from auth
-        user_id = request.user_id
+        user_id = request.user.id
         
         # Parse request data
         data = request.get_json()
@@ -92,27 +243,10 @@ def process_transcript_endpoint():
         
         # Extract results from microservice
         response_text = result.get('response_text', '')
-        profile_update_data = result.get('updated_profile', {})
         debug_log = result.get('debug_log', [])
         
         # Update profile locally with the results
-        if profile_update_data:
-            # Extract data from profile update
-            inference_data = profile_update_data.get('inference', {})
-            signals_data = profile_update_data.get('signals', {})
-            entry_data = profile_update_data.get('entry_data', {})
-            
-            # Update profile with new data
-            updated_profile = update_profile(
-                profile=profile,
-                inference=inference_data,
-                signals=signals_data,
-                raw_text=transcript,
-                meta=data.get('meta', {})
-            )
-            
-            # Save updated profile to database
-            asyncio.run(save_profile(user_id, updated_profile))
+        apply_profile_update(user_id, profile, result, transcript, data.get('meta', {}))
         
         # Return response
         response_data = {
@@ -131,6 +265,54 @@ def process_transcript_endpoint():
         }), 500
 
 
+@core_pipeline_bp.route('/api/core/process-transcript/stream', methods=['POST'])
+@require_auth
+def process_transcript_stream_endpoint():
+    """
+    Streaming variant of /api/core/process-transcript (Server-Sent Events)
+    
+    Same payload. The reply is relayed token by token; the profile is updated
+    once the core service has finished, before the final `done` event.
+    """
+    user_id = request.user.id
+    
+    data = request.get_json(silent=True)
+    if not data:
+        return jsonify({
+            'success': False,
+            'error': 'No JSON data provided'
+        }), 400
+    
+    transcript = data.get('transcript')
+    if not transcript:
+        return jsonify({
+            'success': False,
+            'error': 'Transcript is required'
+        }), 400
+    meta = data.get('meta', {})
+    profile: Dict[str, Any] = {}
+    
+    def open_stream():
+        # Loaded inside the stream so the client is not kept waiting for headers
+        profile.update(asyncio.run(fetch_profile(user_id)))
+        return stream_core_service('/api/process-transcript', {
+            'user_id': user_id,
+            'transcript': transcript,
+            'meta': meta,
+            'profile': profile
+        })
+    
+    def finish(result: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            'success': True,
+            'response_text': result.get('response_text', ''),
+            'debug_log': result.get('debug_log', []),
+            'profile_updated': apply_profile_update(user_id, profile, result, transcript, meta)
+        }
+    
+    return _sse_response(_relay(open_stream, finish, 'Pipeline processing failed'))
+
+
 @core_pipeline_bp.route('/api/core/extract-signals', methods=['POST'])
 @require_auth
 def extract_signals_endpoint():
@@ -254,6 +436,24 @@ def generate_reply_endpoint():
         }), 500
 
 
+@core_pipeline_bp.route('/api/core/generate-reply/stream', methods=['POST'])
+@require_auth
+def generate_reply_stream_endpoint():
+    """Streaming variant of /api/core/generate-reply (Server-Sent Events); same payload."""
+    data = request.get_json(silent=True)
+    if not data:
+        return jsonify({
+            'success': False,
+            'error': 'No JSON data provided'
+        }), 400
+    
+    return _sse_response(_relay(
+        lambda: stream_core_service('/api/generate-reply', data),
+        lambda result: result,
+        'Reply generation failed'
+    ))
+
+
 @core_pipeline_bp.route('/api/core/generate-insight', methods=['POST'])
 @require_auth
 def generate_insight_endpoint():
@@ -426,9 +626,12 @@ def search_similar_endpoint():
 @core_pipeline_bp.route('/api/core/health', methods=['GET'])
 def core_health_check():
     """Health check for core pipeline"""
+    import requests
+
     try:
         # Check microservice health
-        response = requests.get(f"{CORE_SERVICE_URL}/health", timeout=5)
+        with track_dependency('core_service', '/health', 'GET'):
+            response = requests.get(f"{CORE_SERVICE_URL}/health", headers=outgoing_headers(), timeout=5)
         microservice_healthy = response.status_code == 200
         
         return jsonify({
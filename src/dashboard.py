@@ -0,0 +1,153 @@
+"""
+Home screen summary: GET /api/dashboard.
+
+Recent emojis, top tags, 7/30-day emotion averages, entry streaks and the
+language mix come from the per-user summary in db/dashboard.py, which the
+write paths keep current; the profile highlights come from the cached
+profile. A poll with an unchanged ETag gets a 304 without either read.
+"""
+
+import logging
+from datetime import date, datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional
+
+from flask import Blueprint, jsonify
+
+from .auth import require_auth
+from .config import DASHBOARD_TOP_TAGS
+from .db import ProfilesDB, VoiceEntriesDB
+from .db.dashboard import DASHBOARD_COLUMNS, aggregate_entries, load_summary, rebuild_summary
+from .db.versions import ENTRIES, PROFILE
+from .http_cache import conditional_get
+from .metrics import CACHE_REQUESTS
+
+logger = logging.getLogger(__name__)
+
+dashboard_bp = Blueprint('dashboard', __name__)
+entries_db = VoiceEntriesDB()
+profiles_db = ProfilesDB()
+
+EMOTION_WINDOWS = (7, 30)
+PROFILE_TOP = 5
+
+
+def _counters(counts: Dict[str, float]) -> Dict[str, Dict[str, float]]:
+    """Split 'kind:name' counter fields into one dict per kind."""
+    grouped: Dict[str, Dict[str, float]] = {'day': {}, 'tag': {}, 'lang': {}, 'n': {}, 'sum': {}}
+    for field, value in counts.items():
+        kind, _, name = field.partition(':')
+        if kind in grouped:
+            grouped[kind][name] = value
+    return grouped
+
+
+def _streaks(days: List[str], today: date) -> Dict[str, Any]:
+    """Current and longest runs of consecutive days with an entry."""
+    active = sorted({date.fromisoformat(day) for day in days})
+    longest = run = 0
+    previous = None
+    for day in active:
+        run = run + 1 if previous is not None and day - previous == timedelta(days=1) else 1
+        longest = max(longest, run)
+        previous = day
+    # A streak is still current until a whole day passes without an entry
+    current = run if active and active[-1] >= today - timedelta(days=1) else 0
+    return {
+        'current': current,
+        'longest': longest,
+        'active_days': len(active),
+        'last_entry_day': active[-1].isoformat() if active else None
+    }
+
+
+def summarize(counts: Dict[str, float], recent_emoji: List[Dict[str, Any]], today: date) -> Dict[str, Any]:
+    """Turn the summary counters into the dashboard payload."""
+    grouped = _counters(counts)
+    entries = int(sum(grouped['day'].values()))
+
+    emotion: Dict[str, Any] = {}
+    for window in EMOTION_WINDOWS:
+        since = (today - timedelta(days=window - 1)).isoformat()
+        scored = sum(n for day, n in grouped['n'].items() if day >= since)
+        total = sum(value for day, value in grouped['sum'].items() if day >= since)
+        emotion[f'avg_{window}d'] = round(total / scored, 4) if scored else None
+        emotion[f'scored_{window}d'] = int(scored)
+
+    top_tags = sorted(grouped['tag'].items(), key=lambda item: (-item[1], item[0]))[:DASHBOARD_TOP_TAGS]
+    languages = sorted(grouped['lang'].items(), key=lambda item: (-item[1], item[0]))
+
+    return {
+        'entries': entries,
+        'recent_emoji': recent_emoji,
+        'top_tags': [{'tag': tag, 'count': int(count)} for tag, count in top_tags],
+        'emotion': emotion,
+        'streak': _streaks(list(grouped['day']), today),
+        'languages': [
+            {'language': language, 'entries': int(count), 'share': round(count / entries, 4) if entries else 0}
+            for language, count in languages
+        ]
+    }
+
+
+def _profile_highlights(user_id: str) -> Optional[Dict[str, Any]]:
+    try:
+        profile = profiles_db.get_profile(user_id)
+    except Exception as e:
+        logger.warning(f'Dashboard profile unavailable for {user_id}: {e}')
+        return None
+    if not profile:
+        return None
+
+    def top(counter: Dict[str, int]) -> List[Dict[str, Any]]:
+        ranked = sorted(counter.items(), key=lambda item: (-item[1], item[0]))[:PROFILE_TOP]
+        return [{'name': name, 'count': count} for name, count in ranked]
+
+    counters = profile.get('counters') or {}
+    return {
+        'load_score': profile.get('load_score'),
+        'top_emotions': top(counters.get('emotions') or {}),
+        'top_themes': top(counters.get('themes') or {}),
+        'last_themes': profile.get('last_themes') or [],
+        'last_updated': profile.get('last_updated')
+    }
+
+
+def _load(user_id: str):
+    """Counters and recent emoji from the summary, building it on a miss."""
+    summary = load_summary(user_id)
+    if summary is not None:
+        CACHE_REQUESTS.labels('dashboard', 'hit').inc()
+        return summary
+    CACHE_REQUESTS.labels('dashboard', 'miss').inc()
+
+    if rebuild_summary(user_id, entries_db.iter_user_entries(user_id, DASHBOARD_COLUMNS)):
+        summary = load_summary(user_id)
+        if summary is not None:
+            return summary
+    # No Redis, or another worker is rebuilding this summary right now
+    return aggregate_entries(entries_db.iter_user_entries(user_id, DASHBOARD_COLUMNS))
+
+
+@dashboard_bp.route('/api/dashboard', methods=['GET'])
+@require_auth
+@conditional_get(ENTRIES, PROFILE, daily=True)
+def get_dashboard(user_id: str):
+    """Get the user's home screen summary."""
+    try:
+        counts, recent_emoji = _load(user_id)
+        today = datetime.now(timezone.utc).date()
+        return jsonify({
+            'success': True,
+            'data': {
+                **summarize(counts, recent_emoji, today),
+                'profile': _profile_highlights(user_id),
+                'as_of': today.isoformat()
+            }
+        })
+
+    except Exception as e:
+        logger.error(f'Dashboard error for {user_id}: {e}')
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
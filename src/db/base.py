@@ -3,21 +3,32 @@ Base database class with common functionality for all database operations.
 """
 
 import os
-from typing import Optional, Dict, Any
-from supabase import create_client, Client
-from supabase.lib.client_options import ClientOptions
+import threading
+from typing import TYPE_CHECKING, Optional, Dict, Any
 
+from ..instrumentation import instrument_supabase
+
+if TYPE_CHECKING:
+    from supabase import Client
+
+_client: Optional['Client'] = None
+_client_pid: Optional[int] = None
+_client_lock = threading.Lock()
+
+
+def get_supabase() -> 'Client':
+    """
+    Get the process-wide Supabase client (recreated after fork).
+
+    supabase is imported on first use so importing the app stays cheap;
+    gunicorn workers create the client in post_worker_init.
+    """
+    global _client, _client_pid
+    with _client_lock:
+        if _client is None or _client_pid != os.getpid():
+            from supabase import create_client
+            from supabase.lib.client_options import ClientOptions
 
-class BaseDB:
-    """Base class for all database operations."""
-    
-    def __init__(self):
-        self._client: Optional[Client] = None
-    
-    @property
-    def client(self) -> Client:
-        """Get or create Supabase client."""
-        if self._client is None:
             url = os.getenv('SUPABASE_URL')
             key = os.getenv('SUPABASE_KEY')
             
@@ -31,9 +42,27 @@ class BaseDB:
                 }
             )
             
-            self._client = create_client(url, key, options)
-        
-        return self._client
+            _client = create_client(url, key, options)
+            # Metrics and a trace span for every query
+            instrument_supabase(_client)
+            _client_pid = os.getpid()
+    return _client
+
+
+class LazySupabaseClient:
+    """Stand-in for a Supabase Client that resolves get_supabase() on each attribute access."""
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(get_supabase(), name)
+
+
+class BaseDB:
+    """Base class for all database operations."""
+    
+    @property
+    def client(self) -> 'Client':
+        """Get the shared Supabase client."""
+        return get_supabase()
     
     def handle_supabase_error(self, result: Any) -> None:
         """Handle Supabase API response errors."""
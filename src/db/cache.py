@@ -0,0 +1,120 @@
+"""
+Per-user read cache for hot queries.
+
+Results are stored in Redis (shared by every worker and device) and in a small
+in-process LRU in front of it. Keys include the user's data version for the
+query's scope (see versions.py), and every write bumps that version, so a write
+invalidates all of the user's cached reads in that scope at once. Stale entries
+are never read again; they expire from Redis and fall out of the LRU.
+
+Without Redis there is no shared version to invalidate against, so reads go
+straight to Supabase. DB_CACHE_ENABLED=false does the same.
+"""
+
+import hashlib
+import logging
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+from typing import Any, Callable, Optional, Tuple
+
+import redis
+
+from ..config import DB_CACHE_ENABLED, DB_CACHE_TTL, DB_CACHE_LOCAL_SIZE, DB_CACHE_LOCAL_TTL
+from ..json_provider import dumps, loads
+from ..metrics import CACHE_REQUESTS
+from ..redis_client import get_redis
+from .versions import get_version
+
+logger = logging.getLogger(__name__)
+
+_MISSING = object()
+
+
+class LocalLRU:
+    """Thread-safe LRU of (expires_at, value) with a per-entry TTL."""
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: 'OrderedDict[str, Tuple[float, Any]]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Any:
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return _MISSING
+            if item[0] <= time.monotonic():
+                del self._data[key]
+                return _MISSING
+            self._data.move_to_end(key)
+            return item[1]
+
+    def set(self, key: str, value: Any) -> None:
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+
+_local = LocalLRU(DB_CACHE_LOCAL_SIZE, DB_CACHE_LOCAL_TTL)
+
+
+def _cache_key(user_id: str, scope: str, version: int, query: str, params: tuple) -> str:
+    digest = hashlib.blake2b(repr(params).encode(), digest_size=8).hexdigest()
+    return f'dbcache:{user_id}:{scope}:{version}:{query}:{digest}'
+
+
+def cached_query(scope: str, ttl: Optional[int] = None) -> Callable:
+    """
+    Cache a BaseDB read method whose first argument is the user ID.
+
+    The cache key is (user_id, scope version, method name, remaining args).
+    Results must be JSON-serializable; values are copied out of the cache, so
+    callers may mutate what they get back.
+    """
+    ttl = DB_CACHE_TTL if ttl is None else ttl
+
+    def decorator(f):
+        query = f.__qualname__
+
+        @wraps(f)
+        def wrapper(self, user_id: str, *args, **kwargs):
+            version = get_version(user_id, scope) if DB_CACHE_ENABLED else None
+            if version is None:
+                return f(self, user_id, *args, **kwargs)
+
+            key = _cache_key(user_id, scope, version.version, query, (args, sorted(kwargs.items())))
+            payload = _local.get(key)
+            if payload is not _MISSING:
+                CACHE_REQUESTS.labels('db_local', 'hit').inc()
+                return loads(payload)
+            CACHE_REQUESTS.labels('db_local', 'miss').inc()
+
+            client = get_redis()
+            try:
+                payload = client.get(key)
+            except redis.RedisError as e:
+                logger.warning(f'DB cache read failed for {query}: {e}')
+                return f(self, user_id, *args, **kwargs)
+            if payload is not None:
+                CACHE_REQUESTS.labels('db_redis', 'hit').inc()
+                _local.set(key, payload)
+                return loads(payload)
+            CACHE_REQUESTS.labels('db_redis', 'miss').inc()
+
+            result = f(self, user_id, *args, **kwargs)
+            payload = dumps(result)
+            _local.set(key, payload)
+            try:
+                client.set(key, payload, ex=ttl)
+            except redis.RedisError as e:
+                logger.warning(f'DB cache write failed for {query}: {e}')
+            return result
+        return wrapper
+    return decorator
@@ -0,0 +1,268 @@
+"""
+Per-user dashboard summary, maintained incrementally in Redis.
+
+For each user, three keys (all expiring DASHBOARD_TTL after the last read or
+write):
+
+    dashboard:{user_id}:facts   hash   entry ID -> the entry's counted fields
+    dashboard:{user_id}:counts  hash   tag:<tag>, lang:<language>, day:<date>,
+                                       n:<date> / sum:<date> (emotion scores)
+    dashboard:{user_id}:emoji   zset   entry IDs with an emoji, by created_at
+
+Every write path passes the rows it wrote to record_entries() (or the deleted
+ID to forget_entry()). A Lua script subtracts the entry's previously recorded
+facts from the counters and adds the new ones, so a save, tag edit, emoji,
+emotion score or soft delete adjusts the summary without reading any other
+entry. Reads are a single script call.
+
+The summary is built from Supabase on the first read (and after expiry);
+until then writes leave it alone. Without Redis, the dashboard is computed
+from Supabase on every read.
+"""
+
+import logging
+import uuid
+from collections import Counter
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import redis
+
+from ..config import DASHBOARD_RECENT_EMOJI, DASHBOARD_TTL
+from ..json_provider import dumps, loads
+from ..redis_client import get_redis
+from ..singleflight import RELEASE_SCRIPT
+
+logger = logging.getLogger(__name__)
+
+# What a rebuild reads from voice_entries; soft-deleted rows are skipped
+DASHBOARD_COLUMNS = 'id, user_id, created_at, tags_user, entry_emoji, emotion_score_score, language_detected, deleted_at'
+REBUILD_LOCK_TTL = 120
+
+# KEYS: facts, counts, emoji; ARGV: entry ID, new facts JSON ('' removes the entry), ttl
+APPLY_SCRIPT = """
+if redis.call('HEXISTS', KEYS[2], 'built') == 0 and redis.call('HEXISTS', KEYS[2], 'building') == 0 then
+    return 0
+end
+local function add(field, delta)
+    if redis.call('HINCRBY', KEYS[2], field, delta) <= 0 then
+        redis.call('HDEL', KEYS[2], field)
+    end
+end
+local function apply(facts, sign)
+    add('day:' .. facts.d, sign)
+    if facts.l then add('lang:' .. facts.l, sign) end
+    if facts.t then
+        for _, tag in ipairs(facts.t) do add('tag:' .. tag, sign) end
+    end
+    if facts.s then
+        if redis.call('HINCRBY', KEYS[2], 'n:' .. facts.d, sign) <= 0 then
+            redis.call('HDEL', KEYS[2], 'n:' .. facts.d, 'sum:' .. facts.d)
+        else
+            redis.call('HINCRBYFLOAT', KEYS[2], 'sum:' .. facts.d, sign * facts.s)
+        end
+    end
+    if facts.e then
+        if sign > 0 then
+            redis.call('ZADD', KEYS[3], facts.ts, ARGV[1])
+        else
+            redis.call('ZREM', KEYS[3], ARGV[1])
+        end
+    end
+end
+local old = redis.call('HGET', KEYS[1], ARGV[1])
+if old then apply(cjson.decode(old), -1) end
+if ARGV[2] ~= '' then
+    apply(cjson.decode(ARGV[2]), 1)
+    redis.call('HSET', KEYS[1], ARGV[1], ARGV[2])
+elseif old then
+    redis.call('HDEL', KEYS[1], ARGV[1])
+end
+for i = 1, 3 do redis.call('EXPIRE', KEYS[i], ARGV[3]) end
+return 1
+"""
+
+# KEYS: facts, counts, emoji; ARGV: recent emoji count, ttl
+READ_SCRIPT = """
+if redis.call('HEXISTS', KEYS[2], 'built') == 0 then
+    return false
+end
+local ids = redis.call('ZREVRANGE', KEYS[3], 0, tonumber(ARGV[1]) - 1)
+local recent = {}
+if #ids > 0 then recent = redis.call('HMGET', KEYS[1], unpack(ids)) end
+for i = 1, 3 do redis.call('EXPIRE', KEYS[i], ARGV[2]) end
+return {redis.call('HGETALL', KEYS[2]), ids, recent}
+"""
+
+
+def _keys(user_id: str) -> Tuple[str, str, str]:
+    return f'dashboard:{user_id}:facts', f'dashboard:{user_id}:counts', f'dashboard:{user_id}:emoji'
+
+
+def entry_facts(row: Dict[str, Any]) -> Dict[str, Any]:
+    """The fields of a voice_entries row that the summary counts (None values are left out)."""
+    created_at = row['created_at']
+    created = datetime.fromisoformat(created_at)
+    # Client-supplied local times are stored without an offset; treat them as UTC
+    created = created if created.tzinfo else created.replace(tzinfo=timezone.utc)
+    facts = {'d': created_at[:10], 'c': created_at, 'ts': created.timestamp()}
+    if row.get('tags_user'):
+        facts['t'] = row['tags_user']
+    if row.get('entry_emoji'):
+        facts['e'] = row['entry_emoji']
+    if row.get('emotion_score_score') is not None:
+        facts['s'] = float(row['emotion_score_score'])
+    if row.get('language_detected'):
+        facts['l'] = row['language_detected']
+    return facts
+
+
+def _invalidate(client: redis.Redis, user_ids: Iterable[str]) -> None:
+    """Drop summaries that may have missed a write; the next read rebuilds them."""
+    try:
+        client.delete(*[key for user_id in set(user_ids) for key in _keys(user_id)])
+    except redis.RedisError as e:
+        logger.error(f'Failed to invalidate dashboard summaries: {e}')
+
+
+def record_entries(rows: Iterable[Dict[str, Any]]) -> None:
+    """
+    Fold written voice_entries rows into their users' summaries.
+
+    Rows must be complete as stored (PostgREST's returned representation);
+    rows without created_at are skipped and rows with deleted_at are removed.
+    """
+    client = get_redis()
+    if client is None:
+        return
+    pipe = client.pipeline(transaction=False)
+    user_ids = []
+    for row in rows:
+        if not row.get('id') or not row.get('user_id') or not row.get('created_at'):
+            continue
+        facts = '' if row.get('deleted_at') else dumps(entry_facts(row))
+        pipe.eval(APPLY_SCRIPT, 3, *_keys(row['user_id']), row['id'], facts, DASHBOARD_TTL)
+        user_ids.append(row['user_id'])
+    if not user_ids:
+        return
+    try:
+        pipe.execute()
+    except redis.RedisError as e:
+        logger.warning(f'Dashboard summary update failed: {e}')
+        _invalidate(client, user_ids)
+
+
+def forget_entry(user_id: str, entry_id: str) -> None:
+    """Remove a (soft-)deleted entry from the user's summary."""
+    client = get_redis()
+    if client is None:
+        return
+    try:
+        client.eval(APPLY_SCRIPT, 3, *_keys(user_id), entry_id, '', DASHBOARD_TTL)
+    except redis.RedisError as e:
+        logger.warning(f'Dashboard summary update failed: {e}')
+        _invalidate(client, [user_id])
+
+
+def load_summary(user_id: str) -> Optional[Tuple[Dict[str, float], List[Dict[str, Any]]]]:
+    """
+    Read the user's counters and most recent emoji entries in one round trip.
+
+    Returns:
+        (counters, recent emoji entries as {'id', 'entry_emoji', 'created_at'}),
+        or None when the summary has not been built or Redis is unavailable
+    """
+    client = get_redis()
+    if client is None:
+        return None
+    try:
+        result = client.eval(READ_SCRIPT, 3, *_keys(user_id), DASHBOARD_RECENT_EMOJI, DASHBOARD_TTL)
+    except redis.RedisError as e:
+        logger.warning(f'Dashboard summary unavailable: {e}')
+        return None
+    if result is None:
+        return None
+
+    fields, ids, recent = result
+    counters = {
+        fields[i].decode(): float(fields[i + 1])
+        for i in range(0, len(fields), 2)
+        if fields[i] not in (b'built', b'building')
+    }
+    emoji = []
+    for entry_id, raw in zip(ids, recent):
+        if raw is not None:
+            facts = loads(raw)
+            emoji.append({'id': entry_id.decode(), 'entry_emoji': facts['e'], 'created_at': facts['c']})
+    return counters, emoji
+
+
+def rebuild_summary(user_id: str, pages: Iterable[List[Dict[str, Any]]]) -> bool:
+    """
+    Build the user's summary from scratch out of pages of DASHBOARD_COLUMNS rows.
+
+    Writes that land during the rebuild are applied as usual. Returns False
+    without reading any pages when Redis is unavailable or another worker is
+    already rebuilding this summary.
+    """
+    client = get_redis()
+    if client is None:
+        return False
+    lock_key = f'dashboard:{user_id}:rebuild'
+    token = uuid.uuid4().hex
+    try:
+        if not client.set(lock_key, token, nx=True, ex=REBUILD_LOCK_TTL):
+            return False
+    except redis.RedisError as e:
+        logger.warning(f'Dashboard summary unavailable: {e}')
+        return False
+
+    keys = _keys(user_id)
+    try:
+        client.delete(*keys)
+        client.hset(keys[1], 'building', 1)
+        for page in pages:
+            pipe = client.pipeline(transaction=False)
+            for row in page:
+                if row.get('deleted_at'):
+                    continue
+                pipe.eval(APPLY_SCRIPT, 3, *keys, row['id'], dumps(entry_facts(row)), DASHBOARD_TTL)
+            pipe.execute()
+        pipe = client.pipeline()
+        pipe.hset(keys[1], 'built', 1)
+        pipe.hdel(keys[1], 'building')
+        for key in keys:
+            pipe.expire(key, DASHBOARD_TTL)
+        pipe.execute()
+        return True
+    except redis.RedisError as e:
+        logger.warning(f'Dashboard summary rebuild failed for {user_id}: {e}')
+        return False
+    finally:
+        try:
+            client.eval(RELEASE_SCRIPT, 1, lock_key, token)
+        except redis.RedisError:
+            pass
+
+
+def aggregate_entries(pages: Iterable[List[Dict[str, Any]]]) -> Tuple[Dict[str, float], List[Dict[str, Any]]]:
+    """Compute the same counters and recent emoji entries directly, for use without Redis."""
+    counters: Counter = Counter()
+    emoji = []
+    for page in pages:
+        for row in page:
+            if row.get('deleted_at'):
+                continue
+            facts = entry_facts(row)
+            counters[f"day:{facts['d']}"] += 1
+            if 'l' in facts:
+                counters[f"lang:{facts['l']}"] += 1
+            for tag in facts.get('t', []):
+                counters[f'tag:{tag}'] += 1
+            if 's' in facts:
+                counters[f"n:{facts['d']}"] += 1
+                counters[f"sum:{facts['d']}"] += facts['s']
+            if 'e' in facts:
+                emoji.append((facts['ts'], {'id': row['id'], 'entry_emoji': facts['e'], 'created_at': facts['c']}))
+    emoji.sort(key=lambda item: item[0], reverse=True)
+    return dict(counters), [entry for _, entry in emoji[:DASHBOARD_RECENT_EMOJI]]
@@ -5,11 +5,14 @@ Database operations for user profiles.
 from typing import Dict, Any, Optional
 from datetime import datetime
 from .base import BaseDB
+from .cache import cached_query
+from .versions import bump_version, PROFILE
 
 
 class ProfilesDB(BaseDB):
     """Database operations for user profiles."""
     
+    @cached_query(PROFILE)
     def get_profile(self, user_id: str) -> Optional[Dict[str, Any]]:
         """Get user profile."""
         result = self.client.table('profiles').select('profile').eq('user_id', user_id).single().execute()
@@ -30,6 +33,7 @@ class ProfilesDB(BaseDB):
         
         result = self.client.table('profiles').upsert(update_data).execute()
         self.handle_supabase_error(result)
+        bump_version(user_id, PROFILE)
         return True
     
     def update_profile_field(self, user_id: str, field: str, value: Any) -> bool:
@@ -39,14 +43,17 @@ class ProfilesDB(BaseDB):
             'updated_at': datetime.utcnow().isoformat()
         }).eq('user_id', user_id).execute()
         self.handle_supabase_error(result)
+        bump_version(user_id, PROFILE)
         return True
     
     def delete_profile(self, user_id: str) -> bool:
         """Delete user profile."""
         result = self.client.table('profiles').delete().eq('user_id', user_id).execute()
         self.handle_supabase_error(result)
+        bump_version(user_id, PROFILE)
         return True
     
+    @cached_query(PROFILE)
     def get_profile_concepts(self, user_id: str) -> Optional[Dict[str, Any]]:
         """Get user profile concepts."""
         result = self.client.table('profiles').select('concepts').eq('user_id', user_id).single().execute()
@@ -61,4 +68,5 @@ class ProfilesDB(BaseDB):
             'updated_at': datetime.utcnow().isoformat()
         }).eq('user_id', user_id).execute()
         self.handle_supabase_error(result)
+        bump_version(user_id, PROFILE)
         return True 
\ No newline at end of file
@@ -4,11 +4,14 @@ Database operations for tags.
 
 from typing import List, Dict, Any
 from .base import BaseDB
+from .cache import cached_query
+from .versions import ENTRIES
 
 
 class TagsDB(BaseDB):
     """Database operations for tags."""
     
+    @cached_query(ENTRIES)
     def get_all_tags(self, user_id: str) -> List[str]:
         """Get all tags for a user."""
         result = self.client.table('voice_entries').select('tags_user').eq('user_id', user_id).execute()
@@ -35,6 +38,7 @@ class TagsDB(BaseDB):
         self.handle_supabase_error(result)
         return self.safe_get_data(result) or []
     
+    @cached_query(ENTRIES)
     def get_tag_usage_count(self, user_id: str) -> Dict[str, int]:
         """Get usage count for each tag."""
         result = self.client.table('voice_entries').select('tags_user').eq('user_id', user_id).execute()
@@ -51,7 +55,7 @@ class TagsDB(BaseDB):
         return tag_counts
     
     def get_popular_tags(self, user_id: str, limit: int = 10) -> List[Dict[str, Any]]:
-        """Get most popular tags for a user."""
+        """Get most popular tags for a user (from the cached usage counts)."""
         tag_counts = self.get_tag_usage_count(user_id)
         
         # Sort by count and return top tags
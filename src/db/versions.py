@@ -0,0 +1,121 @@
+"""
+Per-user data versions for conditional GETs and cache invalidation.
+
+Every write to a user's voice entries or profile bumps that user's version for
+the scope in Redis. Readers build ETags and read-cache keys (cache.py) from
+the version without querying Supabase, so an unchanged poll is one Redis round
+trip. Versions are memoized for the rest of the request once read.
+
+Versions are millisecond timestamps that strictly increase per write, so they
+never repeat, even after the Redis key expires. A second field holds a
+strictly increasing whole-second timestamp for Last-Modified, which keeps
+If-Modified-Since correct when several writes land within one second.
+"""
+
+import logging
+import time
+from typing import Iterable, NamedTuple, Optional, Union
+
+import redis
+from flask import g, has_request_context
+
+from ..config import DATA_VERSION_TTL
+from ..redis_client import get_redis
+
+logger = logging.getLogger(__name__)
+
+# Scopes: what a read depends on. Tag endpoints read voice_entries too.
+ENTRIES = 'entries'
+PROFILE = 'profile'
+
+# KEYS[1] user hash; ARGV: scope, now_ms, ttl, bump (1) or init-if-missing (0)
+VERSION_SCRIPT = """
+local version = tonumber(redis.call('HGET', KEYS[1], ARGV[1]))
+local modified = tonumber(redis.call('HGET', KEYS[1], ARGV[1] .. ':at'))
+local now_ms = tonumber(ARGV[2])
+if version and ARGV[4] == '0' then
+    return {version, modified}
+end
+local now_s = math.floor(now_ms / 1000)
+version = math.max(now_ms, (version or 0) + 1)
+modified = math.max(now_s, (modified or 0) + 1)
+redis.call('HSET', KEYS[1], ARGV[1], version, ARGV[1] .. ':at', modified)
+redis.call('EXPIRE', KEYS[1], ARGV[3])
+return {version, modified}
+"""
+
+
+class DataVersion(NamedTuple):
+    version: int
+    modified_at: int  # unix seconds
+
+
+def _key(user_id: str) -> str:
+    return f'dataver:{user_id}'
+
+
+def _request_versions() -> Optional[dict]:
+    if not has_request_context():
+        return None
+    if 'data_versions' not in g:
+        g.data_versions = {}
+    return g.data_versions
+
+
+def _run(client: redis.Redis, user_id: str, scope: str, bump: bool) -> DataVersion:
+    version, modified_at = client.eval(
+        VERSION_SCRIPT, 1, _key(user_id), scope, int(time.time() * 1000), DATA_VERSION_TTL, '1' if bump else '0'
+    )
+    result = DataVersion(int(version), int(modified_at))
+    memo = _request_versions()
+    if memo is not None:
+        memo[(user_id, scope)] = result
+    return result
+
+
+def get_version(user_id: str, scope: str) -> Optional[DataVersion]:
+    """
+    Current version of a user's data in `scope`.
+
+    Returns:
+        DataVersion, or None when Redis is unavailable (callers must then
+        treat the data as unversioned)
+    """
+    client = get_redis()
+    if client is None:
+        return None
+    memo = _request_versions()
+    if memo is not None and (user_id, scope) in memo:
+        return memo[(user_id, scope)]
+    try:
+        cached = client.hmget(_key(user_id), scope, f'{scope}:at')
+        if cached[0] is not None and cached[1] is not None:
+            result = DataVersion(int(cached[0]), int(cached[1]))
+            if memo is not None:
+                memo[(user_id, scope)] = result
+            return result
+        # First read since the key expired: start from now so old ETags cannot match
+        return _run(client, user_id, scope, bump=False)
+    except redis.RedisError as e:
+        logger.warning(f'Data version unavailable for {user_id}/{scope}: {e}')
+        return None
+
+
+def bump_version(user_ids: Union[str, Iterable[str]], scope: str) -> None:
+    """Mark a user's (or several users') data in `scope` as changed."""
+    client = get_redis()
+    if client is None:
+        return
+    if isinstance(user_ids, str):
+        user_ids = [user_ids]
+    memo = _request_versions()
+    try:
+        for user_id in set(user_ids):
+            if user_id:
+                _run(client, user_id, scope, bump=True)
+    except redis.RedisError as e:
+        # Never reuse the pre-write version later in this request
+        if memo is not None:
+            memo.clear()
+        # Readers may serve stale ETags until the next successful bump or key expiry
+        logger.error(f'Failed to bump {scope} data version: {e}')
@@ -4,6 +4,16 @@ Database operations for voice embeddings.
 
 from typing import List, Dict, Any, Optional
 from .base import BaseDB
+from ..json_provider import dumps_str
+
+
+def vector_literal(embedding: List[float]) -> str:
+    """
+    pgvector text form of an embedding ('[0.1,0.2,...]').
+
+    Sent as one string so postgrest-py's stdlib encoder does not walk every float.
+    """
+    return embedding if isinstance(embedding, str) else dumps_str(embedding)
 
 
 class VoiceEmbeddingsDB(BaseDB):
@@ -15,16 +25,25 @@ class VoiceEmbeddingsDB(BaseDB):
             'user_id': user_id,
             'entry_id': entry_id,
             'text': text,
-            'embedding': embedding
+            'embedding': vector_literal(embedding)
         }).execute()
         self.handle_supabase_error(result)
         return True
     
+    def upsert_embeddings(self, rows: List[Dict[str, Any]]) -> bool:
+        """Upsert embeddings for several voice entries in one request."""
+        if not rows:
+            return True
+        rows = [{**row, 'embedding': vector_literal(row['embedding'])} for row in rows]
+        result = self.client.table('voice_embeddings').upsert(rows).execute()
+        self.handle_supabase_error(result)
+        return True
+    
     def search_similar_embeddings(self, user_id: str, query_embedding: List[float], 
                                  match_threshold: float = 0.75, match_count: int = 3) -> List[Dict[str, Any]]:
         """Search for similar embeddings using vector similarity."""
         result = self.client.rpc('match_embeddings', {
-            'query_embedding': query_embedding,
+            'query_embedding': vector_literal(query_embedding),
             'match_threshold': match_threshold,
             'match_count': match_count,
             'p_user_id': user_id
@@ -44,6 +63,14 @@ class VoiceEmbeddingsDB(BaseDB):
         self.handle_supabase_error(result)
         return True
     
+    def get_embeddings_by_entry_ids(self, user_id: str, entry_ids: List[str], columns: str = 'entry_id, embedding') -> List[Dict[str, Any]]:
+        """Get the embeddings of several entries in one query."""
+        if not entry_ids:
+            return []
+        result = self.client.table('voice_embeddings').select(columns).eq('user_id', user_id).in_('entry_id', entry_ids).execute()
+        self.handle_supabase_error(result)
+        return self.safe_get_data(result) or []
+    
     def get_user_embeddings(self, user_id: str, limit: Optional[int] = None) -> List[Dict[str, Any]]:
         """Get all embeddings for a user."""
         query = self.client.table('voice_embeddings').select('*').eq('user_id', user_id)
@@ -2,9 +2,12 @@
 Database operations for voice entries.
 """
 
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Iterable, Iterator, Optional
 from datetime import datetime
 from .base import BaseDB
+from .cache import cached_query
+from .dashboard import forget_entry, record_entries
+from .versions import bump_version, ENTRIES
 
 
 class VoiceEntriesDB(BaseDB):
@@ -23,12 +26,60 @@ class VoiceEntriesDB(BaseDB):
         self.handle_supabase_error(result)
         return self.safe_get_data(result) or []
     
+    def iter_user_entries(self, user_id: str, columns: str = '*', page_size: int = 500) -> Iterator[List[Dict[str, Any]]]:
+        """Yield all of a user's entries, newest first, one page at a time."""
+        return self.iter_entries(columns, page_size, user_id=user_id)
+    
+    def iter_entries(self, columns: str = '*', page_size: int = 500, user_id: Optional[str] = None) -> Iterator[List[Dict[str, Any]]]:
+        """
+        Yield entries (every user's unless user_id is given), newest first, one page at a time.
+        
+        Pages are keyed on created_at instead of an offset, so every page costs
+        the same however deep the scan is. Entries sharing the timestamp at a
+        page boundary are read together so none is skipped or repeated.
+        columns must include created_at.
+        """
+        def select():
+            query = self.client.table('voice_entries').select(columns)
+            return query.eq('user_id', user_id) if user_id is not None else query
+        
+        cursor = None
+        while True:
+            query = select().order('created_at', desc=True).limit(page_size)
+            if cursor is not None:
+                query = query.lt('created_at', cursor)
+            result = query.execute()
+            self.handle_supabase_error(result)
+            page = self.safe_get_data(result) or []
+            
+            if len(page) < page_size:
+                if page:
+                    yield page
+                return
+            
+            cursor = page[-1]['created_at']
+            ties = select().eq('created_at', cursor).order('id').execute()
+            self.handle_supabase_error(ties)
+            yield [entry for entry in page if entry['created_at'] != cursor] + (self.safe_get_data(ties) or [])
+    
     def get_entry_by_id(self, entry_id: str, user_id: str) -> Optional[Dict[str, Any]]:
         """Get a specific entry by ID."""
         result = self.client.table('voice_entries').select('*').eq('id', entry_id).eq('user_id', user_id).single().execute()
         self.handle_supabase_error(result)
         return self.safe_get_data(result)
     
+    def get_entries_by_ids(self, entry_ids: List[str], columns: str = '*',
+                           user_ids: Optional[Iterable[str]] = None) -> List[Dict[str, Any]]:
+        """Get several entries by ID in one query, optionally only those owned by user_ids."""
+        if not entry_ids:
+            return []
+        query = self.client.table('voice_entries').select(columns).in_('id', entry_ids)
+        if user_ids is not None:
+            query = query.in_('user_id', list(user_ids))
+        result = query.execute()
+        self.handle_supabase_error(result)
+        return self.safe_get_data(result) or []
+    
     def search_entries(self, user_id: str, query_text: str, limit: int = 20, similarity_threshold: float = 0.12) -> List[Dict[str, Any]]:
         """Search entries using vector similarity."""
         result = self.client.rpc('search_voice_entries', {
@@ -70,6 +121,7 @@ class VoiceEntriesDB(BaseDB):
         self.handle_supabase_error(result)
         return self.safe_get_data(result) or []
     
+    @cached_query(ENTRIES)
     def get_recent_emoji_entries(self, user_id: str, limit: int = 50) -> List[Dict[str, Any]]:
         """Get recent entries with emojis."""
         result = self.client.table('voice_entries').select('id, entry_emoji, transcript_user, created_at').eq('user_id', user_id).not_.is_('entry_emoji', 'null').order('created_at', desc=True).limit(limit).execute()
@@ -83,6 +135,8 @@ class VoiceEntriesDB(BaseDB):
             'uid': user_id
         }).execute()
         self.handle_supabase_error(result)
+        bump_version(user_id, ENTRIES)
+        forget_entry(user_id, entry_id)
         return True
     
     def update_entry_transcript(self, entry_id: str, user_id: str, transcript: str) -> Dict[str, Any]:
@@ -92,6 +146,7 @@ class VoiceEntriesDB(BaseDB):
             'updated_at': datetime.utcnow().isoformat()
         }).eq('id', entry_id).eq('user_id', user_id).execute()
         self.handle_supabase_error(result)
+        bump_version(user_id, ENTRIES)
         return self.safe_get_data(result)[0] if self.safe_get_data(result) else {}
     
     def update_entry_tags(self, entry_id: str, user_id: str, tags: List[str]) -> Dict[str, Any]:
@@ -101,6 +156,8 @@ class VoiceEntriesDB(BaseDB):
             'updated_at': datetime.utcnow().isoformat()
         }).eq('id', entry_id).eq('user_id', user_id).execute()
         self.handle_supabase_error(result)
+        bump_version(user_id, ENTRIES)
+        record_entries(self.safe_get_data(result) or [])
         return self.safe_get_data(result)[0] if self.safe_get_data(result) else {}
     
     def update_entry_field(self, entry_id: str, user_id: str, field: str, value: Any) -> Dict[str, Any]:
@@ -111,8 +168,75 @@ class VoiceEntriesDB(BaseDB):
         }
         result = self.client.table('voice_entries').update(update_data).eq('id', entry_id).eq('user_id', user_id).execute()
         self.handle_supabase_error(result)
+        bump_version(user_id, ENTRIES)
+        record_entries(self.safe_get_data(result) or [])
         return self.safe_get_data(result)[0] if self.safe_get_data(result) else {}
     
+    def patch_entry(self, entry_id: str, user_id: str, fields: Optional[Dict[str, Any]] = None,
+                    if_null: Optional[Dict[str, Any]] = None, returning: bool = False) -> Optional[Dict[str, Any]]:
+        """
+        Update several columns of an entry in one statement.
+        
+        Columns in `fields` are always written. Columns in `if_null` are written
+        only where the stored value is null or empty. The patch_voice_entry
+        function (sql/patch_voice_entry.sql) checks this inside the UPDATE, so no
+        read is needed first and concurrent writers never overwrite each other.
+        
+        Returns:
+            The entry as stored after the update if returning is set (None if it does not exist)
+        """
+        # The stored row is always fetched to keep the dashboard summary current
+        result = self.client.rpc('patch_voice_entry', {
+            'entry_id': entry_id,
+            'uid': user_id,
+            'fields': fields or {},
+            'if_null': if_null or {},
+            'return_row': True
+        }).execute()
+        self.handle_supabase_error(result)
+        bump_version(user_id, ENTRIES)
+        rows = self.safe_get_data(result) or []
+        record_entries(rows)
+        return rows[0] if rows and returning else None
+    
+    def insert_entries(self, rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Insert new entries in one request, skipping IDs that already exist.
+        
+        IDs are generated by the client, so a replayed batch never duplicates
+        entries or overwrites them. Returns only the rows that were inserted.
+        """
+        if not rows:
+            return []
+        result = self.client.table('voice_entries').upsert(rows, on_conflict='id', ignore_duplicates=True).execute()
+        self.handle_supabase_error(result)
+        inserted = self.safe_get_data(result) or []
+        if inserted:
+            bump_version({row['user_id'] for row in inserted}, ENTRIES)
+            record_entries(inserted)
+        return inserted
+    
+    def patch_entries(self, patches: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Apply patch_entry to many entries in one request.
+        
+        Each patch is a dict with entry_id, uid and optional fields/if_null, with
+        the same meaning as in patch_entry. Entries that were deleted meanwhile
+        are skipped, never recreated.
+        
+        Returns:
+            The updated entries as stored
+        """
+        if not patches:
+            return []
+        result = self.client.rpc('patch_voice_entries', {'patches': patches}).execute()
+        self.handle_supabase_error(result)
+        updated = self.safe_get_data(result) or []
+        bump_version({patch['uid'] for patch in patches}, ENTRIES)
+        record_entries(updated)
+        return updated
+    
+    @cached_query(ENTRIES)
     def get_available_tags(self, user_id: str) -> List[str]:
         """Get all available tags for a user."""
         result = self.client.table('voice_entries').select('tags_user').eq('user_id', user_id).execute()
@@ -6,6 +6,7 @@ from flask import Blueprint, request, jsonify
 from typing import List, Dict, Any
 import json
 from .auth import require_auth
+from .idempotency import idempotent
 from .db import VoiceEmbeddingsDB
 
 embeddings_bp = Blueprint('embeddings', __name__)
@@ -14,6 +15,7 @@ embeddings_db = VoiceEmbeddingsDB()
 
 @embeddings_bp.route('/api/embeddings', methods=['POST'])
 @require_auth
+@idempotent
 def upsert_embedding(user_id: str):
     """Upsert an embedding for a voice entry."""
     try:
@@ -1,10 +1,16 @@
 from flask import request, jsonify
-from supabase import Client
-import openai
-import os
+from typing import TYPE_CHECKING
 import logging
 from datetime import datetime, timedelta
-from .config import OPENAI_CHAT_MODEL
+from .config import ENRICHMENT_ASYNC
+from .db.dashboard import record_entries
+from .db.versions import bump_version, ENTRIES
+from .enrichment import enqueue_enrichment
+from .llm import chat_completion
+from .metrics import CACHE_REQUESTS
+
+if TYPE_CHECKING:
+    from supabase import Client
 
 logger = logging.getLogger(__name__)
 
@@ -13,8 +19,6 @@ logger = logging.getLogger(__name__)
 def analyze_emotion(text: str):
     """Analyze emotion score for given text"""
     try:
-        openai.api_key = os.getenv('OPENAI_API_KEY')
-        
         prompt = f"""
         Analyze the emotional tone of this text and provide a score from -1 (very negative) to 1 (very positive).
         Consider emotions like happiness, sadness, anger, excitement, anxiety, calmness, etc.
@@ -28,8 +32,8 @@ def analyze_emotion(text: str):
         
         Score: """
         
-        response = openai.chat.completions.create(
-            model=OPENAI_CHAT_MODEL,
+        response = chat_completion(
+            'emotion_trend',
             messages=[{"role": "user", "content": prompt}],
             temperature=0.1,
             max_tokens=10
@@ -54,14 +58,14 @@ def get_local_timestamp():
     return datetime.now().isoformat()
 
 ##This is like the short-term check. Would be interesting to play around and check how many days is most efficient. How many days constitute a new cycle of life on average?
-def emotion_trend_endpoint(supabase: Client, user_id: str):
+def emotion_trend_endpoint(supabase: 'Client', user_id: str):
     """Handle emotion trend analysis for the last 7 days"""
     try:
         # 7 days window
         since = (datetime.now() - timedelta(days=7)).isoformat()
         
         # Fetch entries for last 7 days
-        result = supabase.table('voice_entries').select('id, created_at, transcript_user').eq('user_id', user_id).order('created_at', desc=True).limit(50).execute()
+        result = supabase.table('voice_entries').select('id, created_at, transcript_user, emotion_score_score').eq('user_id', user_id).order('created_at', desc=True).limit(50).execute()
         
         # Check for errors in the result
         if hasattr(result, 'error') and result.error:
@@ -72,12 +76,22 @@ def emotion_trend_endpoint(supabase: Client, user_id: str):
         if not entries:
             return jsonify({'trend': []})
             
+        pending = 0
+        scored = 0
+        
         # Compute missing scores sequentially to stay within rate limits
         for entry in entries:
+            # Stored scores are reused; each rescore is a cache miss costing a GPT call
+            CACHE_REQUESTS.labels('emotion_score', 'miss' if entry.get('emotion_score_score') is None else 'hit').inc()
             if entry.get('emotion_score_score') is None:
                 if not entry.get('transcript_user'):
                     continue
                     
+                # Prefer the background worker; fall back to inline scoring without a queue
+                if ENRICHMENT_ASYNC and enqueue_enrichment(user_id, entry['id'], ['emotion']) is not None:
+                    pending += 1
+                    continue
+                    
                 score, log = analyze_emotion(entry['transcript_user'])
                 
                 update_result = supabase.table('voice_entries').update({
@@ -93,7 +107,13 @@ def emotion_trend_endpoint(supabase: Client, user_id: str):
                 if hasattr(update_result, 'error') and update_result.error:
                     logger.error(f'Failed to update emotion score: {update_result.error}')
                     # Continue processing other entries even if one fails
+                else:
+                    scored += 1
+                    record_entries(update_result.data or [])
                     
+        if scored:
+            bump_version(user_id, ENTRIES)
+            
         # Re-fetch scores for aggregation
         scored_result = supabase.table('voice_entries').select('created_at, emotion_score_score').eq('user_id', user_id).not_.is_('emotion_score_score', 'null').order('created_at').execute()
         
@@ -104,7 +124,7 @@ def emotion_trend_endpoint(supabase: Client, user_id: str):
             
         scored_entries = scored_result.data
         if not scored_entries:
-            return jsonify({'trend': []})
+            return jsonify({'trend': [], 'pending': pending})
             
         # Build continuous timeline points per entry
         trend = [
@@ -118,7 +138,7 @@ def emotion_trend_endpoint(supabase: Client, user_id: str):
         # Sort by timestamp
         trend.sort(key=lambda x: x['timestamp'])
         
-        return jsonify({'trend': trend})
+        return jsonify({'trend': trend, 'pending': pending})
         
     except Exception as e:
         logger.error(f'Emotion trend API error: {e}')
@@ -1,12 +1,13 @@
 from flask import request, jsonify
 import logging
+from .logging_setup import redact_transcript
 
 logger = logging.getLogger(__name__)
 
 def process_transcript(user_id: str, transcript: str):
     """Process transcript for empathy analysis"""
     try:
-        logger.info(f'Processing transcript for empathy - User: {user_id}, Text: {transcript[:100]}...')
+        logger.info(f'Processing transcript for empathy - User: {user_id}, Text: {redact_transcript(transcript)}')
         
         # This is a simplified version - replace with actual empathy processing logic
         # In a real implementation, this would call the core empathy processing
@@ -0,0 +1,315 @@
+"""
+Background enrichment of voice entries (tags, emoji, emotion score, embedding).
+
+Web requests only enqueue jobs in Redis; a Celery worker drains the queue in
+batches, so GPT latency is paid by the worker pool instead of gunicorn workers.
+"""
+
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+import redis
+
+from .celery_app import celery_app
+from .config import (
+    ENRICHMENT_BATCH_SIZE, ENRICHMENT_COALESCE_SECONDS,
+    ENRICHMENT_CONCURRENCY, ENRICHMENT_MAX_RETRIES, ENRICHMENT_RATE_LIMIT,
+    ENRICHMENT_PENDING_TTL
+)
+from .db import VoiceEntriesDB, VoiceEmbeddingsDB
+from .json_provider import dumps, loads
+from .llm import embed
+from .redis_client import get_redis
+
+logger = logging.getLogger(__name__)
+
+ENRICHMENT_KINDS = ('tags', 'emoji', 'emotion', 'embedding')
+
+QUEUE_KEY = 'enrichment:queue'
+DRAIN_SCHEDULED_KEY = 'enrichment:drain-scheduled'
+
+ENTRY_COLUMNS = 'id, user_id, transcript_raw, transcript_user, tags_model, entry_emoji, emotion_score_score, created_at'
+
+entries_db = VoiceEntriesDB()
+embeddings_db = VoiceEmbeddingsDB()
+
+
+def _pending_key(entry_id: str, kind: str) -> str:
+    return f'enrichment:pending:{entry_id}:{kind}'
+
+
+def enqueue_enrichment(user_id: str, entry_id: str, kinds: Sequence[str] = ENRICHMENT_KINDS) -> Optional[List[str]]:
+    """
+    Queue enrichment jobs for an entry.
+
+    Kinds that are already pending for the entry are skipped, so repeated calls
+    for the same entry never produce duplicate GPT calls.
+
+    Args:
+        user_id: Owner of the entry
+        entry_id: Entry to enrich
+        kinds: Subset of ENRICHMENT_KINDS to run
+
+    Returns:
+        Kinds that were newly queued, or None if the queue is unavailable
+    """
+    queued = enqueue_enrichment_many(user_id, {entry_id: kinds})
+    return None if queued is None else queued[entry_id]
+
+
+def enqueue_enrichment_many(user_id: str, entry_kinds: Dict[str, Sequence[str]]) -> Optional[Dict[str, List[str]]]:
+    """
+    Queue enrichment jobs for several entries of one user with a single
+    round trip for the pending markers and one push onto the queue.
+
+    Args:
+        user_id: Owner of the entries
+        entry_kinds: Entry ID -> subset of ENRICHMENT_KINDS to run
+
+    Returns:
+        Entry ID -> kinds that were newly queued, or None if the queue is unavailable
+    """
+    client = get_redis()
+    if client is None:
+        return None
+
+    try:
+        pipe = client.pipeline()
+        for entry_id, kinds in entry_kinds.items():
+            for kind in kinds:
+                pipe.set(_pending_key(entry_id, kind), user_id, nx=True, ex=ENRICHMENT_PENDING_TTL)
+        was_set = iter(pipe.execute())
+        queued = {
+            entry_id: [kind for kind in kinds if next(was_set)]
+            for entry_id, kinds in entry_kinds.items()
+        }
+
+        jobs = [
+            dumps({'user_id': user_id, 'entry_id': entry_id, 'kinds': kinds, 'attempt': 0})
+            for entry_id, kinds in queued.items() if kinds
+        ]
+        if jobs:
+            client.rpush(QUEUE_KEY, *jobs)
+            _schedule_drain(client)
+
+        return queued
+    except redis.RedisError as e:
+        logger.warning(f'Enrichment queue unavailable: {e}')
+        return None
+
+
+def get_pending_kinds(entry_id: str) -> List[str]:
+    """Get the enrichment kinds still queued or running for an entry."""
+    client = get_redis()
+    if client is None:
+        return []
+
+    try:
+        pipe = client.pipeline()
+        for kind in ENRICHMENT_KINDS:
+            pipe.exists(_pending_key(entry_id, kind))
+        return [kind for kind, pending in zip(ENRICHMENT_KINDS, pipe.execute()) if pending]
+    except redis.RedisError as e:
+        logger.warning(f'Enrichment queue unavailable: {e}')
+        return []
+
+
+def _schedule_drain(client: redis.Redis, countdown: float = ENRICHMENT_COALESCE_SECONDS) -> None:
+    """Schedule one drain task; jobs arriving inside the countdown share it."""
+    if client.set(DRAIN_SCHEDULED_KEY, 1, nx=True, ex=max(int(countdown * 5), 10)):
+        drain_enrichment_queue.apply_async(countdown=countdown)
+
+
+def coalesce_jobs(jobs: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Merge jobs for the same entry so each entry is fetched and written once."""
+    merged: Dict[str, Dict[str, Any]] = {}
+    for job in jobs:
+        existing = merged.get(job['entry_id'])
+        if existing is None:
+            merged[job['entry_id']] = {**job, 'kinds': list(job['kinds'])}
+            continue
+        existing['kinds'] = existing['kinds'] + [k for k in job['kinds'] if k not in existing['kinds']]
+        existing['attempt'] = max(existing['attempt'], job.get('attempt', 0))
+    return list(merged.values())
+
+
+def embed_texts(texts: List[str]) -> List[List[float]]:
+    """Embed several texts with a single OpenAI request."""
+    response = embed('enrichment', texts)
+    return [item.embedding for item in sorted(response.data, key=lambda item: item.index)]
+
+
+def enrich_entry(entry: Dict[str, Any], kinds: List[str]) -> Dict[str, Any]:
+    """
+    Compute the missing enrichment fields for one entry.
+
+    Returns:
+        Dict with 'updates' (column values to write) and 'failed' (kinds to retry)
+    """
+    # Imported lazily: these modules pull in the Flask request handlers
+    from .analyze import classify_mini_tags
+    from .pick_emoji import pick_funky_emoji
+    from .emotion_trend import analyze_emotion
+
+    transcript = entry.get('transcript_user') or entry.get('transcript_raw') or ''
+    updates: Dict[str, Any] = {}
+    failed: List[str] = []
+    now = datetime.now().isoformat()
+
+    if 'tags' in kinds and not entry.get('tags_model'):
+        mini = classify_mini_tags(transcript)
+        if mini['tier'] == 'fallback':
+            failed.append('tags')
+        else:
+            selected_tags = [mini['purpose'], mini['tone'], mini['category']]
+            updates['tags_model'] = selected_tags
+            updates['tags_log'] = {
+                'timestamp': now,
+                'tags': selected_tags,
+                'confidence': mini['confidence'],
+                'tier': mini['tier'],
+                'reasoning': f"Tag analysis completed: {mini}"
+            }
+
+    if 'emoji' in kinds and not entry.get('entry_emoji'):
+        emoji_result = pick_funky_emoji(transcript)
+        if emoji_result['source'] == 'fallback':
+            failed.append('emoji')
+        else:
+            updates['entry_emoji'] = emoji_result['emoji']
+            updates['emoji_source'] = emoji_result['source']
+            updates['emoji_log'] = {
+                'timestamp': now,
+                'emoji': emoji_result['emoji'],
+                'source': 'background_enrichment',
+                'transcript_length': len(transcript)
+            }
+
+    if 'emotion' in kinds and entry.get('emotion_score_score') is None:
+        score, log = analyze_emotion(transcript)
+        if log.startswith('Error'):
+            failed.append('emotion')
+        else:
+            updates['emotion_score_score'] = score
+            updates['emotion_score_log'] = {
+                'timestamp': now,
+                'score': score,
+                'method': 'gpt_analysis'
+            }
+
+    return {'updates': updates, 'failed': failed}
+
+
+def process_jobs(jobs: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Run a coalesced batch of jobs: one read, concurrent GPT calls, one bulk write.
+
+    Results are written only into columns that are still empty, so values the
+    user set while GPT was running are kept and deleted entries stay deleted.
+
+    Returns:
+        Jobs (with only their failed kinds) that should be retried
+    """
+    entries = entries_db.get_entries_by_ids(
+        [job['entry_id'] for job in jobs], ENTRY_COLUMNS, {job['user_id'] for job in jobs}
+    )
+    entries_by_id = {entry['id']: entry for entry in entries}
+
+    # A job only ever touches an entry owned by the user who queued it
+    runnable = []
+    for job in jobs:
+        entry = entries_by_id.get(job['entry_id'])
+        if entry is None:
+            continue
+        if entry['user_id'] != job['user_id']:
+            logger.warning(f'Dropping enrichment job for entry {job["entry_id"]}: not owned by {job["user_id"]}')
+            continue
+        runnable.append(job)
+    with ThreadPoolExecutor(max_workers=ENRICHMENT_CONCURRENCY) as executor:
+        outcomes = list(executor.map(
+            lambda job: enrich_entry(entries_by_id[job['entry_id']], job['kinds']),
+            runnable
+        ))
+
+    patches = []
+    retry_jobs = []
+    for job, outcome in zip(runnable, outcomes):
+        if outcome['updates']:
+            patches.append({'entry_id': job['entry_id'], 'uid': job['user_id'], 'if_null': outcome['updates']})
+        if outcome['failed']:
+            retry_jobs.append({**job, 'kinds': outcome['failed']})
+
+    # Embeddings are coalesced into a single batched API call
+    embed_jobs = [job for job in runnable if 'embedding' in job['kinds']]
+    embed_entries = [entries_by_id[job['entry_id']] for job in embed_jobs]
+    embed_entries = [entry for entry in embed_entries if entry.get('transcript_user') or entry.get('transcript_raw')]
+    if embed_entries:
+        texts = [entry.get('transcript_user') or entry['transcript_raw'] for entry in embed_entries]
+        try:
+            vectors = embed_texts(texts)
+            embeddings_db.upsert_embeddings([
+                {
+                    'user_id': entry['user_id'],
+                    'entry_id': entry['id'],
+                    'text': text,
+                    'embedding': vector
+                }
+                for entry, text, vector in zip(embed_entries, texts, vectors)
+            ])
+        except Exception as e:
+            logger.error(f'Batch embedding failed: {e}')
+            retry_jobs.extend({**job, 'kinds': ['embedding']} for job in embed_jobs)
+
+    entries_db.patch_entries(patches)
+
+    # Clear pending markers for everything that is finished (or no longer exists)
+    retrying = {(job['entry_id'], kind) for job in retry_jobs for kind in job['kinds']}
+    client = get_redis()
+    if client is not None:
+        done_keys = [
+            _pending_key(job['entry_id'], kind)
+            for job in jobs for kind in job['kinds']
+            if (job['entry_id'], kind) not in retrying
+        ]
+        if done_keys:
+            client.delete(*done_keys)
+
+    return retry_jobs
+
+
+@celery_app.task(bind=True, rate_limit=ENRICHMENT_RATE_LIMIT, max_retries=ENRICHMENT_MAX_RETRIES)
+def drain_enrichment_queue(self):
+    """Pop a batch of queued jobs, process them and reschedule if work remains."""
+    client = get_redis()
+    if client is None:
+        return 0
+
+    client.delete(DRAIN_SCHEDULED_KEY)
+    raw_jobs = client.lpop(QUEUE_KEY, ENRICHMENT_BATCH_SIZE) or []
+    jobs = coalesce_jobs(loads(raw) for raw in raw_jobs)
+
+    if jobs:
+        try:
+            retry_jobs = process_jobs(jobs)
+        except Exception as e:
+            # Nothing was acknowledged; put the batch back and back off
+            logger.error(f'Enrichment batch failed: {e}')
+            client.rpush(QUEUE_KEY, *raw_jobs)
+            raise self.retry(exc=e, countdown=2 ** self.request.retries)
+
+        for job in retry_jobs:
+            attempt = job.get('attempt', 0) + 1
+            if attempt > ENRICHMENT_MAX_RETRIES:
+                logger.error(f'Giving up enrichment for entry {job["entry_id"]}: {job["kinds"]}')
+                client.delete(*[_pending_key(job['entry_id'], kind) for kind in job['kinds']])
+                continue
+            client.rpush(QUEUE_KEY, dumps({**job, 'attempt': attempt}))
+
+    if client.llen(QUEUE_KEY):
+        # A full batch means there is a backlog; otherwise let new jobs coalesce
+        backlog = len(raw_jobs) >= ENRICHMENT_BATCH_SIZE
+        _schedule_drain(client, countdown=0 if backlog else ENRICHMENT_COALESCE_SECONDS)
+
+    return len(jobs)
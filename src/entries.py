@@ -2,18 +2,45 @@
 Entries API endpoints for voice entries operations.
 """
 
-from flask import Blueprint, request, jsonify
-from typing import List, Dict, Any, Optional
+from flask import Blueprint, Response, request, jsonify, stream_with_context
+from typing import List, Dict, Any, Iterator, Optional
+from datetime import date, datetime
 import json
+import logging
+import uuid
+import zlib
 from .auth import require_auth
-from .db import VoiceEntriesDB
+from .config import BULK_ENTRIES_MAX, ENRICHMENT_ASYNC, EXPORT_PAGE_SIZE
+from .db.versions import ENTRIES
+from .http_cache import conditional_get
+from .idempotency import idempotent
+from .db import VoiceEntriesDB, VoiceEmbeddingsDB
+from .enrichment import enqueue_enrichment_many, get_pending_kinds
+from .json_provider import dumps, loads
+from .process_entry import process_entry_endpoint
+from .save_entry import build_entry, enrichment_kinds
+from .update_tags import validate_tags
+
+logger = logging.getLogger(__name__)
 
 entries_bp = Blueprint('entries', __name__)
 entries_db = VoiceEntriesDB()
+embeddings_db = VoiceEmbeddingsDB()
+
+EXPORT_COLUMNS = 'id, created_at, updated_at, transcript_raw, transcript_user, language_detected, language_rendered, category, audio_duration, entry_emoji'
+# Optional column groups for ?include=; embeddings come from voice_embeddings
+EXPORT_INCLUDES = {
+    'tags': 'tags_model, tags_user',
+    'emotion': 'emotion_score_score',
+    'embedding': None
+}
+# Columns clients may change with PATCH /api/entries/<entry_id>
+PATCHABLE_COLUMNS = ('transcript_user', 'tags_user', 'category', 'entry_emoji', 'language_rendered')
 
 
 @entries_bp.route('/api/entries', methods=['GET'])
 @require_auth
+@conditional_get(ENTRIES)
 def get_entries(user_id: str):
     """Get user entries with optional filters."""
     try:
@@ -53,8 +80,71 @@ def get_entries(user_id: str):
         }), 500
 
 
+def _export_lines(user_id: str, includes: List[str]) -> Iterator[bytes]:
+    """One NDJSON chunk per page of entries, with embeddings fetched per page."""
+    columns = ', '.join([EXPORT_COLUMNS] + [EXPORT_INCLUDES[name] for name in includes if EXPORT_INCLUDES[name]])
+    exported = 0
+    try:
+        for page in entries_db.iter_user_entries(user_id, columns, EXPORT_PAGE_SIZE):
+            if 'embedding' in includes:
+                rows = embeddings_db.get_embeddings_by_entry_ids(user_id, [entry['id'] for entry in page])
+                vectors = {row['entry_id']: row['embedding'] for row in rows}
+                for entry in page:
+                    vector = vectors.get(entry['id'])
+                    # pgvector columns come back from PostgREST as '[0.1,...]'
+                    entry['embedding'] = loads(vector) if isinstance(vector, str) else vector
+            exported += len(page)
+            yield b''.join(dumps(entry) + b'\n' for entry in page)
+    except Exception as e:
+        logger.error(f'Export failed for user {user_id} after {exported} entries: {e}')
+        yield dumps({'error': 'Export interrupted', 'exported': exported}) + b'\n'
+
+
+def _gzip_chunks(chunks: Iterator[bytes]) -> Iterator[bytes]:
+    """Gzip a stream chunk by chunk, flushing so the client receives each page as it is read."""
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+    for chunk in chunks:
+        yield compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+    yield compressor.flush()
+
+
+@entries_bp.route('/api/entries/export', methods=['GET'])
+@require_auth
+def export_entries(user_id: str):
+    """
+    Stream all of the user's entries as NDJSON, newest first.
+    
+    ?include=tags,emotion,embedding adds optional fields. The body is
+    gzip-compressed when the client accepts it. Memory use does not grow with
+    the size of the journal.
+    """
+    includes = [name.strip() for name in request.args.get('include', '').split(',') if name.strip()]
+    unknown = [name for name in includes if name not in EXPORT_INCLUDES]
+    if unknown:
+        return jsonify({
+            'success': False,
+            'error': f'Unknown include: {", ".join(unknown)}. Expected any of {", ".join(EXPORT_INCLUDES)}'
+        }), 400
+    
+    chunks = _export_lines(user_id, includes)
+    gzip = request.accept_encodings.quality('gzip') > 0
+    if gzip:
+        chunks = _gzip_chunks(chunks)
+    
+    response = Response(stream_with_context(chunks), mimetype='application/x-ndjson')
+    response.headers['Content-Disposition'] = f'attachment; filename="journal-{date.today().isoformat()}.ndjson"'
+    response.headers['Cache-Control'] = 'no-store'
+    # Let nginx pass chunks through as they are produced
+    response.headers['X-Accel-Buffering'] = 'no'
+    response.vary.add('Accept-Encoding')
+    if gzip:
+        response.headers['Content-Encoding'] = 'gzip'
+    return response
+
+
 @entries_bp.route('/api/entries/<entry_id>', methods=['GET'])
 @require_auth
+@conditional_get(ENTRIES)
 def get_entry(user_id: str, entry_id: str):
     """Get a specific entry by ID."""
     try:
@@ -78,6 +168,40 @@ def get_entry(user_id: str, entry_id: str):
         }), 500
 
 
+@entries_bp.route('/api/entries/<entry_id>/enrichment', methods=['GET'])
+@require_auth
+def get_entry_enrichment(user_id: str, entry_id: str):
+    """Poll background enrichment status and results for an entry."""
+    try:
+        entry = entries_db.get_entry_by_id(entry_id, user_id)
+        
+        if not entry:
+            return jsonify({
+                'success': False,
+                'error': 'Entry not found'
+            }), 404
+        
+        pending = get_pending_kinds(entry_id)
+        
+        return jsonify({
+            'success': True,
+            'data': {
+                'entry_id': entry_id,
+                'pending': pending,
+                'complete': not pending,
+                'tags_model': entry.get('tags_model'),
+                'entry_emoji': entry.get('entry_emoji'),
+                'emotion_score_score': entry.get('emotion_score_score')
+            }
+        })
+    
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+
 @entries_bp.route('/api/entries/search', methods=['POST'])
 @require_auth
 def search_entries(user_id: str):
@@ -134,6 +258,107 @@ def search_entries(user_id: str):
         }), 500
 
 
+@entries_bp.route('/api/entries/process', methods=['POST'])
+@require_auth
+@idempotent
+def process_entry(user_id: str):
+    """
+    Transcribe a recording, save it with tags, emoji and emotion score, and
+    return the core-service reply, with a per-stage timing breakdown.
+    """
+    return process_entry_endpoint(user_id)
+
+
+@entries_bp.route('/api/entries/bulk', methods=['POST'])
+@require_auth
+def bulk_create_entries(user_id: str):
+    """
+    Save a batch of entries recorded offline.
+    
+    Each item takes the /api/save-entry fields plus a client-generated UUID
+    'id'. The batch is written with one insert; IDs that already exist are
+    reported as duplicates, so replaying a batch is safe.
+    """
+    try:
+        data = request.get_json(silent=True) or {}
+        items = data.get('entries')
+        
+        if not isinstance(items, list) or not items:
+            return jsonify({
+                'success': False,
+                'error': 'entries must be a non-empty list'
+            }), 400
+        
+        if len(items) > BULK_ENTRIES_MAX:
+            return jsonify({
+                'success': False,
+                'error': f'At most {BULK_ENTRIES_MAX} entries per request'
+            }), 400
+        
+        results: List[Dict[str, Any]] = []
+        rows: List[Dict[str, Any]] = []
+        seen_ids = set()
+        
+        for index, item in enumerate(items):
+            result: Dict[str, Any] = {'index': index, 'id': None}
+            results.append(result)
+            if not isinstance(item, dict):
+                result.update(status='invalid', error='Entry must be an object')
+                continue
+            
+            try:
+                entry_id = str(uuid.UUID(str(item.get('id'))))
+            except ValueError:
+                result.update(status='invalid', error='id must be a client-generated UUID')
+                continue
+            result['id'] = entry_id
+            
+            row, error = build_entry(item, user_id, entry_id)
+            if error:
+                result.update(status='invalid', error=error)
+                continue
+            
+            if entry_id in seen_ids:
+                result['status'] = 'duplicate'
+                continue
+            seen_ids.add(entry_id)
+            rows.append(row)
+        
+        inserted = entries_db.insert_entries(rows)
+        inserted_ids = {entry['id'] for entry in inserted}
+        
+        # Hand enrichment for every new entry to the background worker at once
+        queued = None
+        if ENRICHMENT_ASYNC and inserted_ids:
+            queued = enqueue_enrichment_many(user_id, {
+                row['id']: enrichment_kinds(row) for row in rows if row['id'] in inserted_ids
+            })
+        
+        for result in results:
+            if 'status' in result:
+                continue
+            if result['id'] in inserted_ids:
+                result['status'] = 'created'
+                result['enrichment'] = (queued or {}).get(result['id'], [])
+            else:
+                result['status'] = 'duplicate'
+        
+        return jsonify({
+            'success': True,
+            'data': {
+                'created': len(inserted_ids),
+                'results': results,
+                'enrichment': {'async': queued is not None}
+            }
+        })
+    
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+
 @entries_bp.route('/api/entries/<entry_id>', methods=['DELETE'])
 @require_auth
 def delete_entry(user_id: str, entry_id: str):
@@ -153,6 +378,65 @@ def delete_entry(user_id: str, entry_id: str):
         }), 500
 
 
+@entries_bp.route('/api/entries/<entry_id>', methods=['PATCH'])
+@require_auth
+def patch_entry(user_id: str, entry_id: str):
+    """
+    Update several fields of an entry in one request.
+    
+    Body: {"fields": {...}, "if_null": {...}, "return": true}. Columns in
+    if_null are only written where the entry has no value yet.
+    """
+    try:
+        data = request.get_json(silent=True) or {}
+        fields = data.get('fields') or {}
+        if_null = data.get('if_null') or {}
+        
+        if not isinstance(fields, dict) or not isinstance(if_null, dict) or not (fields or if_null):
+            return jsonify({
+                'success': False,
+                'error': 'fields or if_null must be a non-empty object'
+            }), 400
+        
+        unknown = sorted((set(fields) | set(if_null)) - set(PATCHABLE_COLUMNS))
+        if unknown:
+            return jsonify({
+                'success': False,
+                'error': f'Cannot patch {", ".join(unknown)}. Patchable fields: {", ".join(PATCHABLE_COLUMNS)}'
+            }), 400
+        
+        for values in (fields, if_null):
+            if 'tags_user' in values and (not isinstance(values['tags_user'], list) or validate_tags(values['tags_user']) is None):
+                return jsonify({
+                    'success': False,
+                    'error': 'tags_user must be a list of lowercase tags (letters, numbers, - and _)'
+                }), 400
+        
+        returning = bool(data.get('return', True))
+        updated_entry = entries_db.patch_entry(
+            entry_id, user_id,
+            fields={**fields, 'updated_at': datetime.utcnow().isoformat()},
+            if_null=if_null,
+            returning=returning
+        )
+        if updated_entry is None and returning:
+            return jsonify({
+                'success': False,
+                'error': 'Entry not found'
+            }), 404
+        
+        return jsonify({
+            'success': True,
+            'data': updated_entry
+        })
+    
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+
 @entries_bp.route('/api/entries/<entry_id>/transcript', methods=['PUT'])
 @require_auth
 def update_transcript(user_id: str, entry_id: str):
@@ -240,6 +524,7 @@ def update_field(user_id: str, entry_id: str):
 
 @entries_bp.route('/api/entries/recent-emoji', methods=['GET'])
 @require_auth
+@conditional_get(ENTRIES)
 def get_recent_emoji_entries(user_id: str):
     """Get recent entries with emojis."""
     try:
@@ -260,6 +545,7 @@ def get_recent_emoji_entries(user_id: str):
 
 @entries_bp.route('/api/entries/tags', methods=['GET'])
 @require_auth
+@conditional_get(ENTRIES)
 def get_available_tags(user_id: str):
     """Get all available tags for a user."""
     try:
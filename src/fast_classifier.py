@@ -0,0 +1,311 @@
+"""
+Local fast-path classifier for mini tags and emojis.
+
+Two tiers answer before the chat model is called:
+    lexicon - keyword hits over the closed tag vocabulary
+    model   - multinomial naive Bayes trained from our own tags_model history
+
+Only results at or above FAST_CLASSIFIER_THRESHOLD are used; anything less
+confident escalates to GPT. Train the model with:
+    python -m src.fast_classifier train --limit 5000
+"""
+
+import argparse
+import json
+import logging
+import math
+import os
+import re
+import zlib
+from collections import Counter
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from .config import FAST_CLASSIFIER_ENABLED, FAST_CLASSIFIER_MODEL_PATH, FAST_CLASSIFIER_THRESHOLD
+
+logger = logging.getLogger(__name__)
+
+DIMENSIONS = ('purpose', 'tone', 'category')
+
+# Minimum number of labelled entries before the trained model is trusted
+MIN_TRAINING_EXAMPLES = 200
+
+LEXICON: Dict[str, Dict[str, Tuple[str, ...]]] = {
+    'purpose': {
+        'reflection': ('realized', 'realize', 'reflecting', 'thinking', 'lately', 'wonder', 'learned', 'noticed'),
+        'planning': ('plan', 'planning', 'tomorrow', 'schedule', 'next', 'todo', 'prepare', 'organize'),
+        'venting': ('ugh', 'annoyed', 'hate', 'sick', 'tired', 'fed', 'rant', 'unfair', 'ridiculous'),
+        'sharing': ('guess', 'today', 'happened', 'told', 'news', 'finally', 'story', 'showed'),
+        'question': ('why', 'how', 'should', 'whether', 'wondering', 'unsure', 'question'),
+        'goal-setting': ('goal', 'goals', 'aim', 'commit', 'resolution', 'target', 'achieve', 'habit'),
+    },
+    'tone': {
+        'happy': ('happy', 'glad', 'great', 'good', 'awesome', 'wonderful', 'joy', 'fun', 'love', 'smile'),
+        'sad': ('sad', 'down', 'lonely', 'cry', 'crying', 'miss', 'upset', 'depressed', 'lost', 'hurt'),
+        'anxious': ('anxious', 'worried', 'worry', 'nervous', 'stress', 'stressed', 'scared', 'panic', 'afraid', 'overwhelmed'),
+        'excited': ('excited', 'thrilled', 'amazing', 'pumped', 'finally', 'wow', 'incredible'),
+        'calm': ('calm', 'relaxed', 'peaceful', 'quiet', 'rest', 'chill', 'content', 'slow', 'breathe'),
+        'frustrated': ('frustrated', 'annoying', 'angry', 'mad', 'stuck', 'irritated', 'ugh'),
+        'grateful': ('grateful', 'thankful', 'thanks', 'appreciate', 'blessed', 'lucky', 'gratitude'),
+        'confused': ('confused', 'unclear', 'lost', 'understand', 'mixed', 'unsure', 'puzzled'),
+    },
+    'category': {
+        'work': ('work', 'job', 'boss', 'meeting', 'office', 'project', 'deadline', 'client', 'team', 'career'),
+        'personal': ('myself', 'feel', 'life', 'mind', 'self', 'personal'),
+        'health': ('health', 'sleep', 'gym', 'workout', 'run', 'doctor', 'sick', 'diet', 'exercise', 'pain'),
+        'relationships': ('friend', 'friends', 'partner', 'mom', 'dad', 'family', 'girlfriend', 'boyfriend', 'wife', 'husband'),
+        'goals': ('goal', 'goals', 'achieve', 'progress', 'milestone', 'ambition', 'dream'),
+        'daily-life': ('today', 'morning', 'lunch', 'dinner', 'coffee', 'errands', 'groceries', 'commute', 'weekend'),
+        'learning': ('learn', 'learning', 'study', 'class', 'course', 'book', 'reading', 'exam', 'school'),
+        'creative': ('paint', 'painting', 'draw', 'music', 'write', 'writing', 'design', 'art', 'song', 'create'),
+    },
+}
+
+NEGATIONS = frozenset(('not', 'no', 'never', "don't", "isn't", "wasn't", "didn't", "can't", "won't"))
+
+TONE_EMOJIS: Dict[str, Tuple[str, ...]] = {
+    'happy': ('😄', '😊', '🥳', '☀️'),
+    'sad': ('😢', '🥀', '🌧️', '💙'),
+    'anxious': ('😰', '😬', '🌀', '🫣'),
+    'excited': ('🤩', '🚀', '🎉', '⚡'),
+    'calm': ('😌', '🍃', '🧘', '🌊'),
+    'frustrated': ('😤', '🌋', '🙄', '💢'),
+    'grateful': ('🙏', '💛', '🌻', '🤗'),
+    'confused': ('😕', '🤔', '🧩', '❓'),
+}
+
+TOKEN_PATTERN = re.compile(r"[a-z']+")
+
+# Keyword -> [(dimension, label)] index built once at import
+_KEYWORD_INDEX: Dict[str, List[Tuple[str, str]]] = {}
+for _dimension, _labels in LEXICON.items():
+    for _label, _keywords in _labels.items():
+        for _keyword in _keywords:
+            _KEYWORD_INDEX.setdefault(_keyword, []).append((_dimension, _label))
+
+_model: Optional['NaiveBayesModel'] = None
+_model_loaded = False
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase word tokens with apostrophes kept (so negations survive)."""
+    return TOKEN_PATTERN.findall(text.lower())
+
+
+def lexicon_scores(tokens: List[str]) -> Dict[str, Dict[str, Any]]:
+    """
+    Score each dimension by keyword hits, ignoring negated keywords.
+
+    Confidence is the smoothed margin between the best and runner-up label,
+    so a single hit is never enough on its own.
+    """
+    hits: Dict[str, Counter] = {dimension: Counter() for dimension in DIMENSIONS}
+    for i, token in enumerate(tokens):
+        matches = _KEYWORD_INDEX.get(token)
+        if not matches or (i > 0 and tokens[i - 1] in NEGATIONS):
+            continue
+        for dimension, label in matches:
+            hits[dimension][label] += 1
+
+    scores = {}
+    for dimension in DIMENSIONS:
+        ranked = hits[dimension].most_common(2)
+        if not ranked:
+            scores[dimension] = {'label': None, 'confidence': 0.0}
+            continue
+        top = ranked[0][1]
+        second = ranked[1][1] if len(ranked) > 1 else 0
+        total = sum(hits[dimension].values())
+        scores[dimension] = {
+            'label': ranked[0][0],
+            'confidence': (top - second + 1) / (total + 2)
+        }
+    return scores
+
+
+class NaiveBayesModel:
+    """Multinomial naive Bayes over word tokens, one classifier per dimension."""
+
+    def __init__(self, data: Dict[str, Any]):
+        self.examples = data.get('examples', 0)
+        self.vocab_size = max(data.get('vocab_size', 1), 1)
+        self._priors: Dict[str, Dict[str, float]] = {}
+        self._log_probs: Dict[str, Dict[str, Dict[str, float]]] = {}
+        self._unseen: Dict[str, Dict[str, float]] = {}
+
+        for dimension, labels in data.get('dimensions', {}).items():
+            total_docs = sum(label['docs'] for label in labels.values()) or 1
+            self._priors[dimension] = {}
+            self._log_probs[dimension] = {}
+            self._unseen[dimension] = {}
+            for name, label in labels.items():
+                denominator = label['tokens_total'] + self.vocab_size
+                self._priors[dimension][name] = math.log(label['docs'] / total_docs)
+                self._unseen[dimension][name] = math.log(1 / denominator)
+                self._log_probs[dimension][name] = {
+                    token: math.log((count + 1) / denominator)
+                    for token, count in label['tokens'].items()
+                }
+
+    def predict(self, tokens: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Predict the most likely label and its posterior for each dimension."""
+        predictions = {}
+        for dimension, priors in self._priors.items():
+            log_scores = {}
+            for name, prior in priors.items():
+                log_probs = self._log_probs[dimension][name]
+                unseen = self._unseen[dimension][name]
+                log_scores[name] = prior + sum(log_probs.get(token, unseen) for token in tokens)
+
+            best = max(log_scores, key=log_scores.get)
+            # Softmax over log scores gives the posterior of the winner
+            peak = log_scores[best]
+            normaliser = sum(math.exp(score - peak) for score in log_scores.values())
+            predictions[dimension] = {'label': best, 'confidence': 1 / normaliser}
+        return predictions
+
+
+def train_model(examples: Iterable[Tuple[str, List[str]]]) -> Dict[str, Any]:
+    """
+    Build model data from (transcript, [purpose, tone, category]) pairs.
+
+    Returns:
+        JSON-serialisable model data for NaiveBayesModel
+    """
+    dimensions: Dict[str, Dict[str, Dict[str, Any]]] = {dimension: {} for dimension in DIMENSIONS}
+    vocabulary = set()
+    count = 0
+
+    for transcript, tags in examples:
+        if not transcript or not isinstance(tags, list) or len(tags) != len(DIMENSIONS):
+            continue
+        tokens = tokenize(transcript)
+        vocabulary.update(tokens)
+        count += 1
+        for dimension, tag in zip(DIMENSIONS, tags):
+            label = dimensions[dimension].setdefault(tag, {'docs': 0, 'tokens_total': 0, 'tokens': {}})
+            label['docs'] += 1
+            label['tokens_total'] += len(tokens)
+            for token in tokens:
+                label['tokens'][token] = label['tokens'].get(token, 0) + 1
+
+    return {
+        'version': 1,
+        'examples': count,
+        'vocab_size': len(vocabulary),
+        'dimensions': dimensions
+    }
+
+
+def get_model() -> Optional[NaiveBayesModel]:
+    """Load the trained model once per process; None if absent or undertrained."""
+    global _model, _model_loaded
+    if not _model_loaded:
+        _model_loaded = True
+        try:
+            with open(FAST_CLASSIFIER_MODEL_PATH, 'r', encoding='utf-8') as f:
+                model = NaiveBayesModel(json.load(f))
+            if model.examples >= MIN_TRAINING_EXAMPLES:
+                _model = model
+            else:
+                logger.info(f'Fast classifier model has only {model.examples} examples, using lexicon only')
+        except FileNotFoundError:
+            logger.info('No fast classifier model found, using lexicon only')
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning(f'Could not load fast classifier model: {e}')
+    return _model
+
+
+def classify_tags_fast(transcript: str) -> Dict[str, Any]:
+    """
+    Classify purpose, tone and category locally.
+
+    Returns:
+        Dict with the three tags, overall confidence (weakest dimension), the
+        tier that answered ('lexicon' or 'model') and per-dimension details;
+        tags may be None when unknown
+    """
+    tokens = tokenize(transcript or '')
+    best = {
+        dimension: {**score, 'tier': 'lexicon'}
+        for dimension, score in lexicon_scores(tokens).items()
+    }
+
+    model = get_model()
+    if model is not None and tokens:
+        for dimension, prediction in model.predict(tokens).items():
+            if prediction['confidence'] > best[dimension]['confidence']:
+                best[dimension] = {**prediction, 'tier': 'model'}
+
+    return {
+        'purpose': best['purpose']['label'],
+        'tone': best['tone']['label'],
+        'category': best['category']['label'],
+        'confidence': round(min(best[dimension]['confidence'] for dimension in DIMENSIONS), 3),
+        'tier': 'model' if any(best[dimension]['tier'] == 'model' for dimension in DIMENSIONS) else 'lexicon',
+        'dimensions': best
+    }
+
+
+def pick_emoji_fast(transcript: str) -> Dict[str, Any]:
+    """
+    Pick an emoji from the detected tone.
+
+    The emoji within a tone is chosen by a stable hash of the transcript, so the
+    same entry always gets the same emoji.
+    """
+    tone = classify_tags_fast(transcript)['dimensions']['tone']
+
+    if tone['label'] not in TONE_EMOJIS:
+        return {'emoji': None, 'confidence': 0.0, 'tier': tone['tier']}
+
+    choices = TONE_EMOJIS[tone['label']]
+    emoji = choices[zlib.crc32(transcript.encode('utf-8')) % len(choices)]
+    return {'emoji': emoji, 'confidence': round(tone['confidence'], 3), 'tier': tone['tier']}
+
+
+def is_confident(result: Dict[str, Any]) -> bool:
+    """Whether a fast-path result may be used instead of calling GPT."""
+    return FAST_CLASSIFIER_ENABLED and result.get('confidence', 0) >= FAST_CLASSIFIER_THRESHOLD
+
+
+def fetch_training_examples(limit: int) -> List[Tuple[str, List[str]]]:
+    """Read GPT-labelled entries from voice_entries, skipping locally tagged and fallback ones."""
+    from .db import VoiceEntriesDB
+
+    client = VoiceEntriesDB().client
+    examples = []
+    page_size = 1000
+    offset = 0
+    while offset < limit:
+        result = client.table('voice_entries').select('transcript_user, transcript_raw, tags_model, tags_log').not_.is_('tags_model', 'null').order('created_at', desc=True).range(offset, min(offset + page_size, limit) - 1).execute()
+        rows = result.data or []
+        for row in rows:
+            tier = (row.get('tags_log') or {}).get('tier') if isinstance(row.get('tags_log'), dict) else None
+            # Fallback tags are a constant default, not a label
+            if tier in ('lexicon', 'model', 'fallback'):
+                continue
+            examples.append((row.get('transcript_user') or row.get('transcript_raw'), row.get('tags_model')))
+        if len(rows) < page_size:
+            break
+        offset += page_size
+    return examples
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Fast-path tag classifier')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    train = subparsers.add_parser('train', help='Train from tags_model history')
+    train.add_argument('--limit', type=int, default=5000)
+    train.add_argument('--output', default=FAST_CLASSIFIER_MODEL_PATH)
+    args = parser.parse_args()
+
+    if args.command == 'train':
+        data = train_model(fetch_training_examples(args.limit))
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(data, f)
+        print(f"Trained on {data['examples']} entries ({data['vocab_size']} tokens) -> {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,26 @@
+"""
+Gunicorn gevent worker for an app that is patched before it is preloaded.
+
+The stock worker calls monkey.patch_all() again after fork. By then the
+preloaded app holds lazy proxies (openai's numpy proxy) that raise when
+gevent scans existing objects for locks, so the worker fails to boot.
+The stdlib is already patched in the master by apply_worker_patches(), which
+the forked worker inherits; only the listening sockets need re-wrapping.
+"""
+
+from gevent import socket
+from gunicorn.workers.ggevent import GeventWorker as BaseGeventWorker
+
+from .worker_mode import apply_worker_patches
+
+
+class GeventWorker(BaseGeventWorker):
+
+    def patch(self):
+        # No-op when the master already patched (the normal path)
+        apply_worker_patches()
+
+        self.sockets = [
+            socket.socket(s.FAMILY, socket.SOCK_STREAM, fileno=s.sock.fileno())
+            for s in self.sockets
+        ]
@@ -0,0 +1,87 @@
+"""
+Conditional GETs for per-user read endpoints.
+
+ETags come from the user's data version (see db/versions.py), which is read
+from Redis before any Supabase query. A poll whose If-None-Match still matches
+gets a 304 without touching the database. Without Redis, the ETag is a hash of
+the response body. That still saves the transfer, but not the query.
+
+Responses are `private, no-cache`: browsers and the app may keep them but
+must revalidate, and shared caches such as nginx must not store them.
+"""
+
+import hashlib
+from datetime import datetime, timezone
+from functools import wraps
+from typing import Optional
+
+from flask import make_response, request
+
+from .db.versions import get_version
+
+
+def _etag_matches(etag: str) -> bool:
+    candidates = request.if_none_match
+    if not candidates:
+        return False
+    if candidates.star_tag:
+        return True
+    # Flask-Compress appends ":<algorithm>" to the ETags it sends
+    return any(tag.split(':', 1)[0] == etag for tag in candidates.as_set(include_weak=True))
+
+
+def _not_modified(etag: str, last_modified: Optional[datetime]):
+    response = make_response('', 304)
+    _set_validators(response, etag, last_modified)
+    return response
+
+
+def _set_validators(response, etag: str, last_modified: Optional[datetime]) -> None:
+    response.set_etag(etag, weak=True)
+    if last_modified is not None:
+        response.last_modified = last_modified
+    response.cache_control.private = True
+    response.cache_control.no_cache = True
+    response.vary.add('Authorization')
+
+
+def conditional_get(*scopes: str, daily: bool = False):
+    """
+    Answer If-None-Match/If-Modified-Since for a @require_auth GET view.
+
+    Apply below @require_auth so the view's first argument is the user ID.
+    Views that combine several kinds of data pass every scope they read; the
+    ETag then changes when any of them does. Views whose response also depends
+    on the current date (rolling windows, streaks) pass daily=True so the ETag
+    and Last-Modified also change at UTC midnight.
+    """
+    def decorator(f):
+        @wraps(f)
+        def decorated_function(user_id: str, *args, **kwargs):
+            versions = [get_version(user_id, scope) for scope in scopes]
+            etag, last_modified = None, None
+            if all(version is not None for version in versions):
+                path = hashlib.blake2b(request.full_path.encode(), digest_size=6).hexdigest()
+                etag = '-'.join(f'{scope}-{version.version}' for scope, version in zip(scopes, versions)) + f'-{path}'
+                last_modified = datetime.fromtimestamp(max(version.modified_at for version in versions), timezone.utc)
+                if daily:
+                    today = datetime.now(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
+                    etag = f'{etag}-{today:%Y%m%d}'
+                    last_modified = max(last_modified, today)
+                if _etag_matches(etag):
+                    return _not_modified(etag, last_modified)
+                if not request.if_none_match and request.if_modified_since and last_modified <= request.if_modified_since:
+                    return _not_modified(etag, last_modified)
+
+            response = make_response(f(user_id, *args, **kwargs))
+            if response.status_code != 200:
+                return response
+
+            if etag is None:
+                etag = f'body-{hashlib.blake2b(response.get_data(), digest_size=12).hexdigest()}'
+                if _etag_matches(etag):
+                    return _not_modified(etag, None)
+            _set_validators(response, etag, last_modified)
+            return response
+        return decorated_function
+    return decorator
@@ -0,0 +1,151 @@
+"""
+Idempotent writes keyed by the client's Idempotency-Key header.
+
+A client that retries a write after a timeout sends the same key again. The
+first request's response is kept in Redis for IDEMPOTENCY_TTL, and retries get
+that stored response back without touching Supabase or OpenAI. Replayed
+responses carry `Idempotent-Replayed: true`.
+
+Keys are scoped to the user and route. A key reused with a different body is
+rejected with 422. A retry that arrives while the first request is still
+running gets 409. Requests without the header, or made while Redis is
+unavailable, run as usual.
+"""
+
+import base64
+import hashlib
+import logging
+import uuid
+from functools import wraps
+from typing import Optional
+
+import redis
+from flask import make_response, request
+
+from .auth import authenticated_user
+from .config import IDEMPOTENCY_TTL, IDEMPOTENCY_LOCK_TTL
+from .json_provider import dumps, loads
+from .metrics import IDEMPOTENCY_REQUESTS
+from .redis_client import get_redis
+from .singleflight import RELEASE_SCRIPT
+
+logger = logging.getLogger(__name__)
+
+HEADER = 'Idempotency-Key'
+REPLAYED_HEADER = 'Idempotent-Replayed'
+MAX_KEY_LENGTH = 255
+
+
+def _fingerprint() -> str:
+    """
+    Hash of the request body.
+
+    Multipart bodies embed a random boundary that clients regenerate on every
+    retry, so they are hashed from the parsed form fields and file contents.
+    """
+    if request.mimetype != 'multipart/form-data':
+        return hashlib.blake2b(request.get_data(), digest_size=16).hexdigest()
+
+    digest = hashlib.blake2b(digest_size=16)
+    for name, value in sorted(request.form.items(multi=True)):
+        digest.update(dumps([name, value]))
+    for name, file in sorted(request.files.items(multi=True), key=lambda item: (item[0], item[1].filename or '')):
+        digest.update(dumps([name, file.filename]))
+        for chunk in iter(lambda: file.stream.read(65536), b''):
+            digest.update(chunk)
+        file.stream.seek(0)
+    return digest.hexdigest()
+
+
+def _error(message: str, status: int):
+    response = make_response({'error': message}, status)
+    if status == 409:
+        response.headers['Retry-After'] = '1'
+    return response
+
+
+def _replay(record: dict):
+    response = make_response(base64.b64decode(record['body']), record['status'])
+    response.content_type = record['content_type']
+    response.headers[REPLAYED_HEADER] = 'true'
+    return response
+
+
+def _release(client: redis.Redis, key: str, pending: bytes) -> None:
+    try:
+        client.eval(RELEASE_SCRIPT, 1, key, pending)
+    except redis.RedisError as e:
+        logger.warning(f'Failed to release idempotency key {key}: {e}')
+
+
+def idempotent(f):
+    """
+    Replay the stored response for a repeated Idempotency-Key.
+
+    Apply below @require_auth. Responses with a status below 500 are stored;
+    5xx responses and exceptions free the key so the client can retry.
+    """
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        idempotency_key = request.headers.get(HEADER)
+        if idempotency_key is None:
+            return f(*args, **kwargs)
+        if not idempotency_key or len(idempotency_key) > MAX_KEY_LENGTH:
+            return _error(f'{HEADER} must be 1-{MAX_KEY_LENGTH} characters', 400)
+
+        client = get_redis()
+        user = authenticated_user()
+        if client is None or user is None:
+            IDEMPOTENCY_REQUESTS.labels('bypassed').inc()
+            return f(*args, **kwargs)
+
+        key = f'idempotency:{user.id}:{request.method}:{request.path}:{idempotency_key}'
+        fingerprint = _fingerprint()
+        pending = dumps({'state': 'pending', 'fingerprint': fingerprint, 'token': uuid.uuid4().hex})
+
+        try:
+            acquired = client.set(key, pending, nx=True, ex=IDEMPOTENCY_LOCK_TTL)
+            record: Optional[dict] = None if acquired else loads(client.get(key) or b'null')
+        except redis.RedisError as e:
+            logger.warning(f'Idempotency store unavailable, running request directly: {e}')
+            IDEMPOTENCY_REQUESTS.labels('bypassed').inc()
+            return f(*args, **kwargs)
+
+        if not acquired:
+            if record is None:
+                # Expired between SET and GET; the client can simply retry
+                IDEMPOTENCY_REQUESTS.labels('conflict').inc()
+                return _error(f'A request with this {HEADER} is still being processed', 409)
+            if record['fingerprint'] != fingerprint:
+                IDEMPOTENCY_REQUESTS.labels('mismatch').inc()
+                return _error(f'{HEADER} was already used with a different request', 422)
+            if record['state'] == 'pending':
+                IDEMPOTENCY_REQUESTS.labels('conflict').inc()
+                return _error(f'A request with this {HEADER} is still being processed', 409)
+            IDEMPOTENCY_REQUESTS.labels('replayed').inc()
+            return _replay(record)
+
+        try:
+            response = make_response(f(*args, **kwargs))
+        except BaseException:
+            _release(client, key, pending)
+            raise
+
+        if response.status_code >= 500 or response.is_streamed:
+            _release(client, key, pending)
+            return response
+
+        try:
+            client.set(key, dumps({
+                'state': 'done',
+                'fingerprint': fingerprint,
+                'status': response.status_code,
+                'content_type': response.content_type,
+                'body': base64.b64encode(response.get_data()).decode('ascii')
+            }), ex=IDEMPOTENCY_TTL)
+            IDEMPOTENCY_REQUESTS.labels('stored').inc()
+        except redis.RedisError as e:
+            logger.warning(f'Failed to store idempotent response for {key}: {e}')
+            _release(client, key, pending)
+        return response
+    return decorated_function
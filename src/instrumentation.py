@@ -0,0 +1,152 @@
+"""
+Request and dependency instrumentation.
+
+Every Flask route records a count, latency and in-flight gauge by route
+template and status. Supabase calls are timed at the HTTP transport so every
+table, RPC and auth call is covered without touching call sites; OpenAI and
+the core service wrap their calls in track_dependency(). Each dependency call
+is also a trace span.
+"""
+
+import os
+import time
+from contextlib import contextmanager
+from typing import TYPE_CHECKING, Iterator
+
+from flask import Flask, g, request
+from prometheus_client import CollectorRegistry, make_wsgi_app, multiprocess
+
+from .metrics import (
+    HTTP_REQUESTS, HTTP_LATENCY, HTTP_IN_FLIGHT,
+    DEPENDENCY_LATENCY, DEPENDENCY_IN_FLIGHT
+)
+from .tracing import span
+
+if TYPE_CHECKING:
+    import httpx
+
+# PostgREST expresses the operation through the HTTP method
+SUPABASE_OPERATIONS = {
+    'GET': 'select',
+    'HEAD': 'count',
+    'POST': 'insert',
+    'PATCH': 'update',
+    'DELETE': 'delete',
+}
+
+
+@contextmanager
+def track_dependency(dependency: str, target: str, operation: str = 'call') -> Iterator[dict]:
+    """
+    Time a downstream call and record its outcome.
+
+    Yields a dict; set ``outcome`` on it to override the default of 'success'
+    (or 'error'/'timeout' when the block raises).
+    """
+    state = {'outcome': 'success'}
+    gauge = DEPENDENCY_IN_FLIGHT.labels(dependency)
+    gauge.inc()
+    started = time.perf_counter()
+    with span(f'{dependency} {operation} {target}', **{
+        'dependency': dependency, 'dependency.target': target, 'dependency.operation': operation
+    }) as current:
+        try:
+            yield state
+        except Exception as e:
+            state['outcome'] = 'timeout' if 'timeout' in type(e).__name__.lower() else 'error'
+            raise
+        finally:
+            gauge.dec()
+            current.set_attribute('dependency.outcome', state['outcome'])
+            DEPENDENCY_LATENCY.labels(dependency, target, operation, state['outcome']).observe(
+                time.perf_counter() - started
+            )
+
+
+def supabase_target(path: str) -> str:
+    """Map a Supabase URL path to a low-cardinality target label."""
+    parts = [part for part in path.split('/') if part]
+    # /rest/v1/<table>, /rest/v1/rpc/<fn>, /auth/v1/<endpoint>, /storage/v1/...
+    if len(parts) >= 3 and parts[0] == 'rest':
+        return f'rpc:{parts[3]}' if parts[2] == 'rpc' and len(parts) > 3 else f'table:{parts[2]}'
+    if len(parts) >= 3 and parts[0] in ('auth', 'storage'):
+        return f'{parts[0]}:{parts[2]}'
+    return 'other'
+
+
+class InstrumentedTransport:
+    """
+    httpx transport wrapper that records Supabase dependency metrics.
+
+    Duck-typed rather than subclassing httpx.BaseTransport so importing this
+    module does not import httpx.
+    """
+
+    def __init__(self, transport: 'httpx.BaseTransport'):
+        self._transport = transport
+
+    def handle_request(self, request: 'httpx.Request') -> 'httpx.Response':
+        target = supabase_target(request.url.path)
+        if target.startswith('rpc:'):
+            operation = 'rpc'
+        elif not target.startswith('table:'):
+            operation = request.method
+        elif request.method == 'POST' and 'merge-duplicates' in request.headers.get('prefer', ''):
+            operation = 'upsert'
+        else:
+            operation = SUPABASE_OPERATIONS.get(request.method, request.method.lower())
+
+        with track_dependency('supabase', target, operation) as state:
+            response = self._transport.handle_request(request)
+            if response.status_code >= 400:
+                state['outcome'] = 'error'
+            return response
+
+    def close(self) -> None:
+        self._transport.close()
+
+
+def _instrument_http_client(http_client) -> None:
+    import httpx
+    if isinstance(http_client, httpx.Client) and not isinstance(http_client._transport, InstrumentedTransport):
+        http_client._transport = InstrumentedTransport(http_client._transport)
+
+
+def instrument_supabase(client) -> None:
+    """Record metrics for every PostgREST and GoTrue call made through a Supabase client."""
+    _instrument_http_client(client.postgrest.session)
+    _instrument_http_client(getattr(client.auth, '_http_client', None))
+
+
+def init_app(app: Flask) -> None:
+    """Record per-route request metrics."""
+
+    @app.before_request
+    def start_request_metrics():
+        g.metrics_route = request.url_rule.rule if request.url_rule else 'unmatched'
+        g.metrics_started = time.perf_counter()
+        HTTP_IN_FLIGHT.labels(g.metrics_route).inc()
+
+    @app.after_request
+    def record_request_metrics(response):
+        started = g.pop('metrics_started', None)
+        if started is not None:
+            status = str(response.status_code)
+            HTTP_REQUESTS.labels(request.method, g.metrics_route, status).inc()
+            HTTP_LATENCY.labels(request.method, g.metrics_route, status).observe(time.perf_counter() - started)
+        return response
+
+    @app.teardown_request
+    def end_request_metrics(error=None):
+        route = g.pop('metrics_route', None)
+        if route is not None:
+            HTTP_IN_FLIGHT.labels(route).dec()
+
+
+def metrics_wsgi_app():
+    """WSGI app for /metrics, aggregating all gunicorn workers in multiprocess mode."""
+    if os.getenv('PROMETHEUS_MULTIPROC_DIR'):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return make_wsgi_app(registry)
+    return make_wsgi_app()
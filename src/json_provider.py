@@ -0,0 +1,113 @@
+"""
+Fast JSON encoding for Flask responses and the payloads we build ourselves.
+
+orjson serialises list-heavy responses (entries, tags, embedding vectors) an
+order of magnitude faster than the stdlib encoder and handles datetime, UUID
+and numpy arrays natively. When orjson is not installed everything falls back
+to the stdlib json module with the same type support.
+
+Supabase request/response bodies are encoded inside postgrest-py, so only the
+bodies we build ourselves (core-service calls, Redis payloads, pgvector
+literals) go through dumps()/loads() here.
+"""
+
+import dataclasses
+import json
+from datetime import date, datetime, time
+from decimal import Decimal
+from typing import Any, Union
+from uuid import UUID
+
+from flask.json.provider import DefaultJSONProvider, JSONProvider
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is in requirements.txt
+    orjson = None
+
+HAS_ORJSON = orjson is not None
+
+if HAS_ORJSON:
+    _OPTIONS = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+
+
+def _default(obj: Any) -> Any:
+    """Types neither encoder handles on its own."""
+    if isinstance(obj, Decimal):
+        return float(obj)
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    if isinstance(obj, bytes):
+        return obj.decode('utf-8', errors='replace')
+    # numpy scalars/arrays (non-contiguous arrays, or no orjson), without importing numpy
+    if hasattr(obj, 'tolist'):
+        return obj.tolist()
+    if dataclasses.is_dataclass(obj) and not isinstance(obj, type):
+        return dataclasses.asdict(obj)
+    if hasattr(obj, '__html__'):
+        return str(obj.__html__())
+    raise TypeError(f'Object of type {type(obj).__name__} is not JSON serializable')
+
+
+def _stdlib_default(obj: Any) -> Any:
+    if isinstance(obj, (datetime, date, time)):
+        return obj.isoformat()
+    if isinstance(obj, UUID):
+        return str(obj)
+    return _default(obj)
+
+
+def dumps(obj: Any, indent: bool = False) -> bytes:
+    """Encode obj to UTF-8 JSON bytes."""
+    if HAS_ORJSON:
+        return orjson.dumps(obj, default=_default, option=(_OPTIONS | orjson.OPT_INDENT_2) if indent else _OPTIONS)
+    return json.dumps(
+        obj, default=_stdlib_default, ensure_ascii=False,
+        indent=2 if indent else None, separators=None if indent else (',', ':')
+    ).encode('utf-8')
+
+
+def dumps_str(obj: Any) -> str:
+    return dumps(obj).decode('utf-8')
+
+
+def loads(data: Union[bytes, bytearray, memoryview, str]) -> Any:
+    if HAS_ORJSON:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+class FastJSONProvider(JSONProvider):
+    """
+    Flask JSON provider backed by orjson.
+
+    Keys are not sorted (sorting costs more than encoding on large lists) and
+    output is compact unless the app is in debug mode.
+    """
+
+    def dumps(self, obj: Any, **kwargs: Any) -> str:
+        return dumps(obj).decode('utf-8')
+
+    def loads(self, s: Union[str, bytes], **kwargs: Any) -> Any:
+        return loads(s)
+
+    def response(self, *args: Any, **kwargs: Any):
+        obj = self._prepare_response_obj(args, kwargs)
+        # Pass bytes straight through instead of encoding to str and back
+        return self._app.response_class(
+            dumps(obj, indent=self._app.debug), mimetype='application/json'
+        )
+
+
+class StdlibJSONProvider(DefaultJSONProvider):
+    """Fallback provider with the same type support and key order as FastJSONProvider."""
+
+    default = staticmethod(_stdlib_default)
+    sort_keys = False
+
+
+def init_app(app) -> None:
+    """Use orjson for jsonify/request.get_json when it is installed."""
+    provider_class = FastJSONProvider if HAS_ORJSON else StdlibJSONProvider
+    app.json_provider_class = provider_class
+    app.json = provider_class(app)
@@ -0,0 +1,229 @@
+"""
+Single gateway for all OpenAI calls.
+
+Every call goes through one pooled client per process with timeouts kept
+below the gunicorn worker timeout, exponential backoff on 429/5xx,
+a process-wide concurrency cap and per-caller latency/token/cost metrics.
+Within a web request all OpenAI calls share one OPENAI_DEADLINE budget, so
+sequential calls (two Whisper passes) cannot outlast the worker.
+The openai SDK is imported on first use; gunicorn workers create the client in
+post_worker_init.
+"""
+
+import logging
+import os
+import random
+import threading
+import time
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional
+
+from flask import g, has_request_context
+
+from .config import (
+    OPENAI_CHAT_MODEL, OPENAI_EMBED_MODEL, OPENAI_WHISPER_MODEL,
+    OPENAI_TIMEOUT, OPENAI_DEADLINE, OPENAI_MAX_RETRIES,
+    OPENAI_MAX_CONCURRENCY, OPENAI_BACKOFF_BASE
+)
+from .instrumentation import track_dependency
+from .metrics import LLM_LATENCY, LLM_TOKENS, LLM_COST, LLM_RETRIES
+from .rate_limit import acquire_openai_budget, charge_openai_tokens
+from .tracing import span
+
+if TYPE_CHECKING:
+    import openai
+
+logger = logging.getLogger(__name__)
+
+# USD per 1M tokens (input, output)
+MODEL_PRICES = {
+    'gpt-4o-mini': (0.15, 0.60),
+    'gpt-4o': (2.50, 10.00),
+    'gpt-3.5-turbo': (0.50, 1.50),
+    'text-embedding-3-small': (0.02, 0.0),
+    'text-embedding-3-large': (0.13, 0.0),
+}
+WHISPER_PRICE_PER_MINUTE = 0.006
+
+_client: Optional['openai.OpenAI'] = None
+_client_pid: Optional[int] = None
+_client_lock = threading.Lock()
+_semaphore = threading.BoundedSemaphore(OPENAI_MAX_CONCURRENCY)
+
+
+class LLMUnavailableError(Exception):
+    """Raised when no OpenAI slot or global budget frees up before the call's deadline."""
+
+
+def get_client() -> 'openai.OpenAI':
+    """Get the process-wide OpenAI client (recreated after fork)."""
+    global _client, _client_pid
+    with _client_lock:
+        if _client is None or _client_pid != os.getpid():
+            import openai
+            # Retries are handled here so they respect the deadline and metrics
+            _client = openai.OpenAI(
+                api_key=os.getenv('OPENAI_API_KEY'),
+                timeout=OPENAI_TIMEOUT,
+                max_retries=0
+            )
+            _client_pid = os.getpid()
+    return _client
+
+
+def request_deadline(now: Optional[float] = None) -> float:
+    """
+    Monotonic time by which OpenAI work must finish.
+
+    Inside a request the deadline is OPENAI_DEADLINE after the request's first
+    OpenAI call and is shared by every later call (worker threads included, as
+    they copy the request context). Outside a request each call gets the full
+    OPENAI_DEADLINE.
+    """
+    now = time.monotonic() if now is None else now
+    if not has_request_context():
+        return now + OPENAI_DEADLINE
+    return g.setdefault('openai_deadline', now + OPENAI_DEADLINE)
+
+
+def _is_timeout(error: Exception) -> bool:
+    import openai
+    return isinstance(error, openai.APITimeoutError)
+
+
+def _is_retryable(error: Exception) -> bool:
+    import openai
+    if isinstance(error, (openai.RateLimitError, openai.APITimeoutError, openai.APIConnectionError)):
+        return True
+    return isinstance(error, openai.APIStatusError) and error.status_code >= 500
+
+
+def _retry_delay(error: Exception, attempt: int) -> float:
+    """Exponential backoff with jitter, honouring Retry-After when present."""
+    response = getattr(error, 'response', None)
+    retry_after = response.headers.get('retry-after') if response is not None else None
+    try:
+        if retry_after is not None:
+            return float(retry_after)
+    except ValueError:
+        pass
+    return OPENAI_BACKOFF_BASE * (2 ** attempt) + random.uniform(0, OPENAI_BACKOFF_BASE)
+
+
+def _call(caller: str, model: str, operation: str, request: Callable[[float], Any],
+          timeout: Optional[float] = None) -> Any:
+    """
+    Run an OpenAI request with concurrency control, timeouts and retries.
+
+    Args:
+        caller: Name of the calling feature, used as a metrics label
+        model: Model name, used as a metrics label
+        operation: 'chat', 'transcription' or 'embedding'
+        request: Callable taking the per-attempt timeout in seconds
+        timeout: Per-attempt timeout override
+
+    Returns:
+        The OpenAI response object
+    """
+    started = time.monotonic()
+    deadline = request_deadline(started)
+    attempt_timeout = timeout or OPENAI_TIMEOUT
+    attempt = 0
+    outcome = 'error'
+
+    with span(f'openai.{operation}', **{'llm.caller': caller, 'llm.model': model}) as llm_span:
+        try:
+            if deadline <= started:
+                outcome = 'timeout'
+                raise LLMUnavailableError(f'OpenAI deadline of this request already passed before {caller}')
+            while True:
+                if not acquire_openai_budget(model, deadline):
+                    outcome = 'throttled'
+                    raise LLMUnavailableError(f'Global OpenAI budget exhausted for {caller} within {OPENAI_DEADLINE}s')
+                remaining = deadline - time.monotonic()
+                if not _semaphore.acquire(timeout=max(remaining, 0)):
+                    outcome = 'saturated'
+                    raise LLMUnavailableError(f'No OpenAI slot available for {caller} within {OPENAI_DEADLINE}s')
+                try:
+                    remaining = deadline - time.monotonic()
+                    with track_dependency('openai', model, operation):
+                        response = request(max(min(attempt_timeout, remaining), 0.1))
+                    outcome = 'success'
+                    return response
+                except Exception as e:
+                    if not _is_retryable(e) or attempt >= OPENAI_MAX_RETRIES:
+                        outcome = 'timeout' if _is_timeout(e) else 'error'
+                        raise
+                    delay = _retry_delay(e, attempt)
+                    if time.monotonic() + delay >= deadline:
+                        outcome = 'timeout' if _is_timeout(e) else 'error'
+                        raise
+                    logger.warning(f'OpenAI {operation} for {caller} failed ({e}), retrying in {delay:.2f}s')
+                    LLM_RETRIES.labels(caller, model).inc()
+                finally:
+                    _semaphore.release()
+
+                attempt += 1
+                time.sleep(delay)
+        finally:
+            llm_span.set_attributes({'llm.attempts': attempt + 1, 'llm.outcome': outcome})
+            LLM_LATENCY.labels(caller, model, operation, outcome).observe(time.monotonic() - started)
+
+
+def _record_usage(caller: str, model: str, usage: Any) -> None:
+    if usage is None:
+        return
+    prompt_tokens = getattr(usage, 'prompt_tokens', 0) or 0
+    completion_tokens = getattr(usage, 'completion_tokens', 0) or 0
+    charge_openai_tokens(prompt_tokens + completion_tokens)
+    LLM_TOKENS.labels(caller, model, 'prompt').observe(prompt_tokens)
+    if completion_tokens:
+        LLM_TOKENS.labels(caller, model, 'completion').observe(completion_tokens)
+
+    input_price, output_price = MODEL_PRICES.get(model, (0.0, 0.0))
+    LLM_COST.labels(caller, model).observe(
+        (prompt_tokens * input_price + completion_tokens * output_price) / 1_000_000
+    )
+
+
+def chat_completion(caller: str, messages: List[Dict[str, str]], model: str = OPENAI_CHAT_MODEL,
+                    timeout: Optional[float] = None, **kwargs) -> Any:
+    """Create a chat completion through the gateway."""
+    response = _call(
+        caller, model, 'chat',
+        lambda attempt_timeout: get_client().chat.completions.create(
+            model=model, messages=messages, timeout=attempt_timeout, **kwargs
+        ),
+        timeout
+    )
+    _record_usage(caller, model, response.usage)
+    return response
+
+
+def transcribe(caller: str, file_path: str, model: str = OPENAI_WHISPER_MODEL,
+               timeout: Optional[float] = None, **kwargs) -> Any:
+    """Transcribe an audio file through the gateway; the file is reopened per attempt."""
+    def request(attempt_timeout: float) -> Any:
+        with open(file_path, 'rb') as audio_file:
+            return get_client().audio.transcriptions.create(
+                file=audio_file, model=model, timeout=attempt_timeout, **kwargs
+            )
+
+    response = _call(caller, model, 'transcription', request, timeout)
+    duration = getattr(response, 'duration', None)
+    if duration:
+        LLM_COST.labels(caller, model).observe(float(duration) / 60 * WHISPER_PRICE_PER_MINUTE)
+    return response
+
+
+def embed(caller: str, texts: List[str], model: str = OPENAI_EMBED_MODEL,
+          timeout: Optional[float] = None) -> Any:
+    """Create embeddings for one or more texts through the gateway."""
+    response = _call(
+        caller, model, 'embedding',
+        lambda attempt_timeout: get_client().embeddings.create(
+            model=model, input=texts, timeout=attempt_timeout
+        ),
+        timeout
+    )
+    _record_usage(caller, model, response.usage)
+    return response
@@ -0,0 +1,271 @@
+"""
+Queue-based logging pipeline.
+
+Request threads only enqueue records: a QueueHandler on the root logger adds
+the request/trace IDs, drops most DEBUG records and truncates long messages,
+then a QueueListener thread renders and writes them. stdlib and structlog
+records are rendered by the same structlog ProcessorFormatter, which redacts
+transcripts and secrets. The listener is a real OS thread on a native queue
+even under gevent, so sink I/O never blocks the hub. Every process appends to one log file; rotation is
+serialised across gunicorn workers with a file lock, and the other workers
+reopen the file when its inode changes.
+"""
+
+import atexit
+import fcntl
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import sys
+from typing import Any, Dict, Optional
+
+import structlog
+
+from .config import (
+    IS_PRODUCTION, LOG_LEVEL, LOG_FILE, LOG_MAX_BYTES, LOG_BACKUP_COUNT,
+    LOG_DEBUG_SAMPLE_RATE, LOG_MAX_FIELD_LENGTH, LOG_TRANSCRIPT_PREVIEW
+)
+from .json_provider import dumps_str
+from .tracing import RequestContextFilter
+from .worker_mode import native
+
+# Field names whose values are user content or credentials
+TRANSCRIPT_FIELDS = frozenset({
+    'transcript', 'transcript_raw', 'transcript_user', 'text', 'content', 'prompt', 'reply'
+})
+SECRET_FIELDS = frozenset({'authorization', 'token', 'access_token', 'api_key', 'password', 'embedding'})
+
+# Only check the file size every N records; stat() per record is wasted work
+ROTATION_CHECK_EVERY = 200
+
+
+def truncate(value: str, limit: int = LOG_MAX_FIELD_LENGTH) -> str:
+    if len(value) <= limit:
+        return value
+    return f'{value[:limit]}...<{len(value) - limit} more chars>'
+
+
+def redact_transcript(text: Optional[str]) -> str:
+    """Loggable stand-in for user speech: length plus an optional short preview."""
+    if not text:
+        return '<empty>'
+    if LOG_TRANSCRIPT_PREVIEW <= 0:
+        return f'<redacted {len(text)} chars>'
+    return f'{text[:LOG_TRANSCRIPT_PREVIEW]!r}...<{len(text)} chars>'
+
+
+def redact(value: Any, key: Optional[str] = None) -> Any:
+    """Recursively redact transcript/secret fields and truncate long strings."""
+    if key is not None:
+        lowered = key.lower()
+        if lowered in SECRET_FIELDS:
+            return '<redacted>'
+        if lowered in TRANSCRIPT_FIELDS and isinstance(value, str):
+            return redact_transcript(value)
+    if isinstance(value, dict):
+        return {k: redact(v, str(k)) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [redact(v) for v in value[:20]] + ([f'<{len(value) - 20} more>'] if len(value) > 20 else [])
+    if isinstance(value, str):
+        return truncate(value)
+    return value
+
+
+def redact_event(logger, method_name: str, event_dict: Dict[str, Any]) -> Dict[str, Any]:
+    """structlog processor applying redact() to every field except the event name."""
+    for key, value in event_dict.items():
+        if key not in ('event', '_record', '_from_structlog'):
+            event_dict[key] = redact(value, key)
+    return event_dict
+
+
+def add_record_context(logger, method_name: str, event_dict: Dict[str, Any]) -> Dict[str, Any]:
+    """Copy request/trace IDs captured at enqueue time onto stdlib records."""
+    record = event_dict.get('_record')
+    if record is not None:
+        for attr in ('request_id', 'trace_id'):
+            value = getattr(record, attr, '-')
+            if value != '-':
+                event_dict.setdefault(attr, value)
+    return event_dict
+
+
+class SampledQueueHandler(logging.handlers.QueueHandler):
+    """Enqueues records cheaply: samples DEBUG, merges args, truncates messages."""
+
+    def __init__(self, log_queue: queue.SimpleQueue, debug_sample_rate: float):
+        super().__init__(log_queue)
+        self.debug_sample_rate = debug_sample_rate
+        self.addFilter(RequestContextFilter())
+
+    def emit(self, record: logging.LogRecord) -> None:
+        if record.levelno <= logging.DEBUG and random.random() >= self.debug_sample_rate:
+            return
+        super().emit(record)
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Unlike the base class, keep structlog's event dicts and exc_info intact:
+        # the listener runs in this process and renders them itself
+        if isinstance(record.msg, str):
+            record.msg = truncate(record.getMessage(), LOG_MAX_FIELD_LENGTH * 4)
+            record.args = None
+        return record
+
+
+class SharedFileHandler(logging.handlers.WatchedFileHandler):
+    """
+    One append-only log file shared by all workers.
+
+    Lines are appended with O_APPEND, so writes from different processes do
+    not interleave. When the file passes max_bytes one process rotates it
+    under an flock; the rest notice the new inode and reopen.
+    """
+
+    def __init__(self, filename: str, max_bytes: int, backup_count: int):
+        os.makedirs(os.path.dirname(filename) or '.', exist_ok=True)
+        super().__init__(filename, encoding='utf-8')
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self.lock_path = f'{self.baseFilename}.lock'
+        self._since_check = 0
+
+    def emit(self, record: logging.LogRecord) -> None:
+        super().emit(record)
+        self._since_check += 1
+        if self.max_bytes and self._since_check >= ROTATION_CHECK_EVERY:
+            self._since_check = 0
+            self._rotate_if_needed()
+
+    def _rotate_if_needed(self) -> None:
+        try:
+            if os.stat(self.baseFilename).st_size < self.max_bytes:
+                return
+            with open(self.lock_path, 'w') as lock_file:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+                # Another worker may have rotated while we waited for the lock
+                if os.stat(self.baseFilename).st_size < self.max_bytes:
+                    return
+                for index in range(self.backup_count - 1, 0, -1):
+                    source = f'{self.baseFilename}.{index}'
+                    if os.path.exists(source):
+                        os.replace(source, f'{self.baseFilename}.{index + 1}')
+                os.replace(self.baseFilename, f'{self.baseFilename}.1')
+            self.reopenIfNeeded()
+        except OSError:
+            pass
+
+
+class NativeQueueListener(logging.handlers.QueueListener):
+    """
+    QueueListener on a real OS thread.
+
+    Under gevent, threading.Thread is a greenlet: file writes would block the
+    hub, and a greenlet copied by fork would drain the parent's pending records
+    a second time.
+    """
+
+    def start(self) -> None:
+        self._done = native('_thread', 'allocate_lock')()
+        self._done.acquire()
+        self._thread = native('_thread', 'start_new_thread')(self._run, ())
+
+    def _run(self) -> None:
+        try:
+            self._monitor()
+        finally:
+            self._done.release()
+
+    def stop(self) -> None:
+        self.enqueue_sentinel()
+        self._done.acquire(timeout=5)
+        self._thread = None
+
+
+_queue_handler: Optional[SampledQueueHandler] = None
+_listener: Optional[NativeQueueListener] = None
+_sink_handlers = []
+
+
+def _start_listener(new_queue: bool = True) -> None:
+    """(Re)start the listener thread; threads do not survive gunicorn's fork."""
+    global _listener
+    if _listener is not None:
+        return
+    if new_queue:
+        _queue_handler.queue = native('queue', 'SimpleQueue')()
+    _listener = NativeQueueListener(_queue_handler.queue, *_sink_handlers, respect_handler_level=True)
+    _listener.start()
+
+
+def _stop_listener() -> None:
+    """Flush queued records on exit."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+def configure_logging() -> None:
+    """Install the queue pipeline on the root logger and configure structlog."""
+    global _queue_handler
+    if _queue_handler is not None:
+        return
+
+    renderer = structlog.processors.JSONRenderer(serializer=lambda obj, **kw: dumps_str(obj)) if IS_PRODUCTION else structlog.dev.ConsoleRenderer(colors=False)
+    pre_chain = [
+        structlog.stdlib.add_logger_name,
+        structlog.stdlib.add_log_level,
+        structlog.processors.TimeStamper(fmt='iso'),
+        add_record_context,
+    ]
+    formatter = structlog.stdlib.ProcessorFormatter(
+        processors=[
+            structlog.stdlib.ProcessorFormatter.remove_processors_meta,
+            structlog.processors.format_exc_info,
+            renderer,
+        ],
+        foreign_pre_chain=pre_chain,
+    )
+
+    console = logging.StreamHandler(sys.stdout)
+    file_sink = SharedFileHandler(LOG_FILE, LOG_MAX_BYTES, LOG_BACKUP_COUNT)
+    for handler in (console, file_sink):
+        handler.setFormatter(formatter)
+        handler.setLevel(LOG_LEVEL)
+        _sink_handlers.append(handler)
+
+    _queue_handler = SampledQueueHandler(native('queue', 'SimpleQueue')(), LOG_DEBUG_SAMPLE_RATE)
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(_queue_handler)
+    root.setLevel(LOG_LEVEL)
+
+    structlog.configure(
+        processors=[
+            structlog.contextvars.merge_contextvars,
+            structlog.stdlib.filter_by_level,
+            structlog.stdlib.add_logger_name,
+            structlog.stdlib.add_log_level,
+            structlog.stdlib.PositionalArgumentsFormatter(),
+            structlog.processors.TimeStamper(fmt='iso'),
+            structlog.processors.StackInfoRenderer(),
+            redact_event,
+            structlog.stdlib.ProcessorFormatter.wrap_for_formatter,
+        ],
+        logger_factory=structlog.stdlib.LoggerFactory(),
+        wrapper_class=structlog.stdlib.BoundLogger,
+        cache_logger_on_first_use=True,
+    )
+
+    _start_listener()
+    # Drain and stop the listener around fork: a child that inherits a file or
+    # stdout buffer mid-write from the parent's thread deadlocks on its lock
+    os.register_at_fork(
+        before=_stop_listener,
+        after_in_parent=lambda: _start_listener(new_queue=False),  # keeps records logged during the fork
+        after_in_child=_start_listener
+    )
+    atexit.register(_stop_listener)
@@ -0,0 +1,111 @@
+"""
+Prometheus metrics shared across the application.
+
+With several gunicorn workers set PROMETHEUS_MULTIPROC_DIR so every worker
+writes its samples there and /metrics aggregates them (see instrumentation.py).
+Gauges declare how they are combined across workers.
+"""
+
+from prometheus_client import Counter, Gauge, Histogram
+
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2, 4, 8, 16, 32)
+FAST_LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2, 4, 8, 16, 32)
+
+# HTTP routes
+HTTP_REQUESTS = Counter(
+    'http_requests_total',
+    'Requests handled, by route template and status',
+    ['method', 'route', 'status']
+)
+HTTP_LATENCY = Histogram(
+    'http_request_duration_seconds',
+    'Request latency by route template and status',
+    ['method', 'route', 'status'],
+    buckets=FAST_LATENCY_BUCKETS
+)
+HTTP_IN_FLIGHT = Gauge(
+    'http_requests_in_flight',
+    'Requests currently being handled',
+    ['route'],
+    multiprocess_mode='livesum'
+)
+
+# Downstream dependencies: supabase (table/rpc/auth), openai, core_service
+DEPENDENCY_LATENCY = Histogram(
+    'dependency_request_duration_seconds',
+    'Downstream call latency by dependency, target and outcome',
+    ['dependency', 'target', 'operation', 'outcome'],
+    buckets=FAST_LATENCY_BUCKETS
+)
+DEPENDENCY_IN_FLIGHT = Gauge(
+    'dependency_requests_in_flight',
+    'Downstream calls currently waiting on a response',
+    ['dependency'],
+    multiprocess_mode='livesum'
+)
+
+# Server-Sent Event relays (/api/core/*/stream)
+STREAM_FIRST_TOKEN = Histogram(
+    'stream_first_token_seconds',
+    'Time from the start of a streaming request to the first token sent to the client',
+    ['route'],
+    buckets=FAST_LATENCY_BUCKETS
+)
+
+# Whisper transcription stages: upload, pass1 (auto-detect), pass2 (Chinese), select
+WHISPER_STAGE_LATENCY = Histogram(
+    'whisper_stage_duration_seconds',
+    'Time spent in each stage of /api/whisper',
+    ['stage'],
+    buckets=FAST_LATENCY_BUCKETS
+)
+
+# /api/entries/process stages: upload, transcribe, tags, emoji, emotion, save, reply, profile
+ENTRY_PIPELINE_STAGE_LATENCY = Histogram(
+    'entry_pipeline_stage_duration_seconds',
+    'Time spent in each stage of /api/entries/process',
+    ['stage'],
+    buckets=FAST_LATENCY_BUCKETS
+)
+
+# Hit ratio = hits / (hits + misses) per cache
+CACHE_REQUESTS = Counter(
+    'cache_requests_total',
+    'Cache lookups by cache and result (hit or miss)',
+    ['cache', 'result']
+)
+
+# OpenAI gateway
+LLM_LATENCY = Histogram(
+    'llm_request_duration_seconds',
+    'OpenAI request latency including retries',
+    ['caller', 'model', 'operation', 'outcome'],
+    buckets=LATENCY_BUCKETS
+)
+LLM_TOKENS = Histogram(
+    'llm_request_tokens',
+    'Tokens used per OpenAI request',
+    ['caller', 'model', 'kind'],
+    buckets=(10, 50, 100, 250, 500, 1000, 2000, 4000, 8000)
+)
+LLM_COST = Histogram(
+    'llm_request_cost_usd',
+    'Estimated cost per OpenAI request in USD',
+    ['caller', 'model'],
+    buckets=(0.00001, 0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1)
+)
+SINGLEFLIGHT_CALLS = Counter(
+    'singleflight_calls_total',
+    'Enrichment calls by single-flight role (leader computed, followers shared)',
+    ['operation', 'role']
+)
+IDEMPOTENCY_REQUESTS = Counter(
+    'idempotency_requests_total',
+    'Writes carrying an Idempotency-Key, by result (stored, replayed, conflict, mismatch, bypassed)',
+    ['result']
+)
+LLM_RETRIES = Counter(
+    'llm_request_retries_total',
+    'OpenAI requests retried after a 429, 5xx, timeout or connection error',
+    ['caller', 'model']
+)
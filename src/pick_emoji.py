@@ -1,22 +1,41 @@
 from flask import request, jsonify
-from supabase import Client
-import openai
-import os
 import logging
 from datetime import datetime, timedelta
-from .config import OPENAI_CHAT_MODEL
+from typing import TYPE_CHECKING, Any, Dict, Optional, Tuple
+from .config import ENRICHMENT_ASYNC
+from .db import VoiceEntriesDB
+from .enrichment import enqueue_enrichment
+from .fast_classifier import pick_emoji_fast, is_confident
+from .llm import chat_completion
+from .metrics import CACHE_REQUESTS
+from .singleflight import single_flight
+
+if TYPE_CHECKING:
+    from supabase import Client
 
 logger = logging.getLogger(__name__)
 
+entries_db = VoiceEntriesDB()
+
 
 ##Emojis add fun to the response, but wondering if it's efficient to do it like this or ask at a different stage, like when we generate the insights.
 ##Doing it separately may skew the answer away from the original interpretation (that coul be a good thing too, but we must test...)
 ##This is another place where I think it could be interesting to test few-shot prompting to enhance results.
 def pick_funky_emoji(transcript: str):
     """Generate a funky emoji based on transcript content"""
-    try:
-        openai.api_key = os.getenv('OPENAI_API_KEY')
+    # Clear-cut tones get an emoji locally; ambiguous ones go to GPT
+    fast = pick_emoji_fast(transcript)
+    confident = bool(fast['emoji']) and is_confident(fast)
+    CACHE_REQUESTS.labels('fast_classifier', 'hit' if confident else 'miss').inc()
+    if confident:
+        return {
+            "emoji": fast['emoji'],
+            "source": "local_classifier_v1",
+            "tier": fast['tier'],
+            "confidence": fast['confidence']
+        }
         
+    try:
         prompt = f"""
         Based on this transcript, pick ONE emoji that best represents the mood, emotion, or theme.
         Choose a fun, expressive emoji that captures the essence of what they're saying.
@@ -26,8 +45,8 @@ def pick_funky_emoji(transcript: str):
         Respond with only the emoji character, no text or explanation.
         """
         
-        response = openai.chat.completions.create(
-            model=OPENAI_CHAT_MODEL,
+        response = chat_completion(
+            'pick_emoji',
             messages=[{"role": "user", "content": prompt}],
             temperature=0.7,
             max_tokens=10
@@ -41,103 +60,152 @@ def pick_funky_emoji(transcript: str):
             
         return {
             "emoji": emoji,
-            "source": "funky_emoji_v1"
+            "source": "funky_emoji_v1",
+            "tier": "gpt",
+            "confidence": None
         }
         
     except Exception as e:
         logger.error(f"Error in pick_funky_emoji: {e}")
         return {
             "emoji": "😊",
-            "source": "fallback"
+            "source": "fallback",
+            "tier": "fallback",
+            "confidence": None
         }
 
 def get_local_timestamp():
     """Get current timestamp in local timezone"""
     return datetime.now().isoformat()
 
-##Check if this same emoji has been used recently...
-def pick_emoji_endpoint(supabase: Client, user_id: str):
-    """Handle emoji generation for entries"""
-    try:
-        data = request.get_json()
-        transcript = data.get('transcript')
-        entry_id = data.get('entryId')
+def check_entry(supabase: 'Client', user_id: str, entry_id: str) -> Tuple[Optional[Dict[str, Any]], Optional[Tuple[Dict[str, Any], int]]]:
+    """
+    Load an entry that still needs an emoji.
+
+    Returns:
+        (entry, None), or (None, (payload, status)) when the entry is missing,
+        not the user's, already has an emoji or is older than 7 days
+    """
+    # Fetch entry to enforce 7-day limit & avoid duplicates
+    entry_result = supabase.table('voice_entries').select('id, transcript_raw, transcript_user, entry_emoji, created_at').eq('id', entry_id).eq('user_id', user_id).single().execute()
+    
+    # Check for errors in the result
+    if hasattr(entry_result, 'error') and entry_result.error:
+        logger.error(f'Failed to fetch entry meta: {entry_result.error}')
+        return None, ({'error': 'Entry not found or access denied'}, 404)
         
-        if not entry_id or not isinstance(entry_id, str):
-            return jsonify({'error': 'Missing or invalid entryId'}), 400
-            
-        # Fetch entry to enforce 7-day limit & avoid duplicates
-        entry_result = supabase.table('voice_entries').select('id, transcript_raw, transcript_user, entry_emoji, created_at').eq('id', entry_id).eq('user_id', user_id).single().execute()
+    entry_meta = entry_result.data
+    
+    # Skip if emoji already exists to prevent re-compute
+    if entry_meta.get('entry_emoji'):
+        logger.info('Emoji already exists, skipping GPT call')
+        return None, ({
+            'success': True,
+            'emoji': entry_meta['entry_emoji'],
+            'source': 'funky_emoji_v1',
+            'skipped': True
+        }, 200)
         
-        # Check for errors in the result
-        if hasattr(entry_result, 'error') and entry_result.error:
-            logger.error(f'Failed to fetch entry meta: {entry_result.error}')
-            return jsonify({'error': 'Entry not found or access denied'}), 404
-            
-        entry_meta = entry_result.data
+    # 7-day limit check
+    created_at = datetime.fromisoformat(entry_meta['created_at'].replace('Z', '+00:00'))
+    now = datetime.now().replace(tzinfo=created_at.tzinfo)
+    seven_days_ago = now - timedelta(days=7)
+    
+    if created_at < seven_days_ago:
+        logger.info('Entry older than 7 days, skipping emoji generation')
+        return None, ({'success': False, 'reason': 'older_than_7_days'}, 200)
         
-        # Skip if emoji already exists to prevent re-compute
-        if entry_meta.get('entry_emoji'):
-            logger.info('Emoji already exists, skipping GPT call')
-            return jsonify({
-                'success': True,
-                'emoji': entry_meta['entry_emoji'],
-                'source': 'funky_emoji_v1',
-                'skipped': True
-            })
-            
-        # Decide which transcript to use
-        transcript_to_use = None
-        if transcript and isinstance(transcript, str) and transcript.strip():
-            transcript_to_use = transcript.strip()
-        elif entry_meta.get('transcript_user') and isinstance(entry_meta['transcript_user'], str):
-            transcript_to_use = entry_meta['transcript_user']
-            
-        if not transcript_to_use:
-            return jsonify({'error': 'Transcript not found for entry'}), 400
-            
-        # 7-day limit check
-        created_at = datetime.fromisoformat(entry_meta['created_at'].replace('Z', '+00:00'))
-        now = datetime.now().replace(tzinfo=created_at.tzinfo)
-        seven_days_ago = now - timedelta(days=7)
-        
-        if created_at < seven_days_ago:
-            logger.info('Entry older than 7 days, skipping emoji generation')
-            return jsonify({'success': False, 'reason': 'older_than_7_days'})
-            
-        # Get emoji from GPT
-        emoji_result = pick_funky_emoji(transcript_to_use)
-        logger.info(f'Funky emoji selected: {emoji_result}')
+    return entry_meta, None
+
+def pick_emoji_for_entry(supabase: 'Client', user_id: str, entry_id: str, transcript: Optional[str]) -> Tuple[Dict[str, Any], int]:
+    """Pick and persist an emoji for one entry, returning (payload, status)"""
+    entry_meta, response = check_entry(supabase, user_id, entry_id)
+    if response is not None:
+        return response
+        
+    # Decide which transcript to use
+    transcript_to_use = None
+    if transcript and isinstance(transcript, str) and transcript.strip():
+        transcript_to_use = transcript.strip()
+    elif entry_meta.get('transcript_user') and isinstance(entry_meta['transcript_user'], str):
+        transcript_to_use = entry_meta['transcript_user']
+        
+    if not transcript_to_use:
+        return {'error': 'Transcript not found for entry'}, 400
         
-        # Update entry with emoji
-        update_result = supabase.table('voice_entries').update({
+    # Get emoji from GPT
+    emoji_result = pick_funky_emoji(transcript_to_use)
+    logger.info(f'Funky emoji selected: {emoji_result}')
+    
+    # Update entry with emoji, unless another request stored one since the read above
+    try:
+        stored = entries_db.patch_entry(entry_id, user_id, fields={
+            'updated_at': get_local_timestamp()
+        }, if_null={
             'entry_emoji': emoji_result['emoji'],
             'emoji_source': emoji_result['source'],
             'emoji_log': {
                 'timestamp': datetime.now().isoformat(),
                 'emoji': emoji_result['emoji'],
                 'source': emoji_result['source'],
-                'transcript_length': len(transcript)
-            },
-            'updated_at': get_local_timestamp()
-        }).eq('id', entry_id).eq('user_id', user_id).execute()
+                'transcript_length': len(transcript_to_use)
+            }
+        }, returning=True)
+    except Exception as e:
+        logger.error(f'Failed to update entry with emoji: {e}')
+        error_message = str(e)
         
-        # Check for errors in the result
-        if hasattr(update_result, 'error') and update_result.error:
-            logger.error(f'Failed to update entry with emoji: {update_result.error}')
-            error_message = str(update_result.error)
+        # Handle missing column error gracefully
+        if 'column' in error_message and 'does not exist' in error_message:
+            logger.warning('Database missing columns for emoji, returning result without DB update')
+        else:
+            return {'error': 'Failed to save emoji to database'}, 500
+    else:
+        if stored and stored.get('entry_emoji') != emoji_result['emoji']:
+            return {
+                'success': True,
+                'emoji': stored['entry_emoji'],
+                'source': stored.get('emoji_source'),
+                'skipped': True
+            }, 200
             
-            # Handle missing column error gracefully
-            if 'column' in error_message and 'does not exist' in error_message:
-                logger.warning('Database missing columns for emoji, returning result without DB update')
-            else:
-                return jsonify({'error': 'Failed to save emoji to database'}), 500
-                
-        return jsonify({
-            'success': True,
-            'emoji': emoji_result['emoji'],
-            'source': emoji_result['source']
-        })
+    return {
+        'success': True,
+        'emoji': emoji_result['emoji'],
+        'source': emoji_result['source'],
+        'tier': emoji_result['tier'],
+        'confidence': emoji_result['confidence']
+    }, 200
+
+##Check if this same emoji has been used recently...
+def pick_emoji_endpoint(supabase: 'Client', user_id: str):
+    """Handle emoji generation for entries"""
+    try:
+        data = request.get_json()
+        transcript = data.get('transcript')
+        entry_id = data.get('entryId')
+        
+        if not entry_id or not isinstance(entry_id, str):
+            return jsonify({'error': 'Missing or invalid entryId'}), 400
+            
+        # Clients that poll for results can have the work done off the request path
+        if data.get('async') and ENRICHMENT_ASYNC:
+            entry_meta, response = check_entry(supabase, user_id, entry_id)
+            if response is not None:
+                payload, status = response
+                return jsonify(payload), status
+            queued = enqueue_enrichment(user_id, entry_id, ['emoji'])
+            if queued is not None:
+                return jsonify({'success': True, 'queued': queued, 'entryId': entry_id}), 202
+            
+        # Concurrent duplicates for the same entry share one GPT call and one write
+        payload, status = single_flight(
+            'pick_emoji', user_id, entry_id,
+            lambda: pick_emoji_for_entry(supabase, user_id, entry_id, transcript),
+            share=lambda result: result[1] < 500,
+            payload=transcript if isinstance(transcript, str) else ''
+        )
+        return jsonify(payload), status
         
     except Exception as e:
         logger.error(f'Pick Emoji API error: {e}')
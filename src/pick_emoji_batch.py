@@ -1,57 +1,25 @@
 from flask import request, jsonify
-from supabase import Client
-import openai
-import os
+from typing import TYPE_CHECKING
 import logging
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from .config import OPENAI_CHAT_MODEL
+from .config import EMOJI_BATCH_CONCURRENCY
+from .db import VoiceEntriesDB
+from .pick_emoji import pick_funky_emoji
+from .tracing import in_current_context
+
+if TYPE_CHECKING:
+    from supabase import Client
 
 logger = logging.getLogger(__name__)
 
-def pick_funky_emoji(transcript: str):
-    """Generate a funky emoji based on transcript content"""
-    try:
-        openai.api_key = os.getenv('OPENAI_API_KEY')
-        
-        prompt = f"""
-        Based on this transcript, pick ONE emoji that best represents the mood, emotion, or theme.
-        Choose a fun, expressive emoji that captures the essence of what they're saying.
-        
-        Transcript: "{transcript}"
-        
-        Respond with only the emoji character, no text or explanation.
-        """
-        
-        response = openai.chat.completions.create(
-            model=OPENAI_CHAT_MODEL,
-            messages=[{"role": "user", "content": prompt}],
-            temperature=0.7,
-            max_tokens=10
-        )
-        
-        emoji = response.choices[0].message.content.strip()
-        
-        # Validate that it's actually an emoji
-        if len(emoji) > 4:  # Most emojis are 1-4 characters
-            emoji = "😊"  # Fallback emoji
-            
-        return {
-            "emoji": emoji,
-            "source": "funky_emoji_v1"
-        }
-        
-    except Exception as e:
-        logger.error(f"Error in pick_funky_emoji: {e}")
-        return {
-            "emoji": "😊",
-            "source": "fallback"
-        }
+entries_db = VoiceEntriesDB()
 
 def get_local_timestamp():
     """Get current timestamp in local timezone"""
     return datetime.now().isoformat()
 
-def pick_emoji_batch_endpoint(supabase: Client, user_id: str):
+def pick_emoji_batch_endpoint(supabase: 'Client', user_id: str):
     """Handle batch emoji generation for multiple entries"""
     try:
         data = request.get_json() or {}
@@ -63,8 +31,9 @@ def pick_emoji_batch_endpoint(supabase: Client, user_id: str):
         else:
             limit = 15
             
-        # Fetch latest entries (limit) regardless of emoji
-        fetch_result = supabase.table('voice_entries').select('id, transcript_raw, transcript_user, entry_emoji, created_at').eq('user_id', user_id).is_('entry_emoji', 'null').limit(limit).execute()
+        # Fetch latest entries without emoji from the 7-day window only
+        since = (datetime.now() - timedelta(days=7)).isoformat()
+        fetch_result = supabase.table('voice_entries').select('id, user_id, transcript_raw, transcript_user, entry_emoji, created_at').eq('user_id', user_id).is_('entry_emoji', 'null').gte('created_at', since).order('created_at', desc=True).limit(limit).execute()
         
         # Check for errors in the result
         if hasattr(fetch_result, 'error') and fetch_result.error:
@@ -76,58 +45,71 @@ def pick_emoji_batch_endpoint(supabase: Client, user_id: str):
         if not entries:
             return jsonify({'processed': 0, 'message': 'No entries need emoji'})
             
-        processed = 0
-        results = []
+        results = {}
+        to_generate = []
         
         for entry in entries:
             # Skip if emoji already exists
             if entry.get('entry_emoji'):
-                results.append({'id': entry['id'], 'skipped': 'already_has_emoji'})
+                results[entry['id']] = {'id': entry['id'], 'skipped': 'already_has_emoji'}
                 continue
                 
-            # 7-day window check
+            # 7-day window check (guards against client timestamps with another offset)
             created_at = datetime.fromisoformat(entry['created_at'].replace('Z', '+00:00'))
             now = datetime.now().replace(tzinfo=created_at.tzinfo)
             if now - created_at > timedelta(days=7):
-                results.append({'id': entry['id'], 'skipped': 'older_than_7_days'})
+                results[entry['id']] = {'id': entry['id'], 'skipped': 'older_than_7_days'}
                 continue
                 
-            transcript = entry.get('transcript_user', '')
-            if not transcript:
-                results.append({'id': entry['id'], 'skipped': 'no_transcript'})
+            if not entry.get('transcript_user', ''):
+                results[entry['id']] = {'id': entry['id'], 'skipped': 'no_transcript'}
                 continue
                 
+            to_generate.append(entry)
+            
+        # Fan out GPT calls with bounded concurrency; each result is written only
+        # if the entry still has no emoji, so one stored meanwhile by /api/pick-emoji wins
+        def generate(entry):
             try:
-                emoji_result = pick_funky_emoji(transcript)
-                
-                update_result = supabase.table('voice_entries').update({
+                emoji_result = pick_funky_emoji(entry['transcript_user'])
+                stored = entries_db.patch_entry(entry['id'], user_id, fields={
+                    'updated_at': get_local_timestamp()
+                }, if_null={
                     'entry_emoji': emoji_result['emoji'],
                     'emoji_source': emoji_result['source'],
                     'emoji_log': {
                         'timestamp': datetime.now().isoformat(),
                         'emoji': emoji_result['emoji'],
                         'source': 'batch_generation',
-                        'transcript_length': len(transcript)
-                    },
-                    'updated_at': get_local_timestamp()
-                }).eq('id', entry['id']).eq('user_id', user_id).execute()
-                
-                # Check for errors in the result
-                if hasattr(update_result, 'error') and update_result.error:
-                    error_message = str(update_result.error) if update_result.error else 'Database update failed'
-                    results.append({'id': entry['id'], 'error': error_message})
-                    logger.error(f'Failed to update entry {entry["id"]}: {error_message}')
-                else:
-                    processed += 1
-                    results.append({'id': entry['id'], 'emoji': emoji_result['emoji']})
-                    
+                        'transcript_length': len(entry['transcript_user'])
+                    }
+                }, returning=True)
+                return entry, emoji_result, stored, None
             except Exception as e:
-                results.append({'id': entry['id'], 'error': str(e)})
+                return entry, None, None, e
+                
+        generated = []
+        if to_generate:
+            with ThreadPoolExecutor(max_workers=min(EMOJI_BATCH_CONCURRENCY, len(to_generate))) as executor:
+                generated = list(executor.map(in_current_context(generate), to_generate))
+                
+        processed = 0
+        for entry, emoji_result, stored, error in generated:
+            if error is not None:
+                logger.error(f'Failed to update entry {entry["id"]}: {error}')
+                results[entry['id']] = {'id': entry['id'], 'error': str(error)}
+            elif stored is None:
+                results[entry['id']] = {'id': entry['id'], 'skipped': 'not_found'}
+            elif stored.get('entry_emoji') != emoji_result['emoji']:
+                results[entry['id']] = {'id': entry['id'], 'skipped': 'already_has_emoji'}
+            else:
+                processed += 1
+                results[entry['id']] = {'id': entry['id'], 'emoji': emoji_result['emoji']}
                 
         return jsonify({
             'processed': processed,
             'total': len(entries),
-            'results': results
+            'results': [results[entry['id']] for entry in entries]
         })
         
     except Exception as e:
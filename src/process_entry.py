@@ -0,0 +1,217 @@
+"""
+One-call processing of a new recording: POST /api/entries/process.
+
+Replaces the client's /api/whisper -> /api/save-entry -> /api/analyze ->
+/api/pick-emoji -> /api/core/process-transcript sequence with one request.
+Once the audio is transcribed, tags, emoji, emotion score and the core-service
+reply run concurrently. The entry is inserted once with all of its fields while
+the reply is still being generated, and the profile is updated when it arrives.
+"""
+
+import asyncio
+import logging
+import os
+import tempfile
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Tuple
+
+from flask import request, jsonify
+
+from .config import ENRICHMENT_ASYNC
+from .core_pipeline import apply_profile_update, call_core_service
+from .db import VoiceEntriesDB
+from .enrichment import enqueue_enrichment, enrich_entry
+from .json_provider import loads
+from .llm import request_deadline
+from .metrics import ENTRY_PIPELINE_STAGE_LATENCY
+from .profile_manager import fetch_profile
+from .save_entry import build_entry
+from .tracing import in_current_context
+from .whisper import enhanced_transcription
+
+logger = logging.getLogger(__name__)
+
+entries_db = VoiceEntriesDB()
+
+# Computed inline; the embedding is left to the background worker
+INLINE_KINDS = ('tags', 'emoji', 'emotion')
+
+
+class StageTimings:
+    """Milliseconds per pipeline stage, also observed in entry_pipeline_stage_duration_seconds."""
+
+    def __init__(self):
+        self.started = time.monotonic()
+        self.stages: Dict[str, float] = {}
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            elapsed = time.monotonic() - started
+            self.stages[name] = round(elapsed * 1000, 1)
+            ENTRY_PIPELINE_STAGE_LATENCY.labels(name).observe(elapsed)
+
+    def run(self, name: str, fn: Callable, *args) -> Any:
+        with self.stage(name):
+            return fn(*args)
+
+    def summary(self) -> Dict[str, float]:
+        return {**self.stages, 'total': round((time.monotonic() - self.started) * 1000, 1)}
+
+
+def _reply(user_id: str, transcript: str, meta: Dict[str, Any]) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    """Load the profile and ask the core service for a reply; returns (profile, result)."""
+    profile = asyncio.run(fetch_profile(user_id))
+    # Only the time the transcription left of the request's budget, so the worker is not killed
+    result = call_core_service('/api/process-transcript', {
+        'user_id': user_id,
+        'transcript': transcript,
+        'meta': meta,
+        'profile': profile
+    }, timeout=max(request_deadline() - time.monotonic(), 1))
+    return profile, result
+
+
+def process_recording(user_id: str, audio_path: str, fields: Dict[str, Any],
+                      meta: Dict[str, Any], timings: StageTimings) -> Tuple[Dict[str, Any], int]:
+    """
+    Transcribe, enrich, save and reply to one recording.
+
+    Args:
+        user_id: Owner of the new entry
+        audio_path: Uploaded audio file
+        fields: Optional save-entry fields (audio_duration, tags_user, category, client_timestamp)
+        meta: Metadata forwarded to the core service
+        timings: Collects the per-stage breakdown
+
+    Returns:
+        (payload, status)
+    """
+    transcription = timings.run('transcribe', enhanced_transcription, audio_path)
+    transcript = transcription['text']
+
+    entry_id = str(uuid.uuid4())
+    row, error = build_entry({
+        **fields,
+        'transcript_raw': transcript,
+        'transcript_user': transcript,
+        'language_detected': transcription['primaryLanguage'],
+        'language_rendered': transcription['renderingLanguage'],
+        'audio_duration': fields.get('audio_duration') or transcription['duration']
+    }, user_id, entry_id)
+    if error:
+        return {'error': error, 'timings_ms': timings.summary()}, 400
+
+    meta = {**meta, 'entry_id': entry_id}
+    entry = {'transcript_raw': transcript}
+    failed: List[str] = []
+
+    with ThreadPoolExecutor(max_workers=len(INLINE_KINDS) + 1) as executor:
+        reply_future = executor.submit(in_current_context(timings.run), 'reply', _reply, user_id, transcript, meta)
+        enrich_futures = {
+            kind: executor.submit(in_current_context(timings.run), kind, enrich_entry, entry, [kind])
+            for kind in INLINE_KINDS
+        }
+
+        for kind, future in enrich_futures.items():
+            try:
+                outcome = future.result()
+            except Exception as e:
+                logger.error(f'Entry pipeline {kind} failed for {entry_id}: {e}')
+                failed.append(kind)
+                continue
+            row.update(outcome['updates'])
+            failed.extend(outcome['failed'])
+
+        # Written while the core service is still generating the reply
+        with timings.stage('save'):
+            inserted = entries_db.insert_entries([row])
+
+        try:
+            profile, result = reply_future.result()
+        except Exception as e:
+            profile, result = None, {'success': False, 'error': str(e)}
+
+    reply: Dict[str, Any] = {'success': bool(result.get('success'))}
+    profile_updated = False
+    if reply['success']:
+        reply.update(response_text=result.get('response_text', ''), debug_log=result.get('debug_log', []))
+        with timings.stage('profile'):
+            try:
+                profile_updated = apply_profile_update(user_id, profile, result, transcript, meta)
+            except Exception as e:
+                logger.error(f'Entry pipeline profile update failed for {entry_id}: {e}')
+    else:
+        # The entry is saved; the client can ask for the reply again via /api/core/process-transcript
+        reply['error'] = result.get('error', 'Core service failed')
+        logger.error(f'Entry pipeline reply failed for {entry_id}: {reply["error"]}')
+
+    # Embedding (and anything that fell back) is finished by the background worker
+    queued = None
+    if ENRICHMENT_ASYNC:
+        queued = enqueue_enrichment(user_id, entry_id, ['embedding'] + failed)
+
+    return {
+        'success': True,
+        'entry': inserted[0] if inserted else row,
+        'transcription': {
+            'text': transcript,
+            'language': transcription['primaryLanguage'],
+            'language_rendered': transcription['renderingLanguage'],
+            'strategy': transcription['strategy']
+        },
+        'reply': reply,
+        'profile_updated': profile_updated,
+        'enrichment': {'queued': queued or [], 'async': queued is not None},
+        'timings_ms': timings.summary()
+    }, 200
+
+
+def process_entry_endpoint(user_id: str):
+    """Handle a recording upload with optional save-entry fields as form fields"""
+    try:
+        timings = StageTimings()
+
+        file = request.files.get('file')
+        if file is None or file.filename == '':
+            return jsonify({'error': 'Missing audio file'}), 400
+
+        fields: Dict[str, Any] = {
+            'tags_user': request.form.getlist('tags_user'),
+            'category': request.form.get('category', 'uncategorized'),
+            'client_timestamp': request.form.get('client_timestamp'),
+            'audio_duration': request.form.get('audio_duration', type=float)
+        }
+        try:
+            meta = loads(request.form.get('meta') or '{}')
+        except ValueError:
+            meta = None
+        if not isinstance(meta, dict):
+            return jsonify({'error': 'meta must be a JSON object'}), 400
+
+        # Reject clips the client already knows are too short before paying for Whisper
+        if fields['audio_duration'] is not None and fields['audio_duration'] < 1:
+            return jsonify({'error': 'Recording too short (less than 1 second).'}), 400
+
+        with timings.stage('upload'):
+            with tempfile.NamedTemporaryFile(delete=False, suffix='.wav') as temp_file:
+                file.save(temp_file.name)
+                temp_file_path = temp_file.name
+
+        try:
+            payload, status = process_recording(user_id, temp_file_path, fields, meta, timings)
+        finally:
+            os.unlink(temp_file_path)
+
+        logger.info(f'Entry pipeline for user {user_id}: {payload["timings_ms"]}')
+        return jsonify(payload), status
+
+    except Exception as e:
+        logger.error(f'Entry pipeline error: {e}')
+        return jsonify({'error': 'Failed to process entry', 'details': str(e)}), 500
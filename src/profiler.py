@@ -0,0 +1,287 @@
+"""
+Low-overhead sampling profiler for running gunicorn workers.
+
+A native thread snapshots sys._current_frames() every few milliseconds and
+counts collapsed stacks; nothing is hooked into the interpreter (no
+sys.setprofile), so the profiled code runs at full speed between samples.
+Output is one "frame;frame;frame count" line per stack, which flamegraph.pl,
+speedscope and inferno read directly.
+
+Profiles can be started by:
+- POST /api/admin/profile (this worker, or every worker with all_workers)
+- kill -USR2 <worker pid> (handler installed in post_worker_init, after
+  gunicorn resets worker signals; never send USR2 to the master)
+- an X-Profile: 1 header on a single request from an admin caller
+
+all_workers only signals workers that registered themselves in
+{PROFILE_DIR}/workers/ once their handler was installed, so a worker that is
+still booting (where USR2 would kill it) or a process that is not a gunicorn
+worker is never signalled.
+
+Under gevent all greenlets share one OS thread, so a per-request profile
+also contains whatever other greenlets ran during that request.
+"""
+
+import json
+import logging
+import os
+import signal
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from flask import Flask, g, request
+
+from .worker_mode import native as _native
+from .config import (
+    PROFILE_DIR, PROFILE_INTERVAL_MS, PROFILE_MAX_SECONDS,
+    PROFILE_SIGNAL_SECONDS, PROFILE_REQUEST_INTERVAL_MS
+)
+
+logger = logging.getLogger(__name__)
+
+PROFILE_HEADER = 'X-Profile'
+PROFILE_FILE_HEADER = 'X-Profile-File'
+PROFILE_SIGNAL = signal.SIGUSR2
+# Written by the admin endpoint so signalled workers use the requested duration
+SIGNAL_REQUEST_FILE = '.signal-request.json'
+SIGNAL_REQUEST_MAX_AGE = 10
+WORKERS_DIR = 'workers'
+
+
+def _spawn(fn) -> None:
+    """Run fn in a regular thread (a greenlet under gevent) so it can log and block."""
+    try:
+        from gevent import monkey
+        if monkey.is_module_patched('threading'):
+            import gevent
+            gevent.spawn(fn)
+            return
+    except ImportError:
+        pass
+    threading.Thread(target=fn, daemon=True).start()
+
+
+def _frame_name(frame) -> str:
+    return f"{frame.f_globals.get('__name__', '?')}:{frame.f_code.co_name}"
+
+
+class StackSampler:
+    """Counts collapsed stacks of one or all threads until stopped."""
+
+    def __init__(self, interval: float, thread_id: Optional[int] = None):
+        self.interval = interval
+        self.thread_id = thread_id
+        self.stacks: Counter = Counter()
+        self.exclude = set()
+        self.samples = 0
+        self.started_at = time.time()
+        self._stop = False
+        # Held until sampling ends; a native lock so it works under gevent
+        self._done = _native('_thread', 'allocate_lock')()
+        self._done.acquire()
+
+    def start(self, duration: Optional[float] = None) -> 'StackSampler':
+        self._deadline = time.monotonic() + duration if duration else None
+        _native('_thread', 'start_new_thread')(self._run, ())
+        return self
+
+    def _run(self) -> None:
+        sleep = _native('time', 'sleep')
+        own_id = _native('_thread', 'get_ident')()
+        try:
+            while not self._stop and (self._deadline is None or time.monotonic() < self._deadline):
+                for thread_id, frame in sys._current_frames().items():
+                    if thread_id == own_id or thread_id in self.exclude or (
+                            self.thread_id is not None and thread_id != self.thread_id):
+                        continue
+                    stack = []
+                    while frame is not None:
+                        stack.append(_frame_name(frame))
+                        frame = frame.f_back
+                    self.stacks[';'.join(reversed(stack))] += 1
+                self.samples += 1
+                sleep(self.interval)
+        finally:
+            self._done.release()
+
+    def stop(self, timeout: float = 1.0) -> None:
+        self._stop = True
+        self.wait(timeout)
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        if not self._done.acquire(timeout=-1 if timeout is None else timeout):
+            return False
+        self._done.release()
+        return True
+
+    def write(self, kind: str) -> str:
+        """Write collapsed stacks to PROFILE_DIR and return the file name."""
+        os.makedirs(PROFILE_DIR, exist_ok=True)
+        stamp = datetime.fromtimestamp(self.started_at).strftime('%Y%m%dT%H%M%S')
+        name = f'{kind}-{os.getpid()}-{stamp}-{int(self.started_at * 1000) % 1000:03d}.collapsed'
+        with open(os.path.join(PROFILE_DIR, name), 'w') as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f'{stack} {count}\n')
+        return name
+
+
+_active_lock = threading.Lock()
+_active: Optional[StackSampler] = None
+
+
+def start_worker_profile(seconds: float, interval_ms: float = PROFILE_INTERVAL_MS) -> Optional[Dict]:
+    """
+    Profile every thread of this worker for `seconds` in the background.
+
+    Returns:
+        Dict with pid, seconds and interval_ms, or None if this worker is
+        already being profiled
+    """
+    global _active
+    seconds = min(max(seconds, 0.1), PROFILE_MAX_SECONDS)
+    with _active_lock:
+        if _active is not None:
+            return None
+        sampler = _active = StackSampler(interval_ms / 1000).start(seconds)
+
+    def finish():
+        global _active
+        sampler.exclude.add(threading.get_ident())
+        while not sampler.wait(0):
+            time.sleep(0.05)
+        name = sampler.write('worker')
+        with _active_lock:
+            _active = None
+        logger.info(f'Profile of worker {os.getpid()} written to {name} ({sampler.samples} samples)')
+
+    _spawn(finish)
+    return {'pid': os.getpid(), 'seconds': seconds, 'interval_ms': interval_ms}
+
+
+def _worker_file(pid: int) -> str:
+    return os.path.join(PROFILE_DIR, WORKERS_DIR, str(pid))
+
+
+def _parent_pid(pid: int) -> Optional[int]:
+    try:
+        with open(f'/proc/{pid}/stat') as f:
+            # The parent pid is the 2nd field after the parenthesised command name
+            return int(f.read().rsplit(')', 1)[1].split()[1])
+    except (OSError, IndexError, ValueError):
+        return None
+
+
+def unregister_worker(pid: int) -> None:
+    """Forget an exited worker; call from gunicorn's child_exit."""
+    try:
+        os.remove(_worker_file(pid))
+    except FileNotFoundError:
+        pass
+
+
+def signal_sibling_workers(seconds: float, interval_ms: float) -> List[int]:
+    """Ask every other registered worker of this gunicorn master to profile itself (Linux /proc)."""
+    master, me = os.getppid(), os.getpid()
+    directory = os.path.join(PROFILE_DIR, WORKERS_DIR)
+    if not os.path.exists(_worker_file(me)):
+        logger.warning(f'Process {me} is not a registered gunicorn worker; not signalling other processes')
+        return []
+
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    with open(os.path.join(PROFILE_DIR, SIGNAL_REQUEST_FILE), 'w') as f:
+        json.dump({'seconds': seconds, 'interval_ms': interval_ms, 'at': time.time()}, f)
+
+    signalled = []
+    for entry in os.listdir(directory):
+        if not entry.isdigit() or int(entry) == me:
+            continue
+        pid = int(entry)
+        try:
+            with open(_worker_file(pid)) as f:
+                registered_master = int(f.read())
+        except (OSError, ValueError):
+            continue
+        if registered_master != master:
+            continue
+        # A worker that died without child_exit may have left its pid for reuse
+        if _parent_pid(pid) != master:
+            unregister_worker(pid)
+            continue
+        try:
+            os.kill(pid, PROFILE_SIGNAL)
+            signalled.append(pid)
+        except OSError as e:
+            logger.warning(f'Could not signal worker {pid}: {e}')
+    return signalled
+
+
+def _start_signalled_profile() -> None:
+    seconds, interval_ms = PROFILE_SIGNAL_SECONDS, PROFILE_INTERVAL_MS
+    try:
+        with open(os.path.join(PROFILE_DIR, SIGNAL_REQUEST_FILE)) as f:
+            requested = json.load(f)
+        if time.time() - requested['at'] < SIGNAL_REQUEST_MAX_AGE:
+            seconds, interval_ms = requested['seconds'], requested['interval_ms']
+    except (OSError, ValueError, KeyError):
+        pass
+    if start_worker_profile(seconds, interval_ms) is None:
+        logger.warning(f'Worker {os.getpid()} is already being profiled')
+
+
+def _handle_profile_signal(signum, frame) -> None:
+    # Under gevent handlers run inside the event loop and must not block
+    _spawn(_start_signalled_profile)
+
+
+def ignore_profile_signal() -> None:
+    """Ignore SIGUSR2 in a new worker until its handler is installed; call from gunicorn's post_fork."""
+    signal.signal(PROFILE_SIGNAL, signal.SIG_IGN)
+
+
+def install_signal_handler() -> None:
+    """
+    Profile this worker on SIGUSR2 and register it for all_workers.
+
+    Call from gunicorn's post_worker_init; the worker is only registered once
+    the handler is in place.
+    """
+    signal.signal(PROFILE_SIGNAL, _handle_profile_signal)
+    os.makedirs(os.path.join(PROFILE_DIR, WORKERS_DIR), exist_ok=True)
+    with open(_worker_file(os.getpid()), 'w') as f:
+        f.write(str(os.getppid()))
+
+
+def list_profiles() -> List[Dict]:
+    if not os.path.isdir(PROFILE_DIR):
+        return []
+    profiles = []
+    for name in sorted(os.listdir(PROFILE_DIR), reverse=True):
+        if name.endswith('.collapsed'):
+            path = os.path.join(PROFILE_DIR, name)
+            profiles.append({'name': name, 'size': os.path.getsize(path), 'modified': os.path.getmtime(path)})
+    return profiles
+
+
+def init_app(app: Flask) -> None:
+    """Profile single requests that carry X-Profile: 1 from an admin caller."""
+    from .admin import is_admin_request
+
+    @app.before_request
+    def start_request_profile():
+        if request.headers.get(PROFILE_HEADER) != '1' or not is_admin_request():
+            return
+        g.request_profiler = StackSampler(
+            PROFILE_REQUEST_INTERVAL_MS / 1000, _native('_thread', 'get_ident')()
+        ).start(PROFILE_MAX_SECONDS)
+
+    @app.after_request
+    def finish_request_profile(response):
+        sampler = g.pop('request_profiler', None)
+        if sampler is not None:
+            sampler.stop()
+            response.headers[PROFILE_FILE_HEADER] = sampler.write('request')
+        return response
@@ -6,6 +6,8 @@ from flask import Blueprint, request, jsonify
 from typing import Dict, Any, Optional
 import json
 from .auth import require_auth
+from .db.versions import PROFILE
+from .http_cache import conditional_get
 from .db import ProfilesDB
 
 profiles_bp = Blueprint('profiles', __name__)
@@ -14,6 +16,7 @@ profiles_db = ProfilesDB()
 
 @profiles_bp.route('/api/profiles', methods=['GET'])
 @require_auth
+@conditional_get(PROFILE)
 def get_profile(user_id: str):
     """Get user profile."""
     try:
@@ -110,6 +113,7 @@ def delete_profile(user_id: str):
 
 @profiles_bp.route('/api/profiles/concepts', methods=['GET'])
 @require_auth
+@conditional_get(PROFILE)
 def get_concepts(user_id: str):
     """Get user profile concepts."""
     try:
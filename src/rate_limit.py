@@ -0,0 +1,155 @@
+"""
+Rate limiting.
+
+Requests are limited per authenticated user (per client IP when there is no
+valid token) with a sliding-window counter in Redis, so every gunicorn worker
+shares the same counters. Each route spends ROUTE_COSTS units of the budget,
+so one /api/whisper call costs as much as twenty cheap reads.
+
+Separately, OPENAI_RATE_LIMIT and OPENAI_TOKEN_LIMIT are global budgets
+shared by every web worker and Celery task, so bursts queue here instead of
+hitting OpenAI's quota. llm._call() takes a request slot before each attempt
+and charges the tokens it used afterwards.
+"""
+
+import logging
+import os
+import threading
+import time
+from typing import Optional
+
+from flask import Flask, request
+from flask_limiter import Limiter
+from flask_limiter.util import get_remote_address
+from limits import parse
+from limits.storage import storage_from_string
+from limits.strategies import SlidingWindowCounterRateLimiter
+
+from .auth import authenticated_user
+from .config import (
+    RATE_LIMIT_DEFAULT, RATE_LIMIT_STORAGE_URL, RATE_LIMIT_STRATEGY,
+    OPENAI_RATE_LIMIT, OPENAI_TOKEN_LIMIT
+)
+
+logger = logging.getLogger(__name__)
+
+# Budget units per request; routes not listed cost 1
+ROUTE_COSTS = {
+    '/api/entries/process': 30,
+    '/api/whisper': 20,
+    '/api/emotion-trend': 10,
+    '/api/pick-emoji-batch': 10,
+    '/api/entries/export': 10,
+    '/api/run': 5,
+    '/api/entries/bulk': 5,
+    '/api/empathy': 5,
+    '/api/core/process-transcript': 5,
+    '/api/core/process-transcript/stream': 5,
+    '/api/core/generate-reply': 5,
+    '/api/core/generate-reply/stream': 5,
+    '/api/core/generate-insight': 5,
+    '/api/analyze': 3,
+    '/api/pick-emoji': 3,
+    '/api/test-openai': 3,
+    '/api/test-tags': 3,
+    '/api/embeddings/search': 2,
+    '/api/entries/search': 2,
+    '/api/core/search-similar': 2,
+}
+
+# Endpoints that are never limited (load balancer and container health checks)
+EXEMPT_ENDPOINTS = frozenset({'health_check'})
+
+OPENAI_BUDGET_POLL_INTERVAL = 0.25
+
+
+def rate_limit_key() -> str:
+    """Limit authenticated callers by user ID, everyone else by client IP."""
+    user = authenticated_user()
+    if user is not None:
+        return f'user:{user.id}'
+    return f'ip:{get_remote_address()}'
+
+
+def route_cost() -> int:
+    rule = request.url_rule
+    return ROUTE_COSTS.get(rule.rule, 1) if rule is not None else 1
+
+
+def is_exempt() -> bool:
+    return request.method == 'OPTIONS' or request.endpoint in EXEMPT_ENDPOINTS
+
+
+def init_app(app: Flask) -> Limiter:
+    """Configure Flask-Limiter with per-user keys and weighted route costs."""
+    return Limiter(
+        app=app,
+        key_func=rate_limit_key,
+        default_limits=[RATE_LIMIT_DEFAULT],
+        default_limits_cost=route_cost,
+        default_limits_exempt_when=is_exempt,
+        storage_uri=RATE_LIMIT_STORAGE_URL,
+        strategy=RATE_LIMIT_STRATEGY,
+        headers_enabled=True,
+        key_prefix='ratelimit',
+        # Per-process limits while Redis is unreachable rather than failing requests
+        in_memory_fallback_enabled=True
+    )
+
+
+_budget_limiter: Optional[SlidingWindowCounterRateLimiter] = None
+_budget_pid: Optional[int] = None
+_budget_lock = threading.Lock()
+_request_budget = parse(OPENAI_RATE_LIMIT) if OPENAI_RATE_LIMIT else None
+_token_budget = parse(OPENAI_TOKEN_LIMIT) if OPENAI_TOKEN_LIMIT else None
+
+
+def _get_budget_limiter() -> SlidingWindowCounterRateLimiter:
+    """Process-wide limiter over the shared storage (reconnected after fork)."""
+    global _budget_limiter, _budget_pid
+    with _budget_lock:
+        if _budget_limiter is None or _budget_pid != os.getpid():
+            _budget_limiter = SlidingWindowCounterRateLimiter(storage_from_string(RATE_LIMIT_STORAGE_URL))
+            _budget_pid = os.getpid()
+    return _budget_limiter
+
+
+def acquire_openai_budget(model: str, deadline: float) -> bool:
+    """
+    Take one request from the global OpenAI budget, waiting until `deadline`
+    (a time.monotonic() value) for the window to free up.
+
+    Returns False if the budget stayed exhausted until the deadline. Fails
+    open when the rate-limit storage is unavailable.
+    """
+    if _request_budget is None and _token_budget is None:
+        return True
+
+    try:
+        limiter = _get_budget_limiter()
+        while True:
+            tokens_left = _token_budget is None or limiter.test(_token_budget, 'openai', 'tokens')
+            if tokens_left and (_request_budget is None or limiter.hit(_request_budget, 'openai', 'requests')):
+                return True
+            if time.monotonic() + OPENAI_BUDGET_POLL_INTERVAL >= deadline:
+                logger.warning(f'Global OpenAI budget exhausted, rejecting {model} call')
+                return False
+            time.sleep(OPENAI_BUDGET_POLL_INTERVAL)
+    except Exception as e:
+        logger.warning(f'OpenAI budget unavailable, allowing call: {e}')
+        return True
+
+
+def charge_openai_tokens(tokens: int) -> None:
+    """Charge tokens used by a completed call to the global token budget."""
+    if _token_budget is None or tokens <= 0:
+        return
+    try:
+        limiter = _get_budget_limiter()
+        if not limiter.hit(_token_budget, 'openai', 'tokens', cost=tokens):
+            # Over budget: use up what is left so the next calls wait
+            remaining = limiter.get_window_stats(_token_budget, 'openai', 'tokens').remaining
+            if remaining > 0:
+                limiter.hit(_token_budget, 'openai', 'tokens', cost=remaining)
+    except Exception as e:
+        logger.warning(f'Failed to charge {tokens} tokens to the OpenAI budget: {e}')
@@ -0,0 +1,41 @@
+"""
+Shared Redis connection used by the job queue, locks and caches.
+"""
+
+import logging
+import os
+from typing import Optional
+
+import redis
+
+from .config import REDIS_URL
+
+logger = logging.getLogger(__name__)
+
+_client: Optional[redis.Redis] = None
+_client_pid: Optional[int] = None
+
+
+def get_redis() -> Optional[redis.Redis]:
+    """
+    Get the process-wide Redis client.
+
+    Returns:
+        Redis client, or None when REDIS_URL is not configured
+    """
+    global _client, _client_pid
+
+    if not REDIS_URL:
+        return None
+
+    # Connection pools must not be shared across forked gunicorn workers
+    if _client is None or _client_pid != os.getpid():
+        _client = redis.Redis.from_url(
+            REDIS_URL,
+            socket_timeout=2,
+            socket_connect_timeout=2,
+            health_check_interval=30
+        )
+        _client_pid = os.getpid()
+
+    return _client
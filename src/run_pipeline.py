@@ -1,5 +1,6 @@
 from flask import request, jsonify
 import logging
+from .logging_setup import redact_transcript
 
 logger = logging.getLogger(__name__)
 
@@ -9,7 +10,7 @@ def run_pipeline(text: str, user_id: str):
         # This is a simplified version of the pipeline
         # In a real implementation, this would call the actual pipeline logic
         
-        logger.info(f'Running pipeline for user {user_id} with text: {text[:100]}...')
+        logger.info(f'Running pipeline for user {user_id} with text: {redact_transcript(text)}')
         
         # Mock pipeline result - replace with actual pipeline logic
         result = {
@@ -18,7 +19,7 @@ def run_pipeline(text: str, user_id: str):
             'success': True
         }
         
-        logger.info(f'Pipeline result: {result}')
+        logger.info(f'Pipeline result: entryId={result["entryId"]}')
         return result
         
     except Exception as e:
@@ -1,8 +1,16 @@
 from flask import request, jsonify
-from supabase import Client
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple
 import logging
 from datetime import datetime
 import uuid
+from .config import ENRICHMENT_ASYNC
+from .db.dashboard import record_entries
+from .db.versions import bump_version, ENTRIES
+from .enrichment import enqueue_enrichment
+from .logging_setup import redact
+
+if TYPE_CHECKING:
+    from supabase import Client
 
 logger = logging.getLogger(__name__)
 
@@ -10,53 +18,81 @@ def get_local_timestamp():
     """Get current timestamp in local timezone"""
     return datetime.now().isoformat()
 
-def save_entry_endpoint(supabase: Client, user_id: str):
+def build_entry(data: Dict[str, Any], user_id: str, entry_id: str) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+    """
+    Validate a save-entry payload and build the voice_entries row for it.
+    
+    Returns:
+        (row, None) for a valid payload, (None, error message) otherwise
+    """
+    # Extract fields from request
+    transcript_raw = data.get('transcript_raw')
+    transcript_user = data.get('transcript_user')
+    language_detected = data.get('language_detected')
+    language_rendered = data.get('language_rendered', 'en')
+    tags_model = data.get('tags_model', [])
+    tags_user = data.get('tags_user', [])
+    category = data.get('category', 'uncategorized')
+    audio_duration = data.get('audio_duration', 0)
+    client_timestamp = data.get('client_timestamp')
+    
+    # Use client supplied local time if provided, else fallback to server-local time
+    local_time = client_timestamp or get_local_timestamp()
+    
+    # Type checks, so one malformed item in a bulk request is reported rather than failing the batch
+    if isinstance(audio_duration, bool) or not isinstance(audio_duration, (int, float)):
+        return None, 'audio_duration must be a number.'
+    if transcript_raw is not None and not isinstance(transcript_raw, str):
+        return None, 'transcript_raw must be a string.'
+    for name, value in (('transcript_user', transcript_user), ('category', category), ('client_timestamp', client_timestamp)):
+        if value is not None and not isinstance(value, str):
+            return None, f'{name} must be a string.'
+    for name, tags in (('tags_model', tags_model), ('tags_user', tags_user)):
+        if not isinstance(tags, list) or not all(isinstance(tag, str) for tag in tags):
+            return None, f'{name} must be a list of strings.'
+    
+    # Basic validation
+    if audio_duration < 1:
+        return None, 'Recording too short (less than 1 second).'
+        
+    if not transcript_raw or transcript_raw.strip() == '':
+        return None, 'No speech detected in recording.'
+    
+    return {
+        'id': entry_id,
+        'user_id': user_id,
+        'transcript_raw': transcript_raw,
+        'transcript_user': transcript_user,
+        'language_detected': language_detected,
+        'language_rendered': language_rendered,
+        'tags_model': tags_model,
+        'tags_user': tags_user,
+        'category': category,
+        'audio_duration': audio_duration,
+        'created_at': local_time,
+        'updated_at': local_time
+    }, None
+
+
+def enrichment_kinds(entry: Dict[str, Any]) -> List[str]:
+    """Enrichment a newly saved entry needs; client-supplied model tags are kept."""
+    return ['emoji', 'emotion', 'embedding'] if entry.get('tags_model') else ['tags', 'emoji', 'emotion', 'embedding']
+
+
+def save_entry_endpoint(supabase: 'Client', user_id: str):
     """Handle saving voice entries to database"""
     try:
         data = request.get_json()
-        logger.info(f'Incoming request body: {data}')
-        logger.info(f'User authenticated: {user_id}')
-        
-        # Extract fields from request
-        transcript_raw = data.get('transcript_raw')
-        transcript_user = data.get('transcript_user')
-        language_detected = data.get('language_detected')
-        language_rendered = data.get('language_rendered', 'en')
-        tags_model = data.get('tags_model', [])
-        tags_user = data.get('tags_user', [])
-        category = data.get('category', 'uncategorized')
-        audio_duration = data.get('audio_duration', 0)
-        client_timestamp = data.get('client_timestamp')
-        
-        # Use client supplied local time if provided, else fallback to server-local time
-        local_time = client_timestamp or get_local_timestamp()
+        logger.debug(f'Save entry request from {user_id}: {redact(data)}')
         
-        # Basic validation
-        if audio_duration < 1:
-            return jsonify({'error': 'Recording too short (less than 1 second).'}), 400
-            
-        if not transcript_raw or transcript_raw.strip() == '':
-            return jsonify({'error': 'No speech detected in recording.'}), 400
-            
         # Generate unique ID for the entry
         entry_id = str(uuid.uuid4())
-            
-        # Insert entry into database
-        entry_data = {
-            'id': entry_id,
-            'user_id': user_id,
-            'transcript_raw': transcript_raw,
-            'transcript_user': transcript_user,
-            'language_detected': language_detected,
-            'language_rendered': language_rendered,
-            'tags_model': tags_model,
-            'tags_user': tags_user,
-            'category': category,
-            'audio_duration': audio_duration,
-            'created_at': local_time,
-            'updated_at': local_time
-        }
         
+        entry_data, error = build_entry(data, user_id, entry_id)
+        if error:
+            return jsonify({'error': error}), 400
+        
+        # Insert entry into database
         result = supabase.table('voice_entries').insert([entry_data]).execute()
         
         # Check for errors in the result
@@ -65,8 +101,20 @@ def save_entry_endpoint(supabase: Client, user_id: str):
             error_message = str(result.error) if result.error else 'Database insert failed'
             return jsonify({'error': error_message}), 500
             
-        logger.info(f'Entry saved successfully: {result.data}')
-        return jsonify({'success': True, 'entry': result.data})
+        bump_version(user_id, ENTRIES)
+        record_entries(result.data or [])
+        logger.info(f'Entry saved for {user_id}: {entry_id}')
+        
+        # Hand tags/emoji/emotion/embedding off to the background worker
+        queued = None
+        if ENRICHMENT_ASYNC:
+            queued = enqueue_enrichment(user_id, entry_id, enrichment_kinds(entry_data))
+            
+        return jsonify({
+            'success': True,
+            'entry': result.data,
+            'enrichment': {'queued': queued or [], 'async': queued is not None}
+        })
         
     except Exception as e:
         logger.error(f'Save entry API error: {e}')
@@ -0,0 +1,151 @@
+"""
+Single-flight coalescing for duplicate concurrent enrichment calls.
+
+Concurrent calls with the same (user_id, entry_id, operation, payload) share
+the first call's result instead of each paying for a GPT call and racing on the update.
+Duplicates in the same worker wait on an in-process event; duplicates in other
+workers wait on a Redis lock and read the leader's result from Redis.
+"""
+
+import hashlib
+import logging
+import threading
+import time
+import uuid
+from typing import Any, Callable, Dict, Optional
+
+import redis
+
+from .config import (
+    SINGLEFLIGHT_LOCK_TTL, SINGLEFLIGHT_WAIT_TIMEOUT,
+    SINGLEFLIGHT_RESULT_TTL, SINGLEFLIGHT_POLL_INTERVAL
+)
+from .json_provider import dumps, loads
+from .metrics import SINGLEFLIGHT_CALLS
+from .redis_client import get_redis
+
+logger = logging.getLogger(__name__)
+
+# Only delete the lock if we still own it
+RELEASE_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('del', KEYS[1])
+end
+return 0
+"""
+
+
+class _Call:
+    """An in-flight call that local duplicates can wait on."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+
+_local_lock = threading.Lock()
+_local_calls: Dict[str, _Call] = {}
+
+
+def single_flight(operation: str, user_id: str, entry_id: str, fn: Callable[[], Any],
+                  share: Callable[[Any], bool] = lambda result: True, payload: str = '') -> Any:
+    """
+    Run fn once for concurrent duplicates of the same operation on an entry.
+
+    Args:
+        operation: Operation name, e.g. 'pick_emoji'
+        user_id: Owner of the entry
+        entry_id: Entry being enriched
+        fn: Computes the result; must return a JSON-serialisable value
+        share: Whether a result may be handed to other workers' duplicates
+        payload: The call's input (e.g. the transcript); only calls with the
+            same payload are duplicates, so a later call with new input never
+            gets a result published for the old one
+
+    Returns:
+        The leader's result (JSON round-tripped when it came from another worker)
+    """
+    digest = hashlib.blake2b(payload.encode(), digest_size=8).hexdigest()
+    key = f'{user_id}:{entry_id}:{operation}:{digest}'
+
+    with _local_lock:
+        call = _local_calls.get(key)
+        is_leader = call is None
+        if is_leader:
+            call = _Call()
+            _local_calls[key] = call
+
+    if not is_leader:
+        if call.done.wait(SINGLEFLIGHT_WAIT_TIMEOUT):
+            SINGLEFLIGHT_CALLS.labels(operation, 'local_follower').inc()
+            if call.error is not None:
+                raise call.error
+            return call.result
+        SINGLEFLIGHT_CALLS.labels(operation, 'timeout').inc()
+        return fn()
+
+    try:
+        call.result = _run_distributed(operation, key, fn, share)
+        return call.result
+    except BaseException as e:
+        call.error = e
+        raise
+    finally:
+        call.done.set()
+        with _local_lock:
+            _local_calls.pop(key, None)
+
+
+def _release(client: redis.Redis, lock_key: str, token: str) -> None:
+    try:
+        client.eval(RELEASE_SCRIPT, 1, lock_key, token)
+    except redis.RedisError as e:
+        logger.warning(f'Failed to release single-flight lock {lock_key}: {e}')
+
+
+def _run_distributed(operation: str, key: str, fn: Callable[[], Any],
+                     share: Callable[[Any], bool]) -> Any:
+    """Coordinate with other workers through a Redis lock and result key."""
+    client = get_redis()
+    if client is None:
+        SINGLEFLIGHT_CALLS.labels(operation, 'leader').inc()
+        return fn()
+
+    lock_key = f'singleflight:lock:{key}'
+    result_key = f'singleflight:result:{key}'
+    token = uuid.uuid4().hex
+    deadline = time.monotonic() + SINGLEFLIGHT_WAIT_TIMEOUT
+
+    while True:
+        try:
+            cached = client.get(result_key)
+            if cached is not None:
+                SINGLEFLIGHT_CALLS.labels(operation, 'remote_follower').inc()
+                return loads(cached)
+            acquired = client.set(lock_key, token, nx=True, px=int(SINGLEFLIGHT_LOCK_TTL * 1000))
+        except redis.RedisError as e:
+            logger.warning(f'Single-flight unavailable, running {operation} directly: {e}')
+            SINGLEFLIGHT_CALLS.labels(operation, 'leader').inc()
+            return fn()
+
+        if acquired:
+            SINGLEFLIGHT_CALLS.labels(operation, 'leader').inc()
+            try:
+                result = fn()
+            except BaseException:
+                _release(client, lock_key, token)
+                raise
+
+            try:
+                if share(result):
+                    client.set(result_key, dumps(result), ex=SINGLEFLIGHT_RESULT_TTL)
+            except redis.RedisError as e:
+                logger.warning(f'Failed to publish single-flight result for {key}: {e}')
+            _release(client, lock_key, token)
+            return result
+
+        if time.monotonic() >= deadline:
+            SINGLEFLIGHT_CALLS.labels(operation, 'timeout').inc()
+            return fn()
+        time.sleep(SINGLEFLIGHT_POLL_INTERVAL)
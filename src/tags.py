@@ -6,6 +6,8 @@ from flask import Blueprint, request, jsonify
 from typing import List, Dict, Any
 import json
 from .auth import require_auth
+from .db.versions import ENTRIES
+from .http_cache import conditional_get
 from .db import TagsDB
 
 tags_bp = Blueprint('tags', __name__)
@@ -14,6 +16,7 @@ tags_db = TagsDB()
 
 @tags_bp.route('/api/tags', methods=['GET'])
 @require_auth
+@conditional_get(ENTRIES)
 def get_all_tags(user_id: str):
     """Get all tags for a user."""
     try:
@@ -33,6 +36,7 @@ def get_all_tags(user_id: str):
 
 @tags_bp.route('/api/tags/<tag>', methods=['GET'])
 @require_auth
+@conditional_get(ENTRIES)
 def get_entries_by_tag(user_id: str, tag: str):
     """Get all entries that have a specific tag."""
     try:
@@ -80,6 +84,7 @@ def get_entries_by_tags(user_id: str):
 
 @tags_bp.route('/api/tags/usage', methods=['GET'])
 @require_auth
+@conditional_get(ENTRIES)
 def get_tag_usage_count(user_id: str):
     """Get usage count for each tag."""
     try:
@@ -99,6 +104,7 @@ def get_tag_usage_count(user_id: str):
 
 @tags_bp.route('/api/tags/popular', methods=['GET'])
 @require_auth
+@conditional_get(ENTRIES)
 def get_popular_tags(user_id: str):
     """Get most popular tags for a user."""
     try:
@@ -1,8 +1,8 @@
 from flask import request, jsonify
-import openai
 import os
 import logging
 from .config import OPENAI_CHAT_MODEL
+from .llm import chat_completion
 
 logger = logging.getLogger(__name__)
 
@@ -17,12 +17,9 @@ def test_openai_endpoint():
                 'message': 'Please add OPENAI_API_KEY to your environment variables'
             }), 400
             
-        # Test OpenAI connection
-        openai.api_key = os.getenv('OPENAI_API_KEY')
-        
         # Simple test request
-        response = openai.chat.completions.create(
-            model=OPENAI_CHAT_MODEL,
+        response = chat_completion(
+            'test_openai',
             messages=[
                 {
                     'role': 'system',
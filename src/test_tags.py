@@ -1,17 +1,14 @@
 from flask import request, jsonify
-import openai
-import os
 import logging
 from datetime import datetime
-from .config import OPENAI_CHAT_MODEL
+from .llm import chat_completion
+from .logging_setup import redact_transcript
 
 logger = logging.getLogger(__name__)
 
 def classify_tags(transcript: str):
     """Classify tags for given transcript"""
     try:
-        openai.api_key = os.getenv('OPENAI_API_KEY')
-        
         prompt = f"""
         Analyze this transcript and generate relevant tags.
         Consider emotions, topics, and themes.
@@ -25,8 +22,8 @@ def classify_tags(transcript: str):
         - emotionScore: emotional tone score (-1 to 1)
         """
         
-        response = openai.chat.completions.create(
-            model=OPENAI_CHAT_MODEL,
+        response = chat_completion(
+            'test_tags',
             messages=[{"role": "user", "content": prompt}],
             temperature=0.3,
             max_tokens=200
@@ -63,7 +60,7 @@ def test_tags_endpoint():
             # Test with sample transcript
             test_transcript = "I feel really happy today and want to plan my future goals. I'm excited about the possibilities ahead."
             
-            logger.info(f'Test transcript: {test_transcript}')
+            logger.info(f'Test transcript: {redact_transcript(test_transcript)}')
             
             # Call tag classification
             result = classify_tags(test_transcript)
@@ -94,7 +91,7 @@ def test_tags_endpoint():
                     'error': 'Missing transcript'
                 }), 400
                 
-            logger.info(f'Testing custom transcript: {transcript[:100]}...')
+            logger.info(f'Testing custom transcript: {redact_transcript(transcript)}')
             
             result = classify_tags(transcript)
             
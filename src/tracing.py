@@ -0,0 +1,170 @@
+"""
+Request-scoped trace context.
+
+Each request gets an X-Request-ID (propagated from the caller when valid,
+otherwise generated) and, with TRACING_ENABLED, a server span that parents
+spans for auth, every Supabase query, every OpenAI call and core-service
+calls. Spans are exported to a local OTLP collector or a JSONL file.
+The request ID and trace ID are added to every log line.
+"""
+
+import contextvars
+import logging
+import os
+import re
+import uuid
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, Optional
+
+import structlog
+from flask import Flask, g, request
+from opentelemetry import context, propagate, trace
+from opentelemetry.sdk.resources import Resource
+from opentelemetry.sdk.trace import TracerProvider
+from opentelemetry.sdk.trace.export import BatchSpanProcessor, ConsoleSpanExporter
+from opentelemetry.sdk.trace.sampling import ParentBased, TraceIdRatioBased
+from opentelemetry.trace import SpanKind, Status, StatusCode
+
+from .config import (
+    TRACING_ENABLED, TRACING_EXPORTER, TRACING_FILE,
+    TRACING_SERVICE_NAME, TRACING_SAMPLE_RATIO
+)
+
+logger = logging.getLogger(__name__)
+
+REQUEST_ID_HEADER = 'X-Request-ID'
+# Accept caller IDs that are safe to log and echo back
+_REQUEST_ID_PATTERN = re.compile(r'^[A-Za-z0-9._:-]{1,128}$')
+
+request_id_var: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar('request_id', default=None)
+tracer = trace.get_tracer('sentari')
+
+_configured = False
+
+
+def configure_tracing() -> None:
+    """Install the tracer provider and exporter once per process."""
+    global _configured
+    if _configured or not TRACING_ENABLED:
+        return
+
+    provider = TracerProvider(
+        resource=Resource.create({'service.name': TRACING_SERVICE_NAME}),
+        sampler=ParentBased(TraceIdRatioBased(TRACING_SAMPLE_RATIO))
+    )
+    if TRACING_EXPORTER == 'otlp':
+        # Endpoint from OTEL_EXPORTER_OTLP_ENDPOINT (default http://localhost:4318)
+        from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+        exporter = OTLPSpanExporter()
+    else:
+        os.makedirs(os.path.dirname(TRACING_FILE) or '.', exist_ok=True)
+        exporter = ConsoleSpanExporter(
+            out=open(TRACING_FILE, 'a', buffering=1),
+            formatter=lambda span: span.to_json(indent=None) + '\n'
+        )
+    # The batch processor restarts its export thread in forked gunicorn workers
+    provider.add_span_processor(BatchSpanProcessor(exporter))
+    trace.set_tracer_provider(provider)
+    _configured = True
+    logger.info(f'Tracing enabled, exporting to {TRACING_EXPORTER}')
+
+
+@contextmanager
+def span(name: str, **attributes: Any) -> Iterator[trace.Span]:
+    """Open a child span of the current span; exceptions are recorded on it."""
+    with tracer.start_as_current_span(name, attributes=attributes) as current:
+        yield current
+
+
+def current_request_id() -> Optional[str]:
+    return request_id_var.get()
+
+
+def current_trace_id() -> Optional[str]:
+    span_context = trace.get_current_span().get_span_context()
+    return format(span_context.trace_id, '032x') if span_context.is_valid else None
+
+
+def outgoing_headers() -> Dict[str, str]:
+    """Headers that carry the request ID and trace context to downstream services."""
+    headers: Dict[str, str] = {}
+    propagate.inject(headers)
+    request_id = current_request_id()
+    if request_id:
+        headers[REQUEST_ID_HEADER] = request_id
+    return headers
+
+
+def in_current_context(fn: Callable) -> Callable:
+    """Wrap fn so worker threads run it inside the caller's trace context."""
+    ctx = contextvars.copy_context()
+
+    def run(*args, **kwargs):
+        return ctx.copy().run(fn, *args, **kwargs)
+    return run
+
+
+class RequestContextFilter(logging.Filter):
+    """Adds request_id and trace_id to every log record."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.request_id = current_request_id() or '-'
+        record.trace_id = current_trace_id() or '-'
+        return True
+
+
+def init_app(app: Flask) -> None:
+    """Assign a request ID and open a server span for every request."""
+    configure_tracing()
+
+    @app.before_request
+    def start_request_trace():
+        request_id = request.headers.get(REQUEST_ID_HEADER, '')
+        if not _REQUEST_ID_PATTERN.match(request_id):
+            request_id = uuid.uuid4().hex
+        g.request_id = request_id
+        g.request_id_token = request_id_var.set(request_id)
+
+        route = request.url_rule.rule if request.url_rule else 'unmatched'
+        parent = propagate.extract(request.headers)
+        server_span = tracer.start_span(
+            f'{request.method} {route}',
+            context=parent,
+            kind=SpanKind.SERVER,
+            attributes={
+                'http.method': request.method,
+                'http.route': route,
+                'http.request_id': request_id,
+            }
+        )
+        g.trace_span = server_span
+        g.trace_token = context.attach(trace.set_span_in_context(server_span, parent))
+        structlog.contextvars.bind_contextvars(request_id=request_id, trace_id=current_trace_id())
+
+    @app.after_request
+    def finish_request_trace(response):
+        request_id = g.get('request_id')
+        if request_id:
+            response.headers[REQUEST_ID_HEADER] = request_id
+        server_span = g.get('trace_span')
+        if server_span is not None:
+            server_span.set_attribute('http.status_code', response.status_code)
+            if response.status_code >= 500:
+                server_span.set_status(Status(StatusCode.ERROR))
+        return response
+
+    @app.teardown_request
+    def end_request_trace(error=None):
+        server_span = g.pop('trace_span', None)
+        if server_span is not None:
+            if error is not None:
+                server_span.record_exception(error)
+                server_span.set_status(Status(StatusCode.ERROR))
+            server_span.end()
+        token = g.pop('trace_token', None)
+        if token is not None:
+            context.detach(token)
+        request_id_token = g.pop('request_id_token', None)
+        if request_id_token is not None:
+            request_id_var.reset(request_id_token)
+        structlog.contextvars.clear_contextvars()
@@ -1,8 +1,13 @@
 from flask import request, jsonify
-from supabase import Client
+from typing import TYPE_CHECKING, List, Optional, Tuple
 import logging
 import re
 from datetime import datetime
+from .db.dashboard import record_entries
+from .db.versions import bump_version, ENTRIES
+
+if TYPE_CHECKING:
+    from supabase import Client
 
 logger = logging.getLogger(__name__)
 
@@ -36,7 +41,29 @@ def get_local_timestamp():
     """Get current timestamp in local timezone"""
     return datetime.now().isoformat()
 
-def update_tags_endpoint(supabase: Client, user_id: str, user_email: str):
+def validate_tags(tags_user: List) -> Optional[Tuple[List[str], List[str]]]:
+    """
+    Check tag format and split tags into predefined and custom ones.
+
+    Returns:
+        (standard_tags, custom_tags), or None if any tag is malformed
+    """
+    predefined_tag_names = [tag['tag'] for tag in PREDEFINED_TAGS]
+    invalid_format = any(
+        not isinstance(tag, str) or
+        tag.strip() == '' or
+        len(tag) > 50 or
+        not re.match(r'^[a-z0-9_-]+$', tag)
+        for tag in tags_user
+    )
+    if invalid_format:
+        return None
+
+    custom_tags = [tag for tag in tags_user if tag not in predefined_tag_names]
+    standard_tags = [tag for tag in tags_user if tag in predefined_tag_names]
+    return standard_tags, custom_tags
+
+def update_tags_endpoint(supabase: 'Client', user_id: str, user_email: str):
     """Handle updating user tags for entries"""
     try:
         data = request.get_json()
@@ -49,25 +76,16 @@ def update_tags_endpoint(supabase: Client, user_id: str, user_email: str):
             }), 400
             
         # Validate tags format
-        predefined_tag_names = [tag['tag'] for tag in PREDEFINED_TAGS]
-        invalid_format = any(
-            not isinstance(tag, str) or
-            tag.strip() == '' or
-            len(tag) > 50 or
-            not re.match(r'^[a-z0-9_-]+$', tag)
-            for tag in tags_user
-        )
-        
-        if invalid_format:
+        validated = validate_tags(tags_user)
+        if validated is None:
             return jsonify({
                 'error': 'Invalid tag format',
                 'details': 'Tags must be non-empty strings (max 50 chars) containing only lowercase letters, numbers, underscore and hyphen',
                 'suggestion': 'Example valid tags: happy, custom-tag, my_tag_123'
             }), 400
             
-        # Split tags into predefined and custom for logging
-        custom_tags = [tag for tag in tags_user if tag not in predefined_tag_names]
-        standard_tags = [tag for tag in tags_user if tag in predefined_tag_names]
+        # Predefined and custom tags are logged separately
+        standard_tags, custom_tags = validated
         
         logger.info(f'Updating tags for entry: {entry_id}, total: {len(tags_user)}, standard: {standard_tags}, custom: {custom_tags}')
         
@@ -101,6 +119,8 @@ def update_tags_endpoint(supabase: Client, user_id: str, user_email: str):
                 'error': 'Entry not found or access denied'
             }), 404
             
+        bump_version(user_id, ENTRIES)
+        record_entries(result.data)
         logger.info(f'Tags updated successfully: {entry_id}, updatedAt: {result.data[0]["updated_at"]}')
         
         return jsonify({
@@ -1,7 +1,11 @@
 from flask import request, jsonify
-from supabase import Client
+from typing import TYPE_CHECKING
 import logging
 from datetime import datetime
+from .db.versions import bump_version, ENTRIES
+
+if TYPE_CHECKING:
+    from supabase import Client
 
 logger = logging.getLogger(__name__)
 
@@ -9,7 +13,7 @@ def get_local_timestamp():
     """Get current timestamp in local timezone"""
     return datetime.now().isoformat()
 
-def update_transcript_endpoint(supabase: Client, user_id: str):
+def update_transcript_endpoint(supabase: 'Client', user_id: str):
     """Handle updating user transcripts for entries"""
     try:
         data = request.get_json()
@@ -44,6 +48,7 @@ def update_transcript_endpoint(supabase: Client, user_id: str):
                 'error': 'Entry not found or access denied'
             }), 404
             
+        bump_version(user_id, ENTRIES)
         logger.info(f'Transcript updated successfully: {entry_id}, updatedAt: {result.data[0]["updated_at"]}')
         
         return jsonify({
@@ -1,12 +1,13 @@
 from flask import request, jsonify
-import openai
 import os
 import logging
 import tempfile
 import re
 from typing import Dict, List, Any
 import json
-from .config import OPENAI_WHISPER_MODEL
+from .llm import transcribe
+from .logging_setup import redact_transcript
+from .metrics import WHISPER_STAGE_LATENCY
 
 logger = logging.getLogger(__name__)
 
@@ -29,7 +30,7 @@ def analyze_with_franc(text: str) -> Dict[str, Any]:
     chinese_ratio = chinese_chars / total_chars if total_chars > 0 else 0
     english_ratio = english_chars / total_chars if total_chars > 0 else 0
     
-    logger.info(f'Language analysis: chinese={chinese_chars}, english={english_chars}, total={total_chars}')
+    logger.debug(f'Language analysis: chinese={chinese_chars}, english={english_chars}, total={total_chars}')
     
     # Determine language distribution
     primary = 'unknown'
@@ -73,15 +74,14 @@ def analyze_with_franc(text: str) -> Dict[str, Any]:
 def transcribe_with_chinese_optimization(file_path: str) -> Dict[str, Any]:
     """Transcribe with Chinese optimization"""
     try:
-        with open(file_path, 'rb') as audio_file:
-            transcription = openai.audio.transcriptions.create(
-                file=audio_file,
-                model=OPENAI_WHISPER_MODEL,
-                response_format='verbose_json',
-                language='zh',
-                prompt='这段录音可能包含中文和英文混合内容。请完整准确地转录所有语言，保持原始语言不要翻译。如果有英文单词或句子，请保留英文原文。Chinese and English mixed content, transcribe exactly as spoken, do not translate.',
-                temperature=0
-            )
+        transcription = transcribe(
+            'whisper_zh',
+            file_path,
+            response_format='verbose_json',
+            language='zh',
+            prompt='这段录音可能包含中文和英文混合内容。请完整准确地转录所有语言，保持原始语言不要翻译。如果有英文单词或句子，请保留英文原文。Chinese and English mixed content, transcribe exactly as spoken, do not translate.',
+            temperature=0
+        )
         
         return {
             'text': transcription.text or '',
@@ -101,13 +101,12 @@ def transcribe_with_chinese_optimization(file_path: str) -> Dict[str, Any]:
 def transcribe_auto_detect(file_path: str) -> Dict[str, Any]:
     """Transcribe with auto language detection"""
     try:
-        with open(file_path, 'rb') as audio_file:
-            transcription = openai.audio.transcriptions.create(
-                file=audio_file,
-                model=OPENAI_WHISPER_MODEL,
-                response_format='verbose_json',
-                temperature=0
-            )
+        transcription = transcribe(
+            'whisper_auto',
+            file_path,
+            response_format='verbose_json',
+            temperature=0
+        )
         
         return {
             'text': transcription.text or '',
@@ -189,15 +188,16 @@ def select_best_result_english_first(results: Dict[str, Any]) -> Dict[str, Any]:
 
 def enhanced_transcription(file_path: str) -> Dict[str, Any]:
     """Enhanced transcription with language detection"""
-    logger.info('🔍 Starting detect-first transcription flow...')
+    logger.debug('🔍 Starting detect-first transcription flow...')
     
     try:
         # 1. Auto language detection
-        logger.info('🕵️‍♂️ Whisper auto-detect pass...')
-        auto_result = transcribe_auto_detect(file_path)
+        logger.debug('🕵️‍♂️ Whisper auto-detect pass...')
+        with WHISPER_STAGE_LATENCY.labels('pass1').time():
+            auto_result = transcribe_auto_detect(file_path)
         auto_franc = analyze_with_franc(auto_result['text'])
         
-        logger.info(f'📊 Auto franc: {auto_franc}')
+        logger.debug(f'Auto-detect franc: {auto_franc["primary"]} (confidence {auto_franc["confidence"]})')
         
         has_chinese_chars = bool(re.search(r'[\u4e00-\u9fff]', auto_result['text']))
         
@@ -206,9 +206,10 @@ def enhanced_transcription(file_path: str) -> Dict[str, Any]:
             auto_franc['confidence'] > 0.7 and 
             not has_chinese_chars):
             
-            logger.info('✅ Confident English detected, no Chinese fallback needed')
+            logger.debug('✅ Confident English detected, no Chinese fallback needed')
             return {
                 'text': auto_result['text'],
+                'duration': auto_result['duration'],
                 'detectedLanguages': auto_franc['languages'],
                 'primaryLanguage': auto_franc['primary'],
                 'renderingLanguage': 'en',
@@ -223,17 +224,20 @@ def enhanced_transcription(file_path: str) -> Dict[str, Any]:
             }
         
         # 3. Run Chinese optimization as backup
-        logger.info('🔄 Running Chinese-optimised pass for comparison...')
-        chinese_result = transcribe_with_chinese_optimization(file_path)
-        chinese_franc = analyze_with_franc(chinese_result['text'])
+        logger.debug('🔄 Running Chinese-optimised pass for comparison...')
+        with WHISPER_STAGE_LATENCY.labels('pass2').time():
+            chinese_result = transcribe_with_chinese_optimization(file_path)
         
         # 4. Select best result
-        final_result = select_best_result_english_first({
-            'english': {**auto_result, 'franc': auto_franc},
-            'chinese': {**chinese_result, 'franc': chinese_franc}
-        })
+        with WHISPER_STAGE_LATENCY.labels('select').time():
+            chinese_franc = analyze_with_franc(chinese_result['text'])
+            final_result = select_best_result_english_first({
+                'english': {**auto_result, 'franc': auto_franc},
+                'chinese': {**chinese_result, 'franc': chinese_franc}
+            })
+            final_result['duration'] = auto_result['duration'] or chinese_result['duration']
         
-        logger.info(f'✅ Final result: {final_result["strategy"]}, {final_result["renderingLanguage"]}')
+        logger.debug(f'✅ Final result: {final_result["strategy"]}, {final_result["renderingLanguage"]}')
         
         return final_result
         
@@ -244,6 +248,7 @@ def enhanced_transcription(file_path: str) -> Dict[str, Any]:
         fallback_franc = analyze_with_franc('')
         return {
             'text': '',
+            'duration': 0,
             'detectedLanguages': [],
             'primaryLanguage': 'unknown',
             'renderingLanguage': 'en',
@@ -269,29 +274,29 @@ def whisper_endpoint():
             return jsonify({'error': 'No file selected'}), 400
             
         # Log file details for debugging
-        logger.info(f'📁 File details: name={file.filename}, type={file.content_type}, size={file.content_length}')
+        logger.debug(f'Whisper upload: {file.filename}, {file.content_type}, {file.content_length} bytes')
         
         # Save file temporarily
-        with tempfile.NamedTemporaryFile(delete=False, suffix='.wav') as temp_file:
-            file.save(temp_file.name)
-            temp_file_path = temp_file.name
+        with WHISPER_STAGE_LATENCY.labels('upload').time():
+            with tempfile.NamedTemporaryFile(delete=False, suffix='.wav') as temp_file:
+                file.save(temp_file.name)
+                temp_file_path = temp_file.name
             
         try:
             # Use enhanced transcription
-            logger.info('🚀 Using enhanced language detection...')
             enhanced_result = enhanced_transcription(temp_file_path)
             
             # Clean up temp file
             os.unlink(temp_file_path)
             
             # Return enhanced results
-            logger.info(f'✅ Enhanced transcription completed: {enhanced_result["strategy"]}')
+            logger.info(f'Transcribed with {enhanced_result["strategy"]} ({enhanced_result["primaryLanguage"]}): {redact_transcript(enhanced_result["text"])}')
             
             return jsonify({
                 'text': enhanced_result['text'],
                 'language': enhanced_result['primaryLanguage'],
                 'language_rendered': enhanced_result['renderingLanguage'],
-                'duration': 0,  # Will be filled from transcription
+                'duration': enhanced_result['duration'],
                 'segments': [],
                 'enhanced': True,
                 'debug': {
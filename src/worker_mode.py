@@ -0,0 +1,114 @@
+"""
+Worker-class support for gunicorn.
+
+Under the gevent worker every blocking socket call must yield to the hub.
+Supabase (httpx), OpenAI (httpx), the core service (requests) and Redis all
+use the stdlib socket/ssl modules, so they become cooperative once those are
+monkey-patched. Patching has to happen before anything imports ssl, which is
+why apply_worker_patches() is the first thing gunicorn.conf.py and app.py run.
+"""
+
+import importlib
+import logging
+import os
+import time
+from typing import Dict
+
+from .config import WORKER_CLASS
+
+logger = logging.getLogger(__name__)
+
+# Gunicorn worker class path for each supported WORKER_CLASS
+GUNICORN_WORKER_CLASSES = {
+    'sync': 'sync',
+    'gevent': 'src.gevent_worker.GeventWorker',
+}
+
+# Modules whose patching makes our HTTP and Redis clients cooperative
+COOPERATIVE_MODULES = ('socket', 'ssl', 'select', 'threading', 'time', 'queue')
+
+# SDKs the app imports lazily; gunicorn's master imports them once before forking
+HEAVY_MODULES = ('openai', 'supabase', 'requests')
+
+
+def apply_worker_patches() -> bool:
+    """Monkey-patch the stdlib for gevent workers; no-op for sync workers."""
+    if WORKER_CLASS != 'gevent':
+        return False
+
+    from gevent import monkey
+    if monkey.is_module_patched('socket'):
+        return True
+
+    # aggressive=False keeps select.epoll defined; httpcore imports trio when it
+    # is installed and trio fails at import time without it. Our clients never
+    # use epoll directly, they block on the patched socket.
+    monkey.patch_all(aggressive=False)
+
+    # psycopg2 is blocking C code; make it cooperative if it is ever used
+    try:
+        import psycogreen.gevent
+        psycogreen.gevent.patch_psycopg()
+    except ImportError:
+        pass
+
+    return True
+
+
+def native(module: str, name: str):
+    """Real OS-thread primitives even when gevent has patched the stdlib."""
+    try:
+        from gevent import monkey
+        if monkey.is_module_patched(module):
+            return monkey.get_original(module, name)
+    except ImportError:
+        pass
+    return getattr(importlib.import_module(module), name)
+
+
+def cooperative_report() -> Dict[str, bool]:
+    """Report which stdlib modules are patched in the current process."""
+    if WORKER_CLASS != 'gevent':
+        return {}
+
+    from gevent import monkey
+    return {name: monkey.is_module_patched(name) for name in COOPERATIVE_MODULES}
+
+
+def verify_cooperative() -> None:
+    """Fail fast if a gevent worker would run blocking clients."""
+    report = cooperative_report()
+    unpatched = [name for name, patched in report.items() if not patched]
+    if unpatched:
+        raise RuntimeError(f'gevent worker is not cooperative, unpatched modules: {", ".join(unpatched)}')
+    if report:
+        logger.info(f'gevent worker {os.getpid()} cooperative: {report}')
+
+
+def preload_sdks() -> None:
+    """
+    Import the lazily-loaded SDKs in the gunicorn master.
+
+    Forked (and recycled) workers then share the imported modules copy-on-write
+    instead of each paying the import. No clients or sockets are created here.
+    """
+    started = time.perf_counter()
+    for name in HEAVY_MODULES:
+        importlib.import_module(name)
+    logger.info(f'Preloaded {", ".join(HEAVY_MODULES)} in {(time.perf_counter() - started) * 1000:.0f}ms')
+
+
+def warm_worker() -> None:
+    """Create this worker's OpenAI and Supabase clients before it accepts requests."""
+    from .db.base import get_supabase
+    from .llm import get_client
+
+    started = time.perf_counter()
+    try:
+        get_client()
+        get_supabase()
+    except Exception as e:
+        # Clients are created on first use instead
+        logger.warning(f'Worker {os.getpid()} warmup failed: {e}')
+        return
+    logger.info(f'Worker {os.getpid()} warmed clients in {(time.perf_counter() - started) * 1000:.0f}ms')